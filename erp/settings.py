@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -42,9 +43,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 MIDDLEWARE = [
+    'inventory.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,21 +55,37 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'inventory.choices.ChoiceCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'erp.urls'
 
+# Production rendering mode: templates are compiled once per process and
+# fragments wrapped in {% rendercache %} (the sidebar, unbound form bodies) are
+# served from TEMPLATE_FRAGMENT_CACHE_ALIAS. On by default when DEBUG is off;
+# `manage.py render_benchmark` compares both modes.
+
+RENDER_CACHE = os.getenv('RENDER_CACHE', '0' if DEBUG else '1') == '1'
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if RENDER_CACHE:
+    TEMPLATE_LOADERS = [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to QueryInstrumentationMiddleware
+        'BACKEND': 'inventory.instrumentation.TimedDjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': TEMPLATE_LOADERS,
         },
     },
 ]
@@ -129,3 +148,99 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Lookup payloads go to their own cache. Without LOOKUP_CACHE_URL each worker
+# keeps a size-capped in-process LRU; set it (e.g. redis://redis:6379/1, needs
+# the redis package) to share one cache between all workers. A version bump only
+# reaches the in-process cache of the worker that saved, so there payloads expire
+# after LOOKUP_CACHE_LOCAL_TIMEOUT seconds: the most other workers can lag.
+
+LOOKUP_CACHE_ALIAS = 'lookups'
+LOOKUP_CACHE_URL = os.getenv('LOOKUP_CACHE_URL')
+LOOKUP_CACHE_LOCAL_TIMEOUT = int(os.getenv('LOOKUP_CACHE_LOCAL_TIMEOUT', '30'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    LOOKUP_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': LOOKUP_CACHE_URL,
+        'TIMEOUT': 24 * 60 * 60,
+    } if LOOKUP_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lookups',
+        'TIMEOUT': LOOKUP_CACHE_LOCAL_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    # Rendered template fragments; per process so a deploy starts empty
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template_fragments',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 500},
+    },
+}
+
+TEMPLATE_FRAGMENT_CACHE_ALIAS = 'template_fragments'
+
+
+# Foreign-key select choices are evaluated once per request and shared by every
+# field over the same queryset (inventory.choices). With SHARED_CHOICE_CACHE the
+# master-data choice lists are also kept in the lookup cache between requests,
+# invalidated by the same version bump as the lookup payloads.
+
+SHARED_CHOICE_CACHE = True
+
+
+# Lookup delta sync
+# Tombstones older than the retention are purged by `manage.py purge_tombstones`;
+# clients with an older sync token get a full reload. The overlap re-sends rows
+# stamped shortly before a token, which may have committed after it.
+
+LOOKUP_TOMBSTONE_RETENTION_DAYS = 30
+LOOKUP_SYNC_OVERLAP_SECONDS = 60
+
+
+# Document numbering
+# Number of document numbers each worker leases at once, per prefix.
+# Unused numbers of a block are reported by `manage.py number_gaps` once the
+# worker holding it has leased another (or with --include-live).
+
+DOCUMENT_NUMBER_BLOCK_SIZES = {
+    'GRN': 100,
+    'ISS': 100,
+    'LOT': 100,
+}
+
+
+# Request instrumentation
+# QueryInstrumentationMiddleware adds a Server-Timing header (query count, DB
+# and template time) to every response and logs a JSON line for this fraction
+# of requests, plus every request slower than SQL_INSTRUMENTATION_SLOW_MS.
+# `manage.py test` logs nothing, so the test output stays readable.
+
+TESTING = sys.argv[1:2] == ['test']
+
+SQL_INSTRUMENTATION_SAMPLE_RATE = 0 if TESTING else float(os.getenv('SQL_INSTRUMENTATION_SAMPLE_RATE', '0.01'))
+SQL_INSTRUMENTATION_SLOW_MS = 1000
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.NullHandler' if TESTING else 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'inventory.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,140 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIteratorValue
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select that renders only the empty option and the selected one.
+
+    Candidates are fetched in the browser from ``lookup_<lookup>`` (see
+    static/js/autocomplete-select.js), so the page no longer carries every
+    row of the related table. ``label_fields`` are the lookup columns the
+    option text is built from, on the server and in the browser alike.
+    """
+
+    def __init__(self, lookup, label_fields, attrs=None):
+        super().__init__(attrs)
+        self.lookup = lookup
+        self.label_fields = tuple(label_fields)
+        # Set by AutocompleteModelChoiceField.to_python so re-rendering a
+        # bound form does not fetch the instance a second time
+        self.instance = None
+
+    def __deepcopy__(self, memo):
+        obj = super().__deepcopy__(memo)
+        obj.instance = None
+        return obj
+
+    def label_from_instance(self, obj):
+        return ' - '.join(str(getattr(obj, field)) for field in self.label_fields if getattr(obj, field) not in (None, ''))
+
+    def selected_objects(self, value):
+        pks = {str(pk) for pk in value if pk not in (None, '')}
+        if not pks:
+            return []
+        if self.instance is not None and pks == {str(self.instance.pk)}:
+            return [self.instance]
+        try:
+            return list(self.choices.queryset.filter(pk__in=pks))
+        except (ValueError, TypeError, ValidationError):
+            return []
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        choices = []
+        if field.empty_label is not None:
+            choices.append(('', field.empty_label))
+        for obj in self.selected_objects(value):
+            choices.append((ModelChoiceIteratorValue(field.prepare_value(obj), obj), field.label_from_instance(obj)))
+
+        all_choices = self.choices
+        self.choices = choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs'].update({
+            'data-autocomplete-url': reverse(f"lookup_{self.lookup}"),
+            'data-autocomplete-label': ','.join(self.label_fields),
+        })
+        return context
+
+
+class AutocompleteModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField for an ``AutocompleteSelect``: the submitted pk is
+    checked with a single ``queryset.get()`` and option labels come from
+    the widget's ``label_fields``. Pair it with an ``AutocompleteSelect``
+    through the form's ``Meta.field_classes`` and ``Meta.widgets``, and
+    give the form ``AutocompleteFormMixin``.
+
+    A formset of many such fields can fetch every submitted pk in one
+    query and hand the instances over through ``prefetched`` (pk string to
+    instance); a pk found there skips the ``get()``.
+    """
+
+    prefetched = None
+
+    def label_from_instance(self, obj):
+        if isinstance(self.widget, AutocompleteSelect):
+            return self.widget.label_from_instance(obj)
+        return super().label_from_instance(obj)
+
+    def to_python(self, value):
+        if self.prefetched is not None and str(value) in self.prefetched:
+            obj = self.prefetched[str(value)]
+        else:
+            obj = super().to_python(value)
+        if isinstance(self.widget, AutocompleteSelect):
+            self.widget.instance = obj
+        return obj
+
+
+class AutocompleteFormMixin:
+    """
+    ModelForm mixin validating its ``AutocompleteModelChoiceField``\\ s in
+    as few queries as possible.
+
+    The submitted pks are fetched with one ``in_bulk()`` per queryset, so
+    fields over the same rows (a GRN's PO, client PO and GPO) share it, and
+    the fields skip the model's own ForeignKey check, which would fetch
+    every row a second time. Fields a formset already handed ``prefetched``
+    instances to are left alone.
+    """
+
+    def _autocomplete_fields(self):
+        return {name: field for name, field in self.fields.items() if isinstance(field, AutocompleteModelChoiceField)}
+
+    def full_clean(self):
+        if self.is_bound:
+            groups = {}
+            for name, field in self._autocomplete_fields().items():
+                if field.prefetched is not None or field.disabled:
+                    continue
+                key = field.to_field_name or field.queryset.model._meta.pk.name
+                value = field.widget.value_from_datadict(self.data, self.files, self.add_prefix(name))
+                queryset, values, fields = groups.setdefault(
+                    (field.queryset.model, str(field.queryset.query), key), (field.queryset, set(), [])
+                )
+                try:
+                    if value not in field.empty_values:
+                        values.add(field.queryset.model._meta.get_field(key).to_python(value))
+                except ValidationError:
+                    pass  # Left to the field, which reports it
+                fields.append(field)
+            for (model, query, key), (queryset, values, fields) in groups.items():
+                prefetched = {str(value): obj for value, obj in queryset.in_bulk(values, field_name=key).items()}
+                for field in fields:
+                    field.prefetched = prefetched
+        super().full_clean()
+
+    def _get_validation_exclusions(self):
+        # The field has checked the pk against its queryset already
+        exclude = super()._get_validation_exclusions()
+        exclude.update(self._autocomplete_fields())
+        return exclude
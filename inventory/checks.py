@@ -0,0 +1,32 @@
+import os
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+@register(Tags.caches)
+def check_lookup_cache(app_configs, **kwargs):
+    """
+    The lookup cache is invalidated by version bumps (lookup_cache.bump_version),
+    which a per-process cache only sees in the process that made them.
+    """
+    alias = getattr(settings, 'LOOKUP_CACHE_ALIAS', 'default')
+    config = settings.CACHES.get(alias, {})
+    if config.get('BACKEND') != 'django.core.cache.backends.locmem.LocMemCache':
+        return []
+    timeout = config.get('TIMEOUT', 300)
+    if timeout is None:
+        return [Error(
+            f"The '{alias}' lookup cache is a per-process LocMemCache that never expires.",
+            hint="Other workers would serve stale lookups and choice lists forever after a save. "
+                 "Set a finite TIMEOUT, or a shared backend through LOOKUP_CACHE_URL.",
+            id='inventory.E001',
+        )]
+    workers = int(os.getenv('WEB_CONCURRENCY', '1') or 1)
+    if workers > 1:
+        return [Warning(
+            f"The '{alias}' lookup cache is per process but WEB_CONCURRENCY is {workers}.",
+            hint=f"Workers that did not handle a save serve stale lookups for up to {timeout}s. "
+                 "Set LOOKUP_CACHE_URL to share one cache between the workers.",
+            id='inventory.W001',
+        )]
+    return []
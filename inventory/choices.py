@@ -0,0 +1,102 @@
+import hashlib
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.forms.models import ModelChoiceField, ModelChoiceIterator
+
+from .lookup_cache import current_versions, lookup_cache
+from .signals import CACHED_LOOKUP_MODELS
+
+# Evaluated choice querysets of the current request, keyed by model and SQL
+_request_choices = ContextVar('request_choices', default=None)
+
+
+class ChoiceCacheMiddleware:
+    """Gives each request its own choice cache (see ``shared_choices``)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request_choices.set({})
+        try:
+            return self.get_response(request)
+        finally:
+            _request_choices.reset(token)
+
+
+def _choice_key(queryset):
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha1(f"{sql}|{params!r}".encode()).hexdigest()
+    return f"choices:{queryset.model._meta.label_lower}:{digest}"
+
+
+def _cached_across_requests(queryset, key):
+    # Only models whose cache version is bumped on save/delete (signals.py)
+    versions = current_versions(queryset.model)
+    cache = lookup_cache()
+    entry = cache.get(key)
+    if entry is not None and entry[0] == versions:
+        return entry[1]
+    objects = list(queryset)
+    cache.set(key, (versions, objects))
+    return objects
+
+
+def shared_choices(queryset):
+    """
+    Returns ``list(queryset)``, evaluated at most once per request for the
+    same SQL, so fields pointing at the same model share one result.
+
+    With ``SHARED_CHOICE_CACHE`` on, choices of the master-data models in
+    ``signals.CACHED_LOOKUP_MODELS`` are also kept in the lookup cache and
+    reused by later requests until the model's cache version changes.
+    Outside a request (no ``ChoiceCacheMiddleware``) every call queries.
+    """
+    try:
+        key = _choice_key(queryset)
+    except EmptyResultSet:
+        return []
+
+    store = _request_choices.get()
+    if store is not None and key in store:
+        return store[key]
+
+    if getattr(settings, 'SHARED_CHOICE_CACHE', False) and queryset.model in CACHED_LOOKUP_MODELS:
+        objects = _cached_across_requests(queryset, key)
+    else:
+        objects = list(queryset)
+    if store is not None:
+        store[key] = objects
+    return objects
+
+
+class SharedModelChoiceIterator(ModelChoiceIterator):
+    """ModelChoiceIterator reading its rows from ``shared_choices``."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in shared_choices(self.queryset):
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(shared_choices(self.queryset)) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(shared_choices(self.queryset))
+
+
+class SharedChoicesMixin:
+    """
+    ModelForm mixin switching every ModelChoiceField of the form to
+    ``SharedModelChoiceIterator``. Put it before ``forms.ModelForm``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            if isinstance(field, ModelChoiceField) and field.iterator is ModelChoiceIterator:
+                field.iterator = SharedModelChoiceIterator
+                field.widget.choices = field.choices
@@ -0,0 +1,49 @@
+# Compact lookup wire format:
+#   {"columns": ["id", "item_name", "item_category__name"],
+#    "rows": [[1, "Red dye", 0], [2, "Blue dye", 0]],
+#    "dictionaries": {"item_category__name": ["Chemicals"]}}
+# Values of dictionary-encoded columns are indexes into their dictionary.
+
+COLUMNAR_CONTENT_TYPE = 'application/vnd.erp.columnar+json'
+FORMATS = ('rows', 'columnar')
+
+# Content-Type of a lookup response in each format
+CONTENT_TYPES = {'rows': 'application/json', 'columnar': COLUMNAR_CONTENT_TYPE}
+
+
+def response_format(request):
+    """
+    Returns the lookup wire format asked for by ``?format=`` or, failing
+    that, by an Accept header naming COLUMNAR_CONTENT_TYPE.
+    """
+    requested = request.GET.get('format')
+    if requested:
+        return requested
+    if COLUMNAR_CONTENT_TYPE in request.headers.get('Accept', ''):
+        return 'columnar'
+    return 'rows'
+
+
+class ColumnarEncoder:
+    """Turns ``values()`` dicts into row arrays, dictionary-encoding repeated strings."""
+
+    def __init__(self, fields, dictionary_fields=()):
+        self.fields = list(fields)
+        self.dictionaries = {field: {} for field in dictionary_fields if field in self.fields}
+
+    def encode(self, row):
+        values = []
+        for field in self.fields:
+            value = row[field]
+            dictionary = self.dictionaries.get(field)
+            if dictionary is not None and value is not None:
+                value = dictionary.setdefault(value, len(dictionary))
+            values.append(value)
+        return values
+
+    def dictionary_payload(self):
+        return {field: list(dictionary) for field, dictionary in self.dictionaries.items()}
+
+    def payload(self, rows):
+        encoded = [self.encode(row) for row in rows]
+        return {'columns': self.fields, 'rows': encoded, 'dictionaries': self.dictionary_payload()}
@@ -0,0 +1,128 @@
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import CostingRun, CostLayer, ItemCost, PendingCost, StockMovement
+
+# Items per statement in incremental runs, well under SQLite's parameter limit
+ITEM_CHUNK = 500
+
+# FIFO: receipts are consumed in date order by the item's net issued
+# quantity (issues minus returns, all areas). A receipt whose running
+# total passes the issued quantity is a layer with stock left.
+FIFO_LAYERS_SQL = """
+INSERT INTO {layer} (item_id, receipt_id, received_date, remaining_quantity, unit_cost)
+WITH receipts AS (
+    SELECT id, item_id, movement_date, quantity, value,
+           SUM(quantity) OVER (PARTITION BY item_id ORDER BY movement_date, id) AS received
+    FROM {movement}
+    WHERE source_type = 'GRN' AND quantity > 0 {items}
+),
+issued AS (
+    SELECT item_id, -SUM(quantity) AS quantity
+    FROM {movement}
+    WHERE source_type = 'ISS' {items}
+    GROUP BY item_id
+)
+SELECT r.item_id, r.id, r.movement_date,
+       CASE WHEN r.received - COALESCE(i.quantity, 0) < r.quantity
+            THEN r.received - COALESCE(i.quantity, 0) ELSE r.quantity END,
+       r.value * 1.0 / r.quantity
+FROM receipts r LEFT JOIN issued i ON i.item_id = r.item_id
+WHERE r.received > COALESCE(i.quantity, 0)
+"""
+
+# Moving average: the ledger value of the stock on hand over its quantity,
+# as issues are valued at the average when posted. Without stock on hand it
+# falls back to the average of all receipts. Then the FIFO totals of the
+# layers above.
+ITEM_COSTS_SQL = """
+INSERT INTO {cost} (item_id, on_hand_quantity, average_cost, fifo_cost, fifo_value, computed_at)
+SELECT m.item_id, SUM(m.quantity),
+       CASE WHEN SUM(m.quantity) > 0 THEN SUM(m.value) * 1.0 / SUM(m.quantity)
+            ELSE SUM(CASE WHEN m.source_type = 'GRN' THEN m.value END) * 1.0
+                 / NULLIF(SUM(CASE WHEN m.source_type = 'GRN' THEN m.quantity END), 0) END,
+       l.value * 1.0 / NULLIF(l.quantity, 0),
+       l.value,
+       %s
+FROM {movement} m
+LEFT JOIN (
+    SELECT item_id, SUM(remaining_quantity) AS quantity, SUM(remaining_quantity * unit_cost) AS value
+    FROM {layer}
+    WHERE 1 = 1 {items}
+    GROUP BY item_id
+) l ON l.item_id = m.item_id
+WHERE 1 = 1 {m_items}
+GROUP BY m.item_id, l.quantity, l.value
+"""
+
+
+def _cost_items(item_ids, computed_at):
+    """Recomputes layers and costs of ``item_ids`` (every item when None) in two statements."""
+    tables = {
+        'layer': CostLayer._meta.db_table,
+        'cost': ItemCost._meta.db_table,
+        'movement': StockMovement._meta.db_table,
+    }
+    computed_at = connection.ops.adapt_datetimefield_value(computed_at)
+    with connection.cursor() as cursor:
+        if item_ids is None:
+            CostLayer.objects.all().delete()
+            ItemCost.objects.all().delete()
+            cursor.execute(FIFO_LAYERS_SQL.format(items='', **tables))
+            cursor.execute(ITEM_COSTS_SQL.format(items='', m_items='', **tables), [computed_at])
+            return
+        for start in range(0, len(item_ids), ITEM_CHUNK):
+            chunk = item_ids[start:start + ITEM_CHUNK]
+            CostLayer.objects.filter(item_id__in=chunk).delete()
+            ItemCost.objects.filter(item_id__in=chunk).delete()
+            placeholders = ', '.join(['%s'] * len(chunk))
+            items = f"AND item_id IN ({placeholders})"
+            cursor.execute(FIFO_LAYERS_SQL.format(items=items, **tables), chunk * 2)
+            cursor.execute(
+                ITEM_COSTS_SQL.format(items=items, m_items=f"AND m.item_id IN ({placeholders})", **tables),
+                [computed_at] + chunk * 2,
+            )
+
+
+def run_costing(full=False):
+    """
+    Computes moving-average and FIFO costs from the stock ledger.
+
+    A full run recomputes every item. Otherwise only the items queued in
+    PendingCost by stock.record_movement are recomputed, each from its
+    whole history, since a new receipt or issue can shift every later
+    layer. The queue rows are locked first, so a movement still being
+    posted is waited for rather than missed, and only the rows read are
+    cleared. The first run is always full. Returns the CostingRun recorded.
+    """
+    started_at = timezone.now()
+    previous = CostingRun.objects.order_by('-id').first()
+    with transaction.atomic():
+        pending = sorted(PendingCost.objects.select_for_update().values_list('item_id', flat=True))
+        last_movement_id = StockMovement.objects.aggregate(last=Max('id'))['last'] or 0
+        if full or previous is None:
+            mode = 'full'
+            item_ids = None
+        else:
+            mode = 'incremental'
+            item_ids = pending
+        _cost_items(item_ids, started_at)
+        for start in range(0, len(pending), ITEM_CHUNK):
+            PendingCost.objects.filter(item_id__in=pending[start:start + ITEM_CHUNK]).delete()
+        return CostingRun.objects.create(
+            mode=mode,
+            last_movement_id=last_movement_id,
+            items_costed=ItemCost.objects.count() if item_ids is None else len(item_ids),
+            started_at=started_at,
+        )
+
+
+def item_unit_cost(item, method='average'):
+    """
+    Unit cost of ``item`` by ``method`` ('average' or 'fifo') from the last
+    costing run, falling back to the item's std_cost when it has none.
+    """
+    field = {'average': 'average_cost', 'fifo': 'fifo_cost'}[method]
+    cost = ItemCost.objects.filter(item=item).values_list(field, flat=True).first()
+    return cost if cost is not None else item.std_cost
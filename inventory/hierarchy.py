@@ -0,0 +1,112 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import ItemClosure, ItemDefinition
+
+# Every ancestor of the new parent above every node of the moved subtree
+MOVE_SQL = """
+INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+SELECT p.ancestor_id, c.descendant_id, p.depth + c.depth + 1
+FROM {closure} p, {closure} c
+WHERE p.descendant_id = %s AND c.ancestor_id = %s
+"""
+
+REBUILD_ROOTS_SQL = "INSERT INTO {closure} (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM {item}"
+
+REBUILD_LEVEL_SQL = """
+INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+SELECT c.ancestor_id, i.id, c.depth + 1
+FROM {closure} c JOIN {item} i ON i.base_item_id = c.descendant_id
+WHERE c.depth = %s
+"""
+
+
+def _tables():
+    return {'closure': ItemClosure._meta.db_table, 'item': ItemDefinition._meta.db_table}
+
+
+def link_item(item, created=False):
+    """Keeps the closure rows of ``item`` in step with its base_item after a save."""
+    if not created:
+        parents = list(ItemClosure.objects.filter(descendant=item, depth__lte=1).values_list('depth', 'ancestor_id'))
+        if parents:
+            parent = dict(parents).get(1)
+            if parent != item.base_item_id:
+                move_item(item, item.base_item_id)
+            return
+    paths = [ItemClosure(ancestor=item, descendant=item, depth=0)]
+    if item.base_item_id:
+        paths += [
+            ItemClosure(ancestor_id=ancestor_id, descendant=item, depth=depth + 1)
+            for ancestor_id, depth in ItemClosure.objects.filter(descendant_id=item.base_item_id)
+            .values_list('ancestor_id', 'depth')
+        ]
+    ItemClosure.objects.bulk_create(paths)
+
+
+def check_base_item(item, parent_id=None):
+    """Raises ValueError when the base item (``parent_id`` or item.base_item) is ``item`` or one of its variants."""
+    parent_id = item.base_item_id if parent_id is None else parent_id
+    if item.pk is None or parent_id is None:
+        return
+    if parent_id == item.pk or ItemClosure.objects.filter(ancestor=item, descendant_id=parent_id).exists():
+        raise ValueError(f"Item #{parent_id} is a variant of item #{item.pk} and cannot be its base item")
+
+
+def move_item(item, parent_id):
+    """Re-parents ``item`` and its variants under ``parent_id`` (None for a base item)."""
+    subtree = ItemClosure.objects.filter(ancestor=item).values('descendant_id')
+    check_base_item(item, parent_id)
+    with transaction.atomic():
+        ItemClosure.objects.filter(descendant_id__in=subtree).exclude(ancestor_id__in=subtree).delete()
+        if parent_id is not None:
+            with connection.cursor() as cursor:
+                cursor.execute(MOVE_SQL.format(**_tables()), [parent_id, item.pk])
+
+
+def rebuild_closure():
+    """Rebuilds the closure table one hierarchy level per statement. Returns the number of rows."""
+    tables = _tables()
+    with transaction.atomic(), connection.cursor() as cursor:
+        ItemClosure.objects.all().delete()
+        cursor.execute(REBUILD_ROOTS_SQL.format(**tables))
+        depth = 0
+        while True:
+            cursor.execute(REBUILD_LEVEL_SQL.format(**tables), [depth])
+            if not cursor.rowcount:
+                break
+            depth += 1
+    return ItemClosure.objects.count()
+
+
+def descendants(item, include_self=False):
+    """Variants of ``item`` at any depth: one indexed join on the closure table."""
+    # One filter() call, so both conditions apply to the same closure row
+    return ItemDefinition.objects.filter(
+        ancestor_paths__ancestor=item, ancestor_paths__depth__gte=0 if include_self else 1
+    )
+
+
+def ancestors(item, include_self=False):
+    """Base items above ``item``, nearest first."""
+    return ItemDefinition.objects.filter(
+        descendant_paths__descendant=item, descendant_paths__depth__gte=0 if include_self else 1
+    ).order_by('descendant_paths__depth')
+
+
+def roll_up(queryset, item_field='item', **aggregates):
+    """
+    Aggregates ``queryset`` (rows with an ``item_field`` foreign key, or
+    items themselves when it is None) per family: each row counts towards
+    its item and every base item above it.
+    Returns ``{base_item_id: {aggregate: value}}``, one join on the closure
+    table. Filter the queryset on ``<item_field>__ancestor_paths__ancestor__in``
+    to roll up only some families.
+    """
+    prefix = f'{item_field}__' if item_field else ''
+    rows = (
+        queryset.values(family=F(f'{prefix}ancestor_paths__ancestor'))
+        .annotate(**aggregates)
+        .order_by()
+    )
+    return {row.pop('family'): row for row in rows}
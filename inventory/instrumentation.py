@@ -0,0 +1,133 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+logger = logging.getLogger(__name__)
+
+# Longest SQL text kept for the slowest statement
+MAX_SQL_LENGTH = 500
+
+_request_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Database and template timings of one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.slowest_sql = None
+        self.slowest_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += elapsed
+            if elapsed > self.slowest_time:
+                self.slowest_time = elapsed
+                self.slowest_sql = sql
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _request_stats.get()
+        if stats is None:
+            return super().render(context, request)
+        # Templates rendered while rendering another one are already counted
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report their render time to RequestStats."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records query count, DB time, template render time and the slowest
+    statement of each request.
+
+    Queries are timed through ``connection.execute_wrapper`` on every
+    database alias, so nothing depends on DEBUG or ``connection.queries``.
+    The totals go out in a ``Server-Timing`` header; a sample of requests
+    (``SQL_INSTRUMENTATION_SAMPLE_RATE``), and every request slower than
+    ``SQL_INSTRUMENTATION_SLOW_MS``, is also logged as one JSON line.
+
+    Template time needs the ``TimedDjangoTemplates`` backend. Queries run
+    while rendering a template count towards both. Rows fetched while a
+    streaming response is being sent are not included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = stats.server_timing(total)
+        slow_ms = getattr(settings, 'SQL_INSTRUMENTATION_SLOW_MS', 1000)
+        if total * 1000 >= slow_ms or random.random() < getattr(settings, 'SQL_INSTRUMENTATION_SAMPLE_RATE', 0.01):
+            self.log(request, response, stats, total)
+        return response
+
+    def log(self, request, response, stats, total):
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'queries': stats.queries,
+            'db_ms': round(stats.db_time * 1000, 1),
+            'template_ms': round(stats.template_time * 1000, 1),
+            'slowest_ms': round(stats.slowest_time * 1000, 1),
+            'slowest_sql': stats.slowest_sql[:MAX_SQL_LENGTH] if stats.slowest_sql else None,
+        }))
@@ -1,7 +1,8 @@
 from django import forms
+from .autocomplete import AutocompleteFormMixin, AutocompleteModelChoiceField, AutocompleteSelect
 from .models import IssueTransaction
 
-class IssueTransactionForm(forms.ModelForm):
+class IssueTransactionForm(AutocompleteFormMixin, forms.ModelForm):
     class Meta:
         model = IssueTransaction
         fields = [
@@ -13,8 +14,16 @@ class IssueTransactionForm(forms.ModelForm):
             'customer',
             'lot_no',
             'dc_no',
-            'material'
+            'material',
+            'item',
+            'quantity',
         ]
+        field_classes = {
+            'area': AutocompleteModelChoiceField,
+            'department': AutocompleteModelChoiceField,
+            'customer': AutocompleteModelChoiceField,
+            'item': AutocompleteModelChoiceField,
+        }
         widgets = {
             'transaction_no': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -28,13 +37,13 @@ class IssueTransactionForm(forms.ModelForm):
             'nature': forms.Select(attrs={
                 'class': 'form-control'
             }),
-            'area': forms.Select(attrs={
+            'area': AutocompleteSelect('area', ('areacode', 'areaname'), attrs={
                 'class': 'form-control'
             }),
-            'department': forms.Select(attrs={
+            'department': AutocompleteSelect('department', ('name',), attrs={
                 'class': 'form-control'
             }),
-            'customer': forms.Select(attrs={
+            'customer': AutocompleteSelect('customer', ('customer_name',), attrs={
                 'class': 'form-control'
             }),
             'lot_no': forms.TextInput(attrs={
@@ -49,6 +58,14 @@ class IssueTransactionForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Enter material'
             }),
+            'item': AutocompleteSelect('item', ('item_code', 'item_name'), attrs={
+                'class': 'form-control'
+            }),
+            'quantity': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'step': '0.01',
+                'placeholder': '0.00'
+            }),
         }
         labels = {
             'transaction_no': 'Transaction Number',
@@ -59,7 +76,9 @@ class IssueTransactionForm(forms.ModelForm):
             'customer': 'Customer',
             'lot_no': 'Lot Number',
             'dc_no': 'D/C Number',
-            'material': 'Material'
+            'material': 'Material',
+            'item': 'Item',
+            'quantity': 'Quantity',
         }
         help_texts = {
             'transaction_no': 'Unique transaction number',
@@ -70,5 +89,12 @@ class IssueTransactionForm(forms.ModelForm):
             'customer': 'Customer for the transaction',
             'lot_no': 'Lot number',
             'dc_no': 'D/C number',
-            'material': 'Material details'
+            'material': 'Material details',
+            'item': 'Item issued or returned; moves stock in the area',
+            'quantity': 'Quantity issued or returned',
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Allocated from the document sequence when the form is saved
+        self.fields['transaction_no'].required = False
@@ -1,7 +1,8 @@
 from django import forms
+from .choices import SharedChoicesMixin
 from .models import ItemDefinition
 
-class ItemDefinitionForm(forms.ModelForm):
+class ItemDefinitionForm(SharedChoicesMixin, forms.ModelForm):
     class Meta:
         model = ItemDefinition
         fields = [
@@ -80,3 +81,8 @@ class ItemDefinitionForm(forms.ModelForm):
             'important': 'Check if this is an important item',
             'active': 'Uncheck to deactivate the item'
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Allocated from the document sequence when the form is saved
+        self.fields['item_code'].required = False
@@ -0,0 +1,164 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .columnar import CONTENT_TYPES, response_format
+from .lookups import model_versions
+
+# Local hit/miss counts are added to the shared counters every this many events
+STATS_FLUSH_EVERY = 100
+
+_stats_lock = threading.Lock()
+_local_stats = {'hits': 0, 'misses': 0}
+
+
+def lookup_cache():
+    return caches[getattr(settings, 'LOOKUP_CACHE_ALIAS', 'default')]
+
+
+def _version_key(model):
+    return f"lookup-version:{model._meta.label_lower}"
+
+
+def _variant(request):
+    # The Accept header can pick the wire format, so it is part of the key
+    return f"{request.get_full_path()}|{response_format(request)}"
+
+
+def _payload_key(request):
+    return "lookup-payload:" + hashlib.sha1(_variant(request).encode()).hexdigest()
+
+
+def bump_version(model):
+    """Invalidates every cached lookup payload built from ``model``."""
+    cache = lookup_cache()
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing or evicted: start from a value no earlier payload can carry
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def _current_versions(cache, models, cached):
+    versions = []
+    for model in models:
+        key = _version_key(model)
+        if key not in cached:
+            cache.add(key, time.time_ns(), timeout=None)
+            cached[key] = cache.get(key)
+        versions.append(cached[key])
+    return tuple(versions)
+
+
+def current_versions(*models):
+    """Returns the cache version of each of ``models``, as cached_lookup sees them."""
+    cache = lookup_cache()
+    cached = cache.get_many([_version_key(model) for model in models])
+    return _current_versions(cache, models, cached)
+
+
+def _count(outcome):
+    with _stats_lock:
+        _local_stats[outcome] += 1
+        if _local_stats['hits'] + _local_stats['misses'] < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_local_stats)
+        _local_stats['hits'] = _local_stats['misses'] = 0
+    _flush_stats(pending)
+
+
+def _flush_stats(pending):
+    cache = lookup_cache()
+    for outcome, count in pending.items():
+        if not count:
+            continue
+        key = f"lookup-stats:{outcome}"
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            cache.set(key, count, timeout=None)
+
+
+def cache_stats():
+    """Returns hit/miss counts across all workers sharing the cache backend."""
+    cache = lookup_cache()
+    with _stats_lock:
+        pending = dict(_local_stats)
+    shared = cache.get_many(["lookup-stats:hits", "lookup-stats:misses"])
+    hits = shared.get("lookup-stats:hits", 0) + pending['hits']
+    misses = shared.get("lookup-stats:misses", 0) + pending['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def cached_lookup(*models):
+    """
+    Decorator caching the encoded JSON of a lookup view.
+
+    ``models`` are every model the lookup reads. Each has a version number
+    in the cache that ``bump_version`` (wired to post_save/post_delete in
+    signals.py) increments. One ``get_many`` fetches those versions together
+    with the stored payload; when they still match, the stored bytes are
+    returned without touching the database. The versions also form the
+    ETag, so a conditional GET is answered with 304 the same way.
+
+    Search (``q``) and delta-sync (``since``) requests are not cached. Bulk queryset updates do not send
+    signals and need an explicit ``bump_version``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.GET.get('q') or request.GET.get('since'):
+                return view(request, *args, **kwargs)
+
+            cache = lookup_cache()
+            payload_key = _payload_key(request)
+            cached = cache.get_many([payload_key] + [_version_key(model) for model in models])
+            versions = _current_versions(cache, models, cached)
+            etag = '"%s"' % hashlib.sha1(f"{_variant(request)}|{versions}".encode()).hexdigest()
+
+            entry = cached.get(payload_key)
+            if entry is not None and entry[0] == versions:
+                _count('hits')
+                last_modified = entry[1]
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = HttpResponse(entry[2], content_type=CONTENT_TYPES[response_format(request)])
+            else:
+                _count('misses')
+                last_modified = None
+                stamps = [v['last_modified'] for v in model_versions(request, models) if v['last_modified']]
+                if stamps:
+                    last_modified = int(max(stamps).timestamp())
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                    if response.status_code == 200:
+                        if response.streaming:
+                            # Master tables are small; keep the bytes so later hits skip the ORM
+                            response = HttpResponse(b''.join(response.streaming_content),
+                                                    content_type=response['Content-Type'])
+                        cache.set(payload_key, (versions, last_modified, response.content))
+
+            if response.status_code in (200, 304):
+                response.headers.setdefault('ETag', etag)
+                if last_modified:
+                    response.headers.setdefault('Last-Modified', http_date(last_modified))
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Accept',))
+            return response
+        return wrapper
+    return decorator
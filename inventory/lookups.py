@@ -0,0 +1,287 @@
+import copy
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+from .columnar import CONTENT_TYPES, FORMATS, ColumnarEncoder, response_format
+from .models import DeletedRecord
+from .search import ranked_search, search_filter
+from .streaming import streaming_json_response
+
+DEFAULT_LOOKUP_LIMIT = 50
+MAX_LOOKUP_LIMIT = 500
+
+
+def _int_param(request, name, default):
+    value = request.GET.get(name)
+    if value in (None, ''):
+        return default
+    return int(value)
+
+
+def parse_since(value):
+    """Parses a ``since`` parameter: an ISO-8601 timestamp or epoch seconds."""
+    try:
+        return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+    except (ValueError, OverflowError):
+        pass
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError(f"Invalid since value {value!r}")
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
+
+
+def _rows_payload(rows, encoder, **extra):
+    if encoder is None:
+        return {'results': rows, **extra}
+    return {**encoder.payload(rows), **extra}
+
+
+def lookup_response(request, queryset, fields, search_fields, ranked_fields=None, since_fields=None,
+                    dictionary_fields=()):
+    """
+    Returns one page of lookup rows as JSON.
+
+    Query parameters:
+        q       search text, matched against ``search_fields``
+        limit   page size (default 50, at most 500), or ``all``
+        cursor  ``next`` value of the previous page
+
+    Rows are ordered by id and paged by keyset (``id > cursor``), so every
+    page is a bounded index range scan no matter how deep the client pages.
+    When ``ranked_fields`` is given, searches go through the trigram
+    backend instead (still matching the other ``search_fields`` too): rows
+    come best match first and the cursor is an offset.
+    Response: ``{"results": [...], "next": <cursor or null>}``
+
+    Lookups with ``since_fields`` (the ``updated_at`` columns the rows are
+    built from) also support delta sync. Their responses carry a
+    ``sync_token``; passing it back as ``since`` returns only the rows
+    changed since then plus the ids deleted since then (``deleted``, first
+    page only). Tokens older than the tombstone retention return the full
+    list with ``reset: true``. Other lookups answer ``since`` with 400.
+
+    ``limit=all`` streams every matching row in one response (see
+    streaming.streaming_json_response) instead of building it in memory.
+
+    ``format=columnar`` (or an Accept header naming the columnar type)
+    returns the compact form from columnar.py, with ``dictionary_fields``
+    dictionary-encoded, as COLUMNAR_CONTENT_TYPE. Every response varies on
+    Accept.
+    """
+    response = _lookup_response(request, queryset, fields, search_fields, ranked_fields, since_fields,
+                                dictionary_fields)
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def _lookup_response(request, queryset, fields, search_fields, ranked_fields, since_fields, dictionary_fields):
+    wire_format = response_format(request)
+    if wire_format not in FORMATS:
+        return JsonResponse({'error': f"format must be one of: {', '.join(FORMATS)}"}, status=400)
+    encoder = ColumnarEncoder(fields, dictionary_fields) if wire_format == 'columnar' else None
+
+    stream_all = request.GET.get('limit') == 'all'
+    try:
+        limit = None if stream_all else min(max(_int_param(request, 'limit', DEFAULT_LOOKUP_LIMIT), 1), MAX_LOOKUP_LIMIT)
+        cursor = None if stream_all else _int_param(request, 'cursor', None)
+    except ValueError:
+        return JsonResponse({'error': "limit and cursor must be integers"}, status=400)
+
+    sync = {}
+    if since_fields:
+        now = timezone.now()
+        sync['sync_token'] = now.isoformat()
+        since = request.GET.get('since')
+        if since:
+            try:
+                since = parse_since(since)
+            except ValueError:
+                return JsonResponse({'error': "since must be a sync token or epoch seconds"}, status=400)
+            retention = timedelta(days=getattr(settings, 'LOOKUP_TOMBSTONE_RETENTION_DAYS', 30))
+            if since < now - retention:
+                sync['reset'] = True
+            else:
+                # Rows stamped just before a token can commit just after it
+                window = since - timedelta(seconds=getattr(settings, 'LOOKUP_SYNC_OVERLAP_SECONDS', 60))
+                changed = Q()
+                for field in since_fields:
+                    changed |= Q(**{f"{field}__gte": window})
+                queryset = queryset.filter(changed)
+                if cursor is None:
+                    sync['deleted'] = list(DeletedRecord.objects.filter(
+                        model=queryset.model._meta.label_lower, deleted_at__gte=window
+                    ).values_list('object_id', flat=True))
+    elif request.GET.get('since'):
+        # Answering with the full list would look like an empty delta to the client
+        return JsonResponse({'error': "This lookup does not support since; fetch the full list"}, status=400)
+
+    query = request.GET.get('q', '').strip()
+    if stream_all:
+        if query and ranked_fields:
+            queryset = ranked_search(queryset, query, ranked_fields, search_fields)
+        else:
+            if query:
+                queryset = queryset.filter(search_filter(query, search_fields))
+            queryset = queryset.order_by('id')
+        return streaming_json_response(queryset, fields, encoder=encoder, next=None, **sync)
+
+    if query and ranked_fields:
+        offset = max(cursor or 0, 0)
+        rows = list(ranked_search(queryset, query, ranked_fields, search_fields).values(*fields)[offset:offset + limit + 1])
+        next_cursor = offset + limit if len(rows) > limit else None
+        return JsonResponse(_rows_payload(rows[:limit], encoder, next=next_cursor, **sync),
+                            content_type=CONTENT_TYPES[wire_format])
+
+    if query:
+        queryset = queryset.filter(search_filter(query, search_fields))
+    if cursor is not None:
+        queryset = queryset.filter(id__gt=cursor)
+
+    rows = list(queryset.order_by('id').values(*fields)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]['id']
+
+    return JsonResponse(_rows_payload(rows, encoder, next=next_cursor, **sync), content_type=CONTENT_TYPES[wire_format])
+
+
+def model_versions(request, models):
+    """
+    Returns ``(max(updated_at), row count)`` for each model, computed once
+    per request and shared by the ETag and Last-Modified functions.
+    """
+    versions = getattr(request, '_lookup_versions', None)
+    if versions is None:
+        versions = [
+            model.objects.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+            for model in models
+        ]
+        request._lookup_versions = versions
+    return versions
+
+
+def lookup_condition(*models):
+    """
+    Decorator adding ETag / Last-Modified to a lookup view and answering
+    conditional requests with 304 before the view serializes any rows.
+
+    ``models`` are every model the lookup reads (joined ones included) and
+    must have an ``updated_at`` column. The row count is part of the ETag
+    so deletes change it too.
+    """
+    def etag(request, *args, **kwargs):
+        marker = f"{request.get_full_path()}|{response_format(request)}"
+        for version in model_versions(request, models):
+            marker += f"|{version['last_modified']}:{version['count']}"
+        return hashlib.sha1(marker.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        stamps = [version['last_modified'] for version in model_versions(request, models) if version['last_modified']]
+        return max(stamps) if stamps else None
+
+    def decorator(view):
+        # no-cache: browsers keep the copy but revalidate it on every open;
+        # Accept can pick the format, so 304s must vary on it as well
+        return vary_on_headers('Accept')(cache_control(private=True, no_cache=True)(
+            condition(etag_func=etag, last_modified_func=last_modified)(view)
+        ))
+    return decorator
+
+
+def _lookup_subrequest(request, name):
+    """
+    Builds the request a batched lookup is run with: the batch's query
+    parameters minus ``models``, with ``<name>.<param>`` overriding
+    ``<param>`` for that lookup only. Conditional headers are dropped so the
+    lookup always answers with its payload.
+    """
+    params = request.GET.copy()
+    params.pop('models', None)
+    for key in list(params):
+        if '.' in key:
+            params.pop(key)
+    prefix = f"{name}."
+    for key, values in request.GET.lists():
+        if key.startswith(prefix):
+            params.setlist(key[len(prefix):], values)
+
+    subrequest = copy.copy(request)
+    subrequest.__dict__.pop('_lookup_versions', None)
+    subrequest.path = subrequest.path_info = reverse(f"lookup_{name}")
+    subrequest.GET = params
+    subrequest.META = {
+        key: value for key, value in request.META.items()
+        if key not in ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+    }
+    subrequest.META['QUERY_STRING'] = params.urlencode()
+    return subrequest
+
+
+def batch_lookup_response(request, views):
+    """
+    Runs several lookups for one request and returns
+    ``{"<name>": <lookup payload>, ...}``.
+
+    ``?models=area,department`` picks the lookups from ``views``. Each one
+    runs through its normal view, so cached payloads are reused as is and
+    their encoded bytes are copied into the response without re-parsing.
+    When every lookup has an ETag the batch gets a combined one and answers
+    If-None-Match with 304.
+    """
+    names = list(dict.fromkeys(name.strip() for name in request.GET.get('models', '').split(',') if name.strip()))
+    unknown = [name for name in names if name not in views]
+    if not names or unknown:
+        return JsonResponse({'error': f"models must be a comma separated list of: {', '.join(views)}"}, status=400)
+
+    responses = {}
+    for name in names:
+        response = views[name](_lookup_subrequest(request, name))
+        if response.status_code != 200:
+            for other in responses.values():
+                other.close()
+            return response
+        responses[name] = response
+
+    etags = [response.get('ETag') for response in responses.values()]
+    etag = None
+    if all(etags):
+        etag = '"%s"' % hashlib.sha1('|'.join(etags).encode()).hexdigest()
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            for response in responses.values():
+                response.close()
+            patch_cache_control(not_modified, private=True, no_cache=True)
+            patch_vary_headers(not_modified, ('Accept',))
+            return not_modified
+
+    def stream():
+        yield b'{'
+        for index, (name, response) in enumerate(responses.items()):
+            yield ((', ' if index else '') + json.dumps(name) + ': ').encode()
+            if response.streaming:
+                yield from response.streaming_content
+            else:
+                yield response.content
+        yield b'}'
+
+    batch = StreamingHttpResponse(stream(), content_type='application/json')
+    if etag:
+        batch['ETag'] = etag
+    patch_cache_control(batch, private=True, no_cache=True)
+    patch_vary_headers(batch, ('Accept',))
+    return batch
@@ -1,7 +1,8 @@
 from django import forms
+from .choices import SharedChoicesMixin
 from .models import LotTransaction
 
-class LotTransactionForm(forms.ModelForm):
+class LotTransactionForm(SharedChoicesMixin, forms.ModelForm):
     class Meta:
         model = LotTransaction
         fields = [
@@ -82,3 +83,8 @@ class LotTransactionForm(forms.ModelForm):
             'end_date': 'End date',
             'remarks': 'Additional remarks'
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Allocated from the document sequence when the form is saved
+        self.fields['doc_no'].required = False
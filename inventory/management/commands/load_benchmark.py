@@ -0,0 +1,251 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, build_opener
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.urls import reverse
+
+from inventory.models import AreaForm, Customer, DepartmentDefinition, ItemDefinition, PurchaseOrder, Requisition, Supplier
+
+# Form pages fetched by "get" requests
+FORM_VIEWS = [
+    'area_form',
+    'supplier_form',
+    'customer_form',
+    'item_definition',
+    'requisition_form',
+    'purchase_order_form',
+    'receipttransaction_form',
+    'purchasevoucher_form',
+    'lottransaction_form',
+    'issuetransaction_form',
+]
+
+# Views a "post" request submits a valid document to
+POST_VIEWS = [
+    'receipttransaction_form',
+    'issuetransaction_form',
+    'purchase_order_form',
+]
+
+# (URL name, query) pairs of "lookup" requests
+LOOKUPS = [
+    ('lookup_item', {}),
+    ('lookup_item', {'q': '1'}),
+    ('lookup_supplier', {}),
+    ('lookup_supplier', {'q': 'Supplier 1'}),
+    ('lookup_purchase_order', {'q': 'PO'}),
+    ('lookup_area', {}),
+    ('lookup_customer', {}),
+    ('lookup_batch', {'models': 'area,customer,department,item,supplier'}),
+]
+
+DEFAULT_MIX = 'get=5,post=2,lookup=3'
+
+# Primary keys sampled per model for POST payloads
+SAMPLE_PKS = 1000
+
+# Text every successful POST renders in its message
+POST_SUCCESS = b'successfully created'
+
+
+def _parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in ('get', 'post', 'lookup') or not weight.isdigit():
+            raise CommandError(f"Invalid --mix entry {part!r}; expected get=N,post=N,lookup=N")
+        mix[kind] = int(weight)
+    if not any(mix.values()):
+        raise CommandError("--mix needs at least one non-zero weight")
+    return mix
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of sorted ``values``."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(timings, elapsed):
+    timings = sorted(timings)
+    return {
+        'requests': len(timings),
+        'rps': round(len(timings) / elapsed, 1) if elapsed else None,
+        'p50_ms': _ms(percentile(timings, 50)),
+        'p95_ms': _ms(percentile(timings, 95)),
+        'p99_ms': _ms(percentile(timings, 99)),
+        'max_ms': _ms(timings[-1] if timings else None),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay mixed traffic (form GETs, GRN/issue/PO POSTs, lookups) over HTTP with N concurrent clients "
+        "and report p50/p95/p99 latency and requests per second as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Base URL of a running server (default: start one in this process)")
+        parser.add_argument('--concurrency', type=int, default=4, help="Concurrent clients (default 4)")
+        parser.add_argument('--requests', type=int, default=500, help="Measured requests (default 500)")
+        parser.add_argument('--warmup', type=int, default=20, help="Unmeasured requests sent first (default 20)")
+        parser.add_argument('--mix', type=_parse_mix, default=DEFAULT_MIX, help=f"Traffic weights (default {DEFAULT_MIX})")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed for the request sequence")
+        parser.add_argument('--output', help="Also write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError("--concurrency and --requests must be at least 1")
+        self.rng = random.Random(options['seed'])
+        self.pks = self.sample_pks()
+        mix = options['mix'] if isinstance(options['mix'], dict) else _parse_mix(options['mix'])
+
+        server = None
+        base_url = options['url']
+        if not base_url:
+            server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+            server.set_app(get_internal_wsgi_application())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base_url = f"http://127.0.0.1:{server.server_port}"
+        self.base_url = base_url.rstrip('/')
+
+        try:
+            self.run(self.plan(mix, options['warmup']), options['concurrency'])
+            started = time.perf_counter()
+            results = self.run(self.plan(mix, options['requests']), options['concurrency'])
+            elapsed = time.perf_counter() - started
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        report = {
+            'base_url': self.base_url,
+            'concurrency': options['concurrency'],
+            'mix': mix,
+            'elapsed_s': round(elapsed, 3),
+            'errors': sum(1 for result in results if not result[3]),
+            **summarize([result[2] for result in results], elapsed),
+            'by_kind': {},
+            'by_url': {},
+        }
+        for index, group in ((0, 'by_kind'), (1, 'by_url')):
+            for key in sorted({result[index] for result in results}):
+                matching = [result for result in results if result[index] == key]
+                report[group][key] = {
+                    **summarize([result[2] for result in matching], elapsed),
+                    'errors': sum(1 for result in matching if not result[3]),
+                }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
+
+    def sample_pks(self):
+        models = {
+            'area': AreaForm, 'supplier': Supplier, 'customer': Customer, 'department': DepartmentDefinition,
+            'item': ItemDefinition, 'requisition': Requisition, 'purchase_order': PurchaseOrder,
+        }
+        pks = {name: list(model.objects.values_list('pk', flat=True)[:SAMPLE_PKS]) for name, model in models.items()}
+        empty = [name for name, values in pks.items() if not values]
+        if empty:
+            raise CommandError(f"No rows to reference for {', '.join(empty)}; run seed_erp first")
+        return pks
+
+    def post_data(self, name):
+        choice = self.rng.choice
+        pks = self.pks
+        today = date.today().isoformat()
+        return {
+            'receipttransaction_form': lambda: {
+                'transaction_date': today, 'nature': 'Purchase', 'area': choice(pks['area']),
+                'supplier': choice(pks['supplier']), 'po': choice(pks['purchase_order']), 'item': choice(pks['item']),
+                'quantity': '5', 'rate': '10', 'amount': '50', 'grir': 'GRIR-BENCH', 'gpi_status': 'Pending',
+            },
+            'issuetransaction_form': lambda: {
+                'date': today, 'nature': 'Issue', 'area': choice(pks['area']), 'department': choice(pks['department']),
+                'customer': choice(pks['customer']), 'lot_no': 'L-BENCH', 'dc_no': 'DC-BENCH', 'material': 'Dye',
+                'item': choice(pks['item']), 'quantity': '1',
+            },
+            'purchase_order_form': lambda: {
+                'po_date': today, 'po_type': 'Local', 'area': choice(pks['area']), 'supplier': choice(pks['supplier']),
+                'requisition': choice(pks['requisition']), 'delivery_at': 'Main store', 'order_by': 'Benchmark',
+                'lines-TOTAL_FORMS': '3', 'lines-INITIAL_FORMS': '0',
+                **{
+                    f'lines-{i}-{field}': value
+                    for i in range(3)
+                    for field, value in (('item', choice(pks['item'])), ('quantity', '5'), ('rate', '10'))
+                },
+            },
+        }[name]()
+
+    def plan(self, mix, count):
+        """Returns ``count`` requests as (kind, URL name, path, POST data or None)."""
+        kinds = self.rng.choices(list(mix), weights=list(mix.values()), k=count)
+        requests = []
+        for kind in kinds:
+            if kind == 'get':
+                name = self.rng.choice(FORM_VIEWS)
+                requests.append((kind, name, reverse(name), None))
+            elif kind == 'post':
+                name = self.rng.choice(POST_VIEWS)
+                requests.append((kind, name, reverse(name), self.post_data(name)))
+            else:
+                name, query = self.rng.choice(LOOKUPS)
+                path = reverse(name) + ('?' + urlencode(query) if query else '')
+                requests.append((kind, name, path, None))
+        return requests
+
+    def run(self, requests, concurrency):
+        """Sends ``requests`` from ``concurrency`` clients; returns (kind, name, seconds, ok) per request."""
+        shards = [requests[i::concurrency] for i in range(concurrency)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return [result for shard in pool.map(self.client, shards) for result in shard]
+
+    def client(self, requests):
+        # One cookie jar per client, holding its CSRF cookie
+        cookies = CookieJar()
+        opener = build_opener(HTTPCookieProcessor(cookies))
+        self.fetch(opener, reverse(POST_VIEWS[0]))
+        token = next((cookie.value for cookie in cookies if cookie.name == 'csrftoken'), '')
+        results = []
+        for kind, name, path, data in requests:
+            if data is not None:
+                data = urlencode(dict(data, csrfmiddlewaretoken=token)).encode()
+            start = time.perf_counter()
+            status, body = self.fetch(opener, path, data)
+            elapsed = time.perf_counter() - start
+            ok = status == 200 and (data is None or POST_SUCCESS in body)
+            results.append((kind, name, elapsed, ok))
+        return results
+
+    def fetch(self, opener, path, data=None):
+        try:
+            with opener.open(self.base_url + path, data=data, timeout=60) as response:
+                return response.status, response.read()
+        except HTTPError as exc:
+            return exc.code, exc.read()
+        except URLError as exc:
+            return None, str(exc.reason).encode()
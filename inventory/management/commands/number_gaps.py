@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import IssueTransaction, LotTransaction, ReceiptTransaction
+from inventory.numbering import format_code, number_gaps
+
+LEASED_DOCUMENTS = {
+    'GRN': (ReceiptTransaction, 'transaction_no'),
+    'ISS': (IssueTransaction, 'transaction_no'),
+    'LOT': (LotTransaction, 'doc_no'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Report leased document numbers that no document uses. The unused tail of each worker's newest "
+        "block is left out, as the worker may still hand it out, unless --include-live is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('prefixes', nargs='*', help="Prefixes to check (default: all leased prefixes)")
+        parser.add_argument('--include-live', action='store_true',
+                            help="Also report the tail of each worker's newest block (use when no worker is running)")
+
+    def handle(self, *args, **options):
+        prefixes = options['prefixes'] or list(LEASED_DOCUMENTS)
+        for prefix in prefixes:
+            if prefix not in LEASED_DOCUMENTS:
+                raise CommandError(f"Unknown prefix {prefix}")
+            model, field_name = LEASED_DOCUMENTS[prefix]
+            gaps = number_gaps(model, prefix, field_name, include_live=options['include_live'])
+            missing = sum(last - first + 1 for first, last in gaps)
+            self.stdout.write(f"{prefix}: {missing} unused number(s)")
+            for first, last in gaps:
+                if first == last:
+                    self.stdout.write(f"  {format_code(prefix, first)}")
+                else:
+                    self.stdout.write(f"  {format_code(prefix, first)} .. {format_code(prefix, last)}")
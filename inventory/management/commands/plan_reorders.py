@@ -0,0 +1,40 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import DepartmentDefinition
+from inventory.planning import run_planning
+
+
+class Command(BaseCommand):
+    help = "Compute consumption, lead time, safety stock and reorder point for every active item and save reorder suggestions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', type=date.fromisoformat, help="Plan as of this date, YYYY-MM-DD (default today)")
+        parser.add_argument('--window-days', type=int, help="Days of issues to average (default PLANNING_WINDOW_DAYS)")
+        parser.add_argument('--service-factor', type=float, help="Safety stock z-score (default PLANNING_SERVICE_FACTOR)")
+        parser.add_argument('--requisition-department', type=int,
+                            help="Raise a requisition for the suggestions in this department (id)")
+
+    def handle(self, *args, **options):
+        if options['window_days'] is not None and options['window_days'] < 1:
+            raise CommandError("--window-days must be at least 1")
+        department = None
+        if options['requisition_department'] is not None:
+            try:
+                department = DepartmentDefinition.objects.get(pk=options['requisition_department'])
+            except DepartmentDefinition.DoesNotExist:
+                raise CommandError(f"No department with id {options['requisition_department']}")
+
+        started = time.perf_counter()
+        run = run_planning(
+            as_of=options['as_of'], window_days=options['window_days'],
+            service_factor=options['service_factor'], department=department,
+        )
+        self.stdout.write(
+            f"Planned {run.items_planned} item(s): {run.suggestions.count()} to reorder "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        if run.requisition:
+            self.stdout.write(f"Raised requisition {run.requisition.doc_number}")
@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.models import DeletedRecord
+
+
+class Command(BaseCommand):
+    help = "Delete lookup tombstones older than LOOKUP_TOMBSTONE_RETENTION_DAYS."
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=getattr(settings, 'LOOKUP_TOMBSTONE_RETENTION_DAYS', 30))
+        deleted, _ = DeletedRecord.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(f"Purged {deleted} tombstone(s) older than {cutoff:%Y-%m-%d %H:%M}")
@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.hierarchy import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = "Rebuild the item closure table from ItemDefinition.base_item (backfill, or after bulk loads)."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild_closure()
+        self.stdout.write(f"Wrote {rows} closure row(s) in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.stock import rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stock ledger and balances from every GRN and issue transaction (backfill, or after bulk loads)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Movements per INSERT (default 5000)")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild_ledger(batch_size=options['batch_size'])
+        self.stdout.write(f"Wrote {written} stock movement(s) in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.trace import rebuild_edges
+
+
+class Command(BaseCommand):
+    help = "Rebuild the lot traceability edges from every lot and issue transaction (backfill, or after bulk loads)."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        edges = rebuild_edges()
+        self.stdout.write(f"Wrote {edges} trace edge(s) in {time.perf_counter() - started:.1f}s")
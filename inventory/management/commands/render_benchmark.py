@@ -0,0 +1,86 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+
+from inventory.choices import ChoiceCacheMiddleware
+from inventory.templatetags.render_cache import fragment_cache
+
+# The form pages of inventory/urls.py
+FORM_VIEWS = [
+    'home_page',
+    'area_form',
+    'supplier_form',
+    'customer_form',
+    'purchase_form',
+    'department_definition',
+    'inv_category',
+    'item_definition',
+    'requisition_form',
+    'purchase_order_form',
+    'receipttransaction_form',
+    'purchasevoucher_form',
+    'lottransaction_form',
+    'issuetransaction_form',
+]
+
+BASE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def _templates(loaders):
+    return [dict(engine, OPTIONS=dict(engine['OPTIONS'], loaders=loaders)) for engine in settings.TEMPLATES]
+
+
+class Command(BaseCommand):
+    help = "Time GET rendering of every form view with and without the production rendering mode (cached loader and fragment cache)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="GETs per view and mode (default 50)")
+        parser.add_argument('views', nargs='*', help="URL names to time (default: all form views)")
+
+    def time_view(self, name, count):
+        factory = RequestFactory()
+        path = reverse(name)
+        view = resolve(path).func
+        handler = ChoiceCacheMiddleware(view)
+        handler(factory.get(path))  # warm up: compile templates, fill caches
+        timings = []
+        for _ in range(count):
+            request = factory.get(path)
+            start = time.perf_counter()
+            handler(request)
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), statistics.mean(timings)
+
+    def run_mode(self, names, count, cached):
+        loaders = [('django.template.loaders.cached.Loader', BASE_LOADERS)] if cached else BASE_LOADERS
+        results = {}
+        with override_settings(RENDER_CACHE=cached, TEMPLATES=_templates(loaders)):
+            fragment_cache().clear()
+            for name in names:
+                try:
+                    results[name] = self.time_view(name, count)
+                except Exception as exc:
+                    results[name] = exc
+        return results
+
+    def handle(self, *args, **options):
+        names = options['views'] or FORM_VIEWS
+        count = options['requests']
+        before = self.run_mode(names, count, cached=False)
+        after = self.run_mode(names, count, cached=True)
+
+        self.stdout.write(f"{'view':<26}{'uncached p50':>14}{'cached p50':>12}{'speedup':>9}")
+        for name in names:
+            if isinstance(before[name], Exception) or isinstance(after[name], Exception):
+                error = before[name] if isinstance(before[name], Exception) else after[name]
+                self.stdout.write(f"{name:<26}  error: {type(error).__name__}: {error}")
+                continue
+            slow, fast = before[name][0], after[name][0]
+            self.stdout.write(f"{name:<26}{slow:>12.2f}ms{fast:>10.2f}ms{slow / fast:>8.1f}x")
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.costing import run_costing
+
+
+class Command(BaseCommand):
+    help = "Compute moving-average and FIFO item costs from the stock ledger (incremental unless --full)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every item instead of those queued by new movements")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        run = run_costing(full=options['full'])
+        self.stdout.write(
+            f"{run.mode.capitalize()} costing: {run.items_costed} item(s) up to movement #{run.last_movement_id} "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
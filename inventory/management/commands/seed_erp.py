@@ -0,0 +1,300 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.hierarchy import rebuild_closure
+from inventory.lookup_cache import bump_version
+from inventory.models import (
+    AreaForm, Customer, DepartmentDefinition, INVcategory, IssueTransaction, ItemDefinition, LotTransaction,
+    Purchase, PurchaseOrder, PurchaseOrderLine, PurchaseVoucher, ReceiptTransaction, Requisition, Supplier,
+)
+from inventory.numbering import allocate_numbers, format_code
+from inventory.signals import CACHED_LOOKUP_MODELS
+from inventory.stock import rebuild_ledger
+from inventory.trace import rebuild_edges
+
+# Rows generated per unit of --scale; --scale 1000 gives one million GRNs
+ROWS_PER_SCALE = {
+    'areas': 5,
+    'departments': 5,
+    'categories': 10,
+    'items': 200,
+    'suppliers': 50,
+    'customers': 50,
+    'purchases': 50,
+    'requisitions': 200,
+    'purchase_orders': 200,
+    'grns': 1000,
+    'vouchers': 200,
+    'lots': 300,
+    'issues': 500,
+}
+
+# Lines per purchase order, drawn uniformly from this range
+LINES_PER_ORDER = (1, 5)
+
+# Share of items created as variants of another item (base_item)
+VARIANT_SHARE = 0.2
+
+# Documents are dated evenly over this many days from --start-date
+DATE_SPAN_DAYS = 730
+
+UNITS = ['kg', 'ltr', 'pcs', 'mtr', 'box']
+
+
+def _choices(model, field_name):
+    return [value for value, _ in model._meta.get_field(field_name).choices]
+
+
+class Command(BaseCommand):
+    help = "Generate linked synthetic data for every inventory model with bulk_create (e.g. --scale 1000 for 1M GRNs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1, help="Multiplier for ROWS_PER_SCALE (default 1)")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed and scale give the same data")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per INSERT (default 5000)")
+        parser.add_argument('--start-date', type=date.fromisoformat, default=date(2024, 1, 1),
+                            help="First document date, YYYY-MM-DD (default 2024-01-01)")
+
+    def handle(self, *args, **options):
+        if options['scale'] < 1:
+            raise CommandError("--scale must be at least 1")
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.start_date = options['start_date']
+        self.counts = {name: rows * options['scale'] for name, rows in ROWS_PER_SCALE.items()}
+        started = time.perf_counter()
+
+        # Parents before children, so every foreign key points at an existing row
+        areas = self.seed_areas()
+        departments = self.seed_named(DepartmentDefinition, 'departments', "Department")
+        categories = self.seed_named(INVcategory, 'categories', "Category")
+        items = self.seed_items(categories)
+        suppliers = self.seed_suppliers()
+        customers = self.seed_customers()
+        self.seed_purchases(suppliers)
+        requisitions = self.seed_requisitions(departments)
+        purchase_orders = self.seed_purchase_orders(areas, suppliers, requisitions, items)
+        self.seed_grns(areas, suppliers, items, purchase_orders)
+        self.seed_vouchers(suppliers)
+        self.seed_lots(customers)
+        self.seed_issues(areas, departments, customers, items)
+
+        # bulk_create bypasses stock posting and signals, so derived tables are rebuilt from the documents
+        ledger_started = time.perf_counter()
+        movements = rebuild_ledger(batch_size=self.batch_size)
+        self.stdout.write(f"Stock ledger: {movements} movements in {time.perf_counter() - ledger_started:.1f}s")
+        closure_started = time.perf_counter()
+        closure = rebuild_closure()
+        self.stdout.write(f"Item closure: {closure} rows in {time.perf_counter() - closure_started:.1f}s")
+        edges_started = time.perf_counter()
+        edges = rebuild_edges()
+        self.stdout.write(f"Trace edges: {edges} edges in {time.perf_counter() - edges_started:.1f}s")
+
+        # bulk_create sends no post_save, so cached lookups are invalidated here
+        for model in CACHED_LOOKUP_MODELS:
+            bump_version(model)
+        self.stdout.write(self.style.SUCCESS(f"Seeded in {time.perf_counter() - started:.1f}s"))
+
+    def insert(self, model, rows, keep_pks=True):
+        """bulk_creates ``rows`` batch by batch and returns the new pks."""
+        started = time.perf_counter()
+        pks = []
+        count = 0
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            created = model.objects.bulk_create(batch)
+            count += len(created)
+            if keep_pks:
+                pks.extend(obj.pk for obj in created)
+        if keep_pks and None in pks:
+            raise CommandError("The database backend does not return primary keys from bulk_create")
+        self.stdout.write(f"{model._meta.verbose_name_plural}: {count} rows in {time.perf_counter() - started:.1f}s")
+        return pks
+
+    def numbers(self, prefix, model, count):
+        """Reserves ``count`` document numbers for ``prefix`` (see numbering.allocate_numbers)."""
+        last = allocate_numbers(prefix, count=count, model=model)
+        return range(last - count + 1, last + 1)
+
+    def document_date(self, index, count):
+        return self.start_date + timedelta(days=index * DATE_SPAN_DAYS // max(count, 1))
+
+    def seed_areas(self):
+        statuses = _choices(AreaForm, 'status')
+        numbers = self.numbers('AREA', AreaForm, self.counts['areas'])
+        return self.insert(AreaForm, (
+            AreaForm(areacode=number, area_code=format_code('AREA', number), areaname=f"Area {number}",
+                     area_description=f"Operational area {number}", status=self.rng.choice(statuses))
+            for number in numbers
+        ))
+
+    def seed_named(self, model, key, label):
+        return self.insert(model, (model(name=f"{label} {i}") for i in range(1, self.counts[key] + 1)))
+
+    def seed_items(self, categories):
+        rng = self.rng
+        count = self.counts['items']
+        variants = int(count * VARIANT_SHARE)
+        tax_types = _choices(ItemDefinition, 'salestax_type')
+        numbers = iter(self.numbers('ITEM', ItemDefinition, count))
+
+        def item(base_item_id=None):
+            number = next(numbers)
+            return ItemDefinition(
+                item_code=format_code('ITEM', number),
+                item_name=f"Item {number}" if base_item_id is None else f"Item {number} (variant)",
+                specification=f"Grade {rng.choice('ABC')}",
+                base_item_id=base_item_id,
+                item_category_id=rng.choice(categories),
+                salestax_type=rng.choice(tax_types),
+                unit_of_measure=rng.choice(UNITS),
+                std_cost=Decimal(rng.randint(100, 100000)) / 100,
+            )
+
+        base_items = self.insert(ItemDefinition, (item() for _ in range(count - variants)))
+        return base_items + self.insert(ItemDefinition, (item(rng.choice(base_items)) for _ in range(variants)))
+
+    def seed_suppliers(self):
+        rng = self.rng
+        business_types = _choices(Supplier, 'business_type')
+        numbers = self.numbers('SUP', Supplier, self.counts['suppliers'])
+        return self.insert(Supplier, (
+            Supplier(supplier_id=number, supplier_code=format_code('SUP', number), supplier_name=f"Supplier {number}",
+                     contact_person_name=f"Contact {number}", contact_email=f"supplier{number}@example.com",
+                     contact_phone=f"+92{rng.randint(3000000000, 3499999999)}"[:12],
+                     business_type=rng.choice(business_types), country='Pakistan', currency='PKR')
+            for number in numbers
+        ))
+
+    def seed_customers(self):
+        rng = self.rng
+        customer_types = _choices(Customer, 'customer_type')
+        numbers = self.numbers('CUST', Customer, self.counts['customers'])
+        return self.insert(Customer, (
+            Customer(customer_id=number, customer_code=format_code('CUST', number), customer_name=f"Customer {number}",
+                     customer_type=rng.choice(customer_types), contact_person_name=f"Contact {number}",
+                     contact_email=f"customer{number}@example.com",
+                     contact_phone=f"+92{rng.randint(3000000000, 3499999999)}"[:12])
+            for number in numbers
+        ))
+
+    def seed_purchases(self, suppliers):
+        rng = self.rng
+        count = self.counts['purchases']
+        statuses = _choices(Purchase, 'status')
+        self.insert(Purchase, (
+            Purchase(supplier_id=rng.choice(suppliers), purchase_date=self.document_date(i, count),
+                     total_amount=Decimal(rng.randint(1000, 10000000)) / 100, currency='PKR',
+                     status=rng.choice(statuses))
+            for i in range(count)
+        ), keep_pks=False)
+
+    def seed_requisitions(self, departments):
+        rng = self.rng
+        numbers = self.numbers('REQ', Requisition, self.counts['requisitions'])
+        return self.insert(Requisition, (
+            Requisition(doc_number=format_code('REQ', number), department_id=rng.choice(departments),
+                        requisition_by=f"Requester {rng.randint(1, 50)}")
+            for number in numbers
+        ))
+
+    def seed_purchase_orders(self, areas, suppliers, requisitions, items):
+        rng = self.rng
+        count = self.counts['purchase_orders']
+        numbers = self.numbers('PO', PurchaseOrder, count)
+        # (item, quantity, rate) of each order's lines, inserted once the orders have pks
+        order_lines = []
+
+        def purchase_order(index, number):
+            lines = [
+                (rng.choice(items), Decimal(rng.randint(1, 1000)), Decimal(rng.randint(100, 50000)) / 100)
+                for _ in range(rng.randint(*LINES_PER_ORDER))
+            ]
+            order_lines.append(lines)
+            return PurchaseOrder(
+                po_number=format_code('PO', number), po_date=self.document_date(index, count),
+                po_type=rng.choice(['Local', 'Import']), area_id=rng.choice(areas),
+                supplier_id=rng.choice(suppliers), requisition_id=rng.choice(requisitions),
+                delivery_at="Main store", order_by=f"Buyer {rng.randint(1, 20)}",
+                quantity=sum(quantity for _, quantity, _ in lines),
+                rate=lines[0][2] if len(lines) == 1 else None,
+                amount=sum(quantity * rate for _, quantity, rate in lines),
+                sales_tax=0, discount=0, freight=0,
+            )
+
+        pks = self.insert(PurchaseOrder, (purchase_order(i, number) for i, number in enumerate(numbers)))
+        self.insert(PurchaseOrderLine, (
+            PurchaseOrderLine(purchase_order_id=pk, line_no=line_no, item_id=item, quantity=quantity, rate=rate,
+                              amount=quantity * rate)
+            for pk, lines in zip(pks, order_lines)
+            for line_no, (item, quantity, rate) in enumerate(lines, start=1)
+        ), keep_pks=False)
+        return pks
+
+    def seed_grns(self, areas, suppliers, items, purchase_orders):
+        rng = self.rng
+        count = self.counts['grns']
+        statuses = _choices(ReceiptTransaction, 'gpi_status')
+        numbers = self.numbers('GRN', ReceiptTransaction, count)
+
+        def grn(index, number):
+            quantity = Decimal(rng.randint(1, 500))
+            rate = Decimal(rng.randint(100, 50000)) / 100
+            return ReceiptTransaction(
+                transaction_no=format_code('GRN', number), transaction_date=self.document_date(index, count),
+                nature='Purchase', area_id=rng.choice(areas), delivery_challan_no=f"DC-{number}",
+                supplier_id=rng.choice(suppliers), po_id=rng.choice(purchase_orders), item_id=rng.choice(items),
+                quantity=quantity, rate=rate, amount=quantity * rate, grir=f"GRIR-{number}",
+                gpi_status=rng.choice(statuses),
+            )
+
+        self.insert(ReceiptTransaction, (grn(i, number) for i, number in enumerate(numbers)), keep_pks=False)
+
+    def seed_vouchers(self, suppliers):
+        rng = self.rng
+        count = self.counts['vouchers']
+        types = _choices(PurchaseVoucher, 'transaction_type')
+        numbers = self.numbers('PV', PurchaseVoucher, count)
+        self.insert(PurchaseVoucher, (
+            PurchaseVoucher(transaction_no=format_code('PV', number), transaction_type=rng.choice(types),
+                            transaction_date=self.document_date(i, count), supplier_id=rng.choice(suppliers),
+                            bill_no=f"B-{number}", st_inv_no=f"ST-{number}", bilty_no=f"BL-{number}",
+                            days=rng.choice([0, 15, 30, 45, 60]))
+            for i, number in enumerate(numbers)
+        ), keep_pks=False)
+
+    def seed_lots(self, customers):
+        rng = self.rng
+        count = self.counts['lots']
+        natures = _choices(LotTransaction, 'nature')
+        numbers = self.numbers('LOT', LotTransaction, count)
+
+        def lot(index, number):
+            start = self.document_date(index, count)
+            return LotTransaction(
+                doc_no=format_code('LOT', number), date=start, customer_id=rng.choice(customers),
+                gray_receipt_no=f"GR-{number}", dc_no=f"DC-{number}", lot_no=f"L-{number}",
+                nature=rng.choice(natures), start_date=start, end_date=start + timedelta(days=rng.randint(1, 14)),
+            )
+
+        self.insert(LotTransaction, (lot(i, number) for i, number in enumerate(numbers)), keep_pks=False)
+
+    def seed_issues(self, areas, departments, customers, items):
+        rng = self.rng
+        count = self.counts['issues']
+        natures = _choices(IssueTransaction, 'nature')
+        numbers = self.numbers('ISS', IssueTransaction, count)
+        self.insert(IssueTransaction, (
+            IssueTransaction(transaction_no=format_code('ISS', number), date=self.document_date(i, count),
+                             nature=rng.choice(natures), area_id=rng.choice(areas),
+                             department_id=rng.choice(departments), customer_id=rng.choice(customers),
+                             lot_no=f"L-{rng.randint(1, max(self.counts['lots'], 1))}", dc_no=f"DC-{number}",
+                             material=f"Material {rng.randint(1, 100)}", item_id=rng.choice(items),
+                             quantity=Decimal(rng.randint(1, 50)))
+            for i, number in enumerate(numbers)
+        ), keep_pks=False)
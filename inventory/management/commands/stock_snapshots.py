@@ -0,0 +1,42 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import StockSnapshot
+from inventory.stock import SNAPSHOT_PERIODS, build_snapshots, compact_snapshots
+
+
+def _months_before(day, months):
+    month = day.year * 12 + day.month - 1 - months
+    return date(month // 12, month % 12 + 1, 1)
+
+
+class Command(BaseCommand):
+    help = "Take periodic stock snapshots up to the last finished period and optionally compact old ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', choices=SNAPSHOT_PERIODS, default='month', help="Snapshot period (default month)")
+        parser.add_argument('--until', type=date.fromisoformat, help="Last date to snapshot, YYYY-MM-DD (default yesterday)")
+        parser.add_argument('--rebuild', action='store_true', help="Drop every snapshot and take them again")
+        parser.add_argument('--keep-months', type=int,
+                            help="Compact: drop snapshots older than this many months, except each year's last one")
+
+    def handle(self, *args, **options):
+        if options['keep_months'] is not None and options['keep_months'] < 0:
+            raise CommandError("--keep-months cannot be negative")
+        if options['rebuild']:
+            deleted, _ = StockSnapshot.objects.all().delete()
+            self.stdout.write(f"Dropped {deleted} snapshot row(s)")
+
+        started = time.perf_counter()
+        taken = build_snapshots(until=options['until'], period=options['period'])
+        if taken:
+            self.stdout.write(f"Took {len(taken)} snapshot(s), {taken[0]} .. {taken[-1]}, in {time.perf_counter() - started:.1f}s")
+        else:
+            self.stdout.write("No new period to snapshot")
+
+        if options['keep_months'] is not None:
+            before = _months_before(date.today(), options['keep_months'])
+            deleted = compact_snapshots(before)
+            self.stdout.write(f"Compacted {deleted} snapshot row(s) dated before {before}")
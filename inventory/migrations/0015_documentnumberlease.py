@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_documentsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentNumberLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(db_index=True, max_length=20)),
+                ('first_value', models.BigIntegerField()),
+                ('last_value', models.BigIntegerField()),
+                ('holder', models.CharField(help_text='host:pid of the worker that leased the block', max_length=100)),
+                ('leased_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Document Number Lease',
+                'verbose_name_plural': 'Document Number Leases',
+                'db_table': 'document_number_lease',
+                'ordering': ['prefix', 'first_value'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='app_label.model_name of the deleted row', max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Deleted Record',
+                'verbose_name_plural': 'Deleted Records',
+                'db_table': 'deleted_record',
+                'indexes': [models.Index(fields=['model', 'deleted_at'], name='deleted_record_model_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0017_deletedrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issuetransaction',
+            name='item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='issues', to='inventory.itemdefinition'),
+        ),
+        migrations.AddField(
+            model_name='issuetransaction',
+            name='quantity',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('last_movement_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_balances', to='inventory.areaform')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_balances', to='inventory.itemdefinition')),
+            ],
+            options={
+                'verbose_name': 'Stock Balance',
+                'verbose_name_plural': 'Stock Balances',
+                'db_table': 'stock_balance',
+                'constraints': [models.UniqueConstraint(fields=('item', 'area'), name='stock_balance_item_area_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_date', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('value', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('source_type', models.CharField(choices=[('GRN', 'GRN'), ('ISS', 'Issue Transaction')], max_length=10)),
+                ('source_id', models.BigIntegerField()),
+                ('document_no', models.CharField(max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_movements', to='inventory.areaform')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_movements', to='inventory.itemdefinition')),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'db_table': 'stock_movement',
+                'indexes': [models.Index(fields=['item', 'area', 'movement_date'], name='stock_movement_item_area_idx'), models.Index(fields=['movement_date'], name='stock_movement_date_idx'), models.Index(fields=['source_type', 'source_id'], name='stock_movement_source_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('value', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_snapshots', to='inventory.areaform')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_snapshots', to='inventory.itemdefinition')),
+            ],
+            options={
+                'verbose_name': 'Stock Snapshot',
+                'verbose_name_plural': 'Stock Snapshots',
+                'db_table': 'stock_snapshot',
+                'indexes': [models.Index(fields=['item', 'area', 'snapshot_date'], name='stock_snapshot_item_area_idx')],
+                'constraints': [models.UniqueConstraint(fields=('snapshot_date', 'item', 'area'), name='stock_snapshot_date_item_area_uniq')],
+            },
+        ),
+    ]
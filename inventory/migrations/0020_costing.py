@@ -0,0 +1,63 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0019_stocksnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('full', 'Full'), ('incremental', 'Incremental')], max_length=20)),
+                ('last_movement_id', models.BigIntegerField()),
+                ('items_costed', models.PositiveIntegerField()),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Costing Run',
+                'verbose_name_plural': 'Costing Runs',
+                'db_table': 'costing_run',
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemCost',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cost', serialize=False, to='inventory.itemdefinition')),
+                ('on_hand_quantity', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('average_cost', models.DecimalField(decimal_places=4, help_text='Weighted average of all receipts', max_digits=16, null=True)),
+                ('fifo_cost', models.DecimalField(decimal_places=4, help_text='Average cost of the remaining FIFO layers', max_digits=16, null=True)),
+                ('fifo_value', models.DecimalField(decimal_places=2, max_digits=18, null=True)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Item Cost',
+                'verbose_name_plural': 'Item Costs',
+                'db_table': 'item_cost',
+            },
+        ),
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('received_date', models.DateField()),
+                ('remaining_quantity', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=16)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.itemdefinition')),
+                ('receipt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.stockmovement')),
+            ],
+            options={
+                'verbose_name': 'Cost Layer',
+                'verbose_name_plural': 'Cost Layers',
+                'db_table': 'cost_layer',
+                'indexes': [models.Index(fields=['item', 'received_date'], name='cost_layer_item_date_idx')],
+            },
+        ),
+    ]
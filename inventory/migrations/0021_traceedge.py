@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0020_costing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TraceEdge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('src_kind', models.CharField(max_length=20)),
+                ('src_key', models.CharField(max_length=50)),
+                ('dst_kind', models.CharField(max_length=20)),
+                ('dst_key', models.CharField(max_length=50)),
+            ],
+            options={
+                'verbose_name': 'Trace Edge',
+                'verbose_name_plural': 'Trace Edges',
+                'db_table': 'trace_edge',
+                'indexes': [models.Index(fields=['src_kind', 'src_key'], name='trace_edge_src_idx'), models.Index(fields=['dst_kind', 'dst_key'], name='trace_edge_dst_idx')],
+            },
+        ),
+    ]
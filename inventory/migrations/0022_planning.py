@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0021_traceedge'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanningRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+                ('window_days', models.PositiveIntegerField(help_text='Days of issues the consumption is averaged over')),
+                ('service_factor', models.DecimalField(decimal_places=2, help_text='z-score of the target service level', max_digits=5)),
+                ('items_planned', models.PositiveIntegerField()),
+                ('requisition', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='planning_runs', to='inventory.requisition')),
+            ],
+            options={
+                'verbose_name': 'Planning Run',
+                'verbose_name_plural': 'Planning Runs',
+                'db_table': 'planning_run',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('on_hand', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('daily_consumption', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('lead_time_days', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('safety_stock', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('reorder_point', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('suggested_quantity', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_suggestions', to='inventory.itemdefinition')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suggestions', to='inventory.planningrun')),
+            ],
+            options={
+                'verbose_name': 'Reorder Suggestion',
+                'verbose_name_plural': 'Reorder Suggestions',
+                'db_table': 'reorder_suggestion',
+                'indexes': [models.Index(fields=['run', 'item'], name='reorder_suggestion_run_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0022_planning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_paths', to='inventory.itemdefinition')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_paths', to='inventory.itemdefinition')),
+            ],
+            options={
+                'verbose_name': 'Item Closure',
+                'verbose_name_plural': 'Item Closure',
+                'db_table': 'item_closure',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='item_closure_descendant_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='item_closure_ancestor_descendant_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0023_itemclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_no', models.PositiveIntegerField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('rate', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('sales_tax', models.DecimalField(blank=True, decimal_places=2, default=0, max_digits=10)),
+                ('discount', models.DecimalField(blank=True, decimal_places=2, default=0, max_digits=10)),
+                ('freight', models.DecimalField(blank=True, decimal_places=2, default=0, max_digits=10)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='purchase_order_lines', to='inventory.itemdefinition')),
+                ('purchase_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='inventory.purchaseorder')),
+            ],
+            options={
+                'verbose_name': 'Purchase Order Line',
+                'verbose_name_plural': 'Purchase Order Lines',
+                'db_table': 'purchase_order_line',
+                'constraints': [models.UniqueConstraint(fields=('purchase_order', 'line_no'), name='purchase_order_line_order_line_no_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0024_purchase_order_lines'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingCost',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pending_cost', serialize=False, to='inventory.itemdefinition')),
+                ('queued_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Pending Cost',
+                'verbose_name_plural': 'Pending Costs',
+                'db_table': 'pending_cost',
+            },
+        ),
+    ]
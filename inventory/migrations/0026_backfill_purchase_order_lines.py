@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 5000
+
+
+def backfill_lines(apps, schema_editor):
+    """
+    Gives each order saved before PurchaseOrderLine one line holding its
+    quantity, rate and charges. Orders have no item of their own, so it is
+    taken from the first GRN received against the order; orders without
+    such a GRN, or without a quantity and rate, are left without lines.
+    """
+    PurchaseOrder = apps.get_model('inventory', 'PurchaseOrder')
+    PurchaseOrderLine = apps.get_model('inventory', 'PurchaseOrderLine')
+    ReceiptTransaction = apps.get_model('inventory', 'ReceiptTransaction')
+
+    first_item = ReceiptTransaction.objects.filter(po=OuterRef('pk'), item__isnull=False).order_by('id').values('item_id')[:1]
+    orders = (
+        PurchaseOrder.objects.filter(lines__isnull=True, quantity__isnull=False, rate__isnull=False)
+        .annotate(derived_item=Subquery(first_item))
+        .filter(derived_item__isnull=False)
+        .values_list('pk', 'derived_item', 'quantity', 'rate', 'amount', 'sales_tax', 'discount', 'freight')
+    )
+    batch = []
+    for pk, item_id, quantity, rate, amount, sales_tax, discount, freight in orders.iterator(chunk_size=BATCH_SIZE):
+        batch.append(PurchaseOrderLine(
+            purchase_order_id=pk, line_no=1, item_id=item_id, quantity=quantity, rate=rate,
+            amount=amount if amount is not None else (quantity * rate).quantize(Decimal('0.01')),
+            sales_tax=sales_tax or 0, discount=discount or 0, freight=freight or 0,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            PurchaseOrderLine.objects.bulk_create(batch)
+            batch = []
+    PurchaseOrderLine.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0025_pending_cost'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_lines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def split_challan_kinds(apps, schema_editor):
+    """
+    Challans were one 'dc' node kind. Those feeding a lot document came in
+    with the gray cloth; those an issue points to went out with the goods.
+    """
+    TraceEdge = apps.get_model('inventory', 'TraceEdge')
+    TraceEdge.objects.filter(src_kind='dc').update(src_kind='dc_in')
+    TraceEdge.objects.filter(dst_kind='dc').update(dst_kind='dc_out')
+
+
+def merge_challan_kinds(apps, schema_editor):
+    TraceEdge = apps.get_model('inventory', 'TraceEdge')
+    TraceEdge.objects.filter(src_kind='dc_in').update(src_kind='dc')
+    TraceEdge.objects.filter(dst_kind='dc_out').update(dst_kind='dc')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0026_backfill_purchase_order_lines'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_challan_kinds, merge_challan_kinds),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.db.models import Max
+
+# Prefixes whose numbers also fill a column that used to be typed in by hand
+TYPED_COLUMNS = {
+    'SUP': ('Supplier', 'supplier_id'),
+    'AREA': ('AreaForm', 'areacode'),
+}
+
+
+def raise_counters(apps, schema_editor):
+    """
+    Counters seeded from the highest row id can sit below a hand-entered
+    supplier id or area code and hand it out again; move them past it.
+    """
+    DocumentSequence = apps.get_model('inventory', 'DocumentSequence')
+    for prefix, (model_name, field_name) in TYPED_COLUMNS.items():
+        model = apps.get_model('inventory', model_name)
+        highest = model.objects.aggregate(highest=Max(field_name))['highest']
+        if highest is not None:
+            DocumentSequence.objects.filter(prefix=prefix, last_value__lt=highest).update(last_value=highest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0027_split_challan_trace_kinds'),
+    ]
+
+    operations = [
+        migrations.RunPython(raise_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def backfill_closure(apps, schema_editor):
+    """
+    Builds the closure rows of the items saved before ItemClosure, which
+    families, roll-ups and the base item cycle check read. A new database
+    has no items and nothing to build.
+    """
+    ItemDefinition = apps.get_model('inventory', 'ItemDefinition')
+    if ItemDefinition.objects.exists():
+        from inventory.hierarchy import rebuild_closure
+        rebuild_closure()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0028_raise_typed_number_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def backfill_edges(apps, schema_editor):
+    """
+    Builds the trace edges of the lot and issue transactions saved before
+    TraceEdge, so historic lots can be traced. A new database has no
+    transactions and nothing to build.
+    """
+    LotTransaction = apps.get_model('inventory', 'LotTransaction')
+    IssueTransaction = apps.get_model('inventory', 'IssueTransaction')
+    if LotTransaction.objects.exists() or IssueTransaction.objects.exists():
+        from inventory.trace import rebuild_edges
+        rebuild_edges()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0029_backfill_item_closure'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_edges, migrations.RunPython.noop),
+    ]
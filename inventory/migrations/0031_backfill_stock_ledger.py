@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def backfill_ledger(apps, schema_editor):
+    """
+    Posts the GRNs and issues saved before the stock ledger, which stock on
+    hand, valuation and planning read. Rebuilds only when some document
+    with an item is missing from the ledger, as a rebuild also drops cost
+    layers (the next costing run is a full one) and snapshots (take them
+    again with ``manage.py stock_snapshots``).
+    """
+    ReceiptTransaction = apps.get_model('inventory', 'ReceiptTransaction')
+    IssueTransaction = apps.get_model('inventory', 'IssueTransaction')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+
+    def unposted(queryset, source_type):
+        posted = StockMovement.objects.filter(source_type=source_type).values('source_id')
+        return queryset.filter(item__isnull=False, quantity__isnull=False).exclude(quantity=0).exclude(id__in=posted)
+
+    if (unposted(ReceiptTransaction.objects.all(), 'GRN').exists()
+            or unposted(IssueTransaction.objects.filter(area__isnull=False), 'ISS').exists()):
+        from inventory.stock import rebuild_ledger
+        rebuild_ledger()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0030_backfill_trace_edges'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
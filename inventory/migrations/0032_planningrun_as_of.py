@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:28
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def date_existing_runs(apps, schema_editor):
+    # Runs saved without as_of are taken to have planned the day they started
+    PlanningRun = apps.get_model('inventory', 'PlanningRun')
+    PlanningRun.objects.update(as_of=TruncDate('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0031_backfill_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planningrun',
+            name='as_of',
+            field=models.DateField(help_text='Date the stock, consumption and lead times were planned at', null=True),
+        ),
+        migrations.RunPython(date_existing_runs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='planningrun',
+            name='as_of',
+            field=models.DateField(help_text='Date the stock, consumption and lead times were planned at'),
+        ),
+    ]
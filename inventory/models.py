@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.core.validators import RegexValidator
 
@@ -506,6 +507,13 @@ class ItemDefinition(models.Model):
     
     def __str__(self):
         return self.item_name
+
+    def clean(self):
+        from .hierarchy import check_base_item
+        try:
+            check_base_item(self)
+        except ValueError as error:
+            raise ValidationError({'base_item': str(error)})
     
 
 class Requisition(models.Model):
@@ -555,6 +563,31 @@ class PurchaseOrder(models.Model):
         return f"Purchase Order by {self.order_by}"
     
 
+class PurchaseOrderLine(models.Model):
+    """One item of a purchase order; the order's quantity and money fields total its lines."""
+
+    purchase_order = models.ForeignKey('PurchaseOrder', on_delete=models.CASCADE, related_name='lines')
+    line_no = models.PositiveIntegerField()
+    item = models.ForeignKey('ItemDefinition', on_delete=models.PROTECT, related_name='purchase_order_lines')
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    rate = models.DecimalField(max_digits=10, decimal_places=2)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    sales_tax = models.DecimalField(max_digits=10, decimal_places=2, default=0, blank=True)
+    discount = models.DecimalField(max_digits=10, decimal_places=2, default=0, blank=True)
+    freight = models.DecimalField(max_digits=10, decimal_places=2, default=0, blank=True)
+
+    class Meta:
+        db_table = "purchase_order_line"
+        verbose_name = 'Purchase Order Line'
+        verbose_name_plural = 'Purchase Order Lines'
+        constraints = [
+            models.UniqueConstraint(fields=['purchase_order', 'line_no'], name='purchase_order_line_order_line_no_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.purchase_order_id}/{self.line_no}: {self.quantity} x {self.item_id}"
+
+
 class ReceiptTransaction(models.Model):
     gpi_status_options = [
         ('Pending', 'pending'),
@@ -673,6 +706,8 @@ class IssueTransaction(models.Model):
     lot_no = models.CharField("Lot No", max_length=30)
     dc_no = models.CharField("D/C No", max_length=30)
     material = models.CharField(max_length=200, null=True)
+    item = models.ForeignKey('ItemDefinition', on_delete=models.SET_NULL, null=True, blank=True, related_name='issues')
+    quantity = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     
             
     class Meta:
@@ -682,3 +717,315 @@ class IssueTransaction(models.Model):
     
     def __str__(self):
         return f"Issue {self.transaction_no} - {self.nature}"
+
+
+class DocumentSequence(models.Model):
+    """Per-prefix counter backing document numbers (GRN-0001, PO-0001, ...)."""
+
+    prefix = models.CharField(max_length=20, unique=True)
+    last_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "document_sequence"
+        verbose_name = 'Document Sequence'
+        verbose_name_plural = 'Document Sequences'
+
+    def __str__(self):
+        return f"{self.prefix}: {self.last_value}"
+
+
+class DocumentNumberLease(models.Model):
+    """Block of document numbers handed to one worker process."""
+
+    prefix = models.CharField(max_length=20, db_index=True)
+    first_value = models.BigIntegerField()
+    last_value = models.BigIntegerField()
+    holder = models.CharField(max_length=100, help_text="host:pid of the worker that leased the block")
+    leased_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "document_number_lease"
+        verbose_name = 'Document Number Lease'
+        verbose_name_plural = 'Document Number Leases'
+        ordering = ['prefix', 'first_value']
+
+    def __str__(self):
+        return f"{self.prefix} {self.first_value}-{self.last_value} ({self.holder})"
+
+
+class DeletedRecord(models.Model):
+    """Tombstone for a deleted master-data row, served to delta-sync lookups."""
+
+    model = models.CharField(max_length=100, help_text="app_label.model_name of the deleted row")
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "deleted_record"
+        verbose_name = 'Deleted Record'
+        verbose_name_plural = 'Deleted Records'
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='deleted_record_model_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted {self.deleted_at}"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only stock ledger line. Receipts are positive, issues negative.
+    Written with the GRN or issue that caused it (see stock.py).
+    """
+
+    SOURCE_CHOICES = [
+        ('GRN', 'GRN'),
+        ('ISS', 'Issue Transaction'),
+    ]
+
+    item = models.ForeignKey('ItemDefinition', on_delete=models.PROTECT, related_name='stock_movements')
+    area = models.ForeignKey('AreaForm', on_delete=models.PROTECT, related_name='stock_movements')
+    movement_date = models.DateField()
+    quantity = models.DecimalField(max_digits=14, decimal_places=2)
+    value = models.DecimalField(max_digits=16, decimal_places=2)
+    source_type = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    source_id = models.BigIntegerField()
+    document_no = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "stock_movement"
+        verbose_name = 'Stock Movement'
+        verbose_name_plural = 'Stock Movements'
+        indexes = [
+            models.Index(fields=['item', 'area', 'movement_date'], name='stock_movement_item_area_idx'),
+            models.Index(fields=['movement_date'], name='stock_movement_date_idx'),
+            models.Index(fields=['source_type', 'source_id'], name='stock_movement_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.document_no}: {self.quantity} of item #{self.item_id} in area #{self.area_id}"
+
+
+class StockBalance(models.Model):
+    """Running stock on hand of one item in one area, kept in step with StockMovement."""
+
+    item = models.ForeignKey('ItemDefinition', on_delete=models.PROTECT, related_name='stock_balances')
+    area = models.ForeignKey('AreaForm', on_delete=models.PROTECT, related_name='stock_balances')
+    quantity = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    last_movement_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "stock_balance"
+        verbose_name = 'Stock Balance'
+        verbose_name_plural = 'Stock Balances'
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'area'], name='stock_balance_item_area_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Item #{self.item_id} in area #{self.area_id}: {self.quantity}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Stock of one item in one area at the end of ``snapshot_date``.
+    Taken for every (item, area) with stock at once, by stock.build_snapshots;
+    a pair without a row on a snapshot date had nothing on hand.
+    """
+
+    snapshot_date = models.DateField()
+    item = models.ForeignKey('ItemDefinition', on_delete=models.PROTECT, related_name='stock_snapshots')
+    area = models.ForeignKey('AreaForm', on_delete=models.PROTECT, related_name='stock_snapshots')
+    quantity = models.DecimalField(max_digits=16, decimal_places=2)
+    value = models.DecimalField(max_digits=18, decimal_places=2)
+
+    class Meta:
+        db_table = "stock_snapshot"
+        verbose_name = 'Stock Snapshot'
+        verbose_name_plural = 'Stock Snapshots'
+        constraints = [
+            models.UniqueConstraint(fields=['snapshot_date', 'item', 'area'], name='stock_snapshot_date_item_area_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['item', 'area', 'snapshot_date'], name='stock_snapshot_item_area_idx'),
+        ]
+
+    def __str__(self):
+        return f"Item #{self.item_id} in area #{self.area_id} on {self.snapshot_date}: {self.quantity}"
+
+
+class CostLayer(models.Model):
+    """Unconsumed part of one receipt under FIFO, written by costing.run_costing."""
+
+    item = models.ForeignKey('ItemDefinition', on_delete=models.CASCADE, related_name='cost_layers')
+    receipt = models.ForeignKey('StockMovement', on_delete=models.CASCADE, related_name='cost_layers')
+    received_date = models.DateField()
+    remaining_quantity = models.DecimalField(max_digits=16, decimal_places=2)
+    unit_cost = models.DecimalField(max_digits=16, decimal_places=4)
+
+    class Meta:
+        db_table = "cost_layer"
+        verbose_name = 'Cost Layer'
+        verbose_name_plural = 'Cost Layers'
+        indexes = [
+            models.Index(fields=['item', 'received_date'], name='cost_layer_item_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Item #{self.item_id}: {self.remaining_quantity} @ {self.unit_cost}"
+
+
+class ItemCost(models.Model):
+    """Computed cost of an item across all areas; std_cost is only used when this has none."""
+
+    item = models.OneToOneField('ItemDefinition', on_delete=models.CASCADE, primary_key=True, related_name='cost')
+    on_hand_quantity = models.DecimalField(max_digits=16, decimal_places=2)
+    average_cost = models.DecimalField(max_digits=16, decimal_places=4, null=True, help_text="Weighted average of all receipts")
+    fifo_cost = models.DecimalField(max_digits=16, decimal_places=4, null=True, help_text="Average cost of the remaining FIFO layers")
+    fifo_value = models.DecimalField(max_digits=18, decimal_places=2, null=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "item_cost"
+        verbose_name = 'Item Cost'
+        verbose_name_plural = 'Item Costs'
+
+    def __str__(self):
+        return f"Item #{self.item_id}: avg {self.average_cost}, FIFO {self.fifo_cost}"
+
+
+class PendingCost(models.Model):
+    """An item with stock movements not costed yet: queued by stock.record_movement, cleared by costing.run_costing."""
+
+    item = models.OneToOneField('ItemDefinition', on_delete=models.CASCADE, primary_key=True, related_name='pending_cost')
+    queued_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "pending_cost"
+        verbose_name = 'Pending Cost'
+        verbose_name_plural = 'Pending Costs'
+
+    def __str__(self):
+        return f"Item #{self.item_id} queued at {self.queued_at}"
+
+
+class CostingRun(models.Model):
+    """One run of the costing engine; ``last_movement_id`` is the latest movement when it ran, for reference."""
+
+    MODE_CHOICES = [
+        ('full', 'Full'),
+        ('incremental', 'Incremental'),
+    ]
+
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES)
+    last_movement_id = models.BigIntegerField()
+    items_costed = models.PositiveIntegerField()
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "costing_run"
+        verbose_name = 'Costing Run'
+        verbose_name_plural = 'Costing Runs'
+
+    def __str__(self):
+        return f"{self.mode} costing up to movement #{self.last_movement_id}"
+
+
+class TraceEdge(models.Model):
+    """
+    Materialized lot traceability link between two nodes (gray receipt,
+    inbound challan, lot document, lot, issue, outbound challan), pointing
+    downstream. Maintained from lot and issue transactions by trace.py.
+    """
+
+    src_kind = models.CharField(max_length=20)
+    src_key = models.CharField(max_length=50)
+    dst_kind = models.CharField(max_length=20)
+    dst_key = models.CharField(max_length=50)
+
+    class Meta:
+        db_table = "trace_edge"
+        verbose_name = 'Trace Edge'
+        verbose_name_plural = 'Trace Edges'
+        indexes = [
+            models.Index(fields=['src_kind', 'src_key'], name='trace_edge_src_idx'),
+            models.Index(fields=['dst_kind', 'dst_key'], name='trace_edge_dst_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.src_kind}:{self.src_key} -> {self.dst_kind}:{self.dst_key}"
+
+
+class PlanningRun(models.Model):
+    """One batch reorder-point run over all active items (planning.run_planning)."""
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(auto_now_add=True)
+    as_of = models.DateField(help_text="Date the stock, consumption and lead times were planned at")
+    window_days = models.PositiveIntegerField(help_text="Days of issues the consumption is averaged over")
+    service_factor = models.DecimalField(max_digits=5, decimal_places=2, help_text="z-score of the target service level")
+    items_planned = models.PositiveIntegerField()
+    requisition = models.ForeignKey('Requisition', on_delete=models.SET_NULL, null=True, blank=True, related_name='planning_runs')
+
+    class Meta:
+        db_table = "planning_run"
+        verbose_name = 'Planning Run'
+        verbose_name_plural = 'Planning Runs'
+
+    def __str__(self):
+        return f"Planning run {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class ReorderSuggestion(models.Model):
+    """An item at or below its reorder point in a planning run, with the quantity to requisition."""
+
+    run = models.ForeignKey('PlanningRun', on_delete=models.CASCADE, related_name='suggestions')
+    item = models.ForeignKey('ItemDefinition', on_delete=models.CASCADE, related_name='reorder_suggestions')
+    on_hand = models.DecimalField(max_digits=16, decimal_places=2)
+    daily_consumption = models.DecimalField(max_digits=14, decimal_places=4)
+    lead_time_days = models.DecimalField(max_digits=8, decimal_places=2)
+    safety_stock = models.DecimalField(max_digits=16, decimal_places=2)
+    reorder_point = models.DecimalField(max_digits=16, decimal_places=2)
+    suggested_quantity = models.DecimalField(max_digits=16, decimal_places=2)
+
+    class Meta:
+        db_table = "reorder_suggestion"
+        verbose_name = 'Reorder Suggestion'
+        verbose_name_plural = 'Reorder Suggestions'
+        indexes = [
+            models.Index(fields=['run', 'item'], name='reorder_suggestion_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"Reorder {self.suggested_quantity} of item #{self.item_id}"
+
+
+class ItemClosure(models.Model):
+    """
+    Closure table of the base_item hierarchy: one row per (ancestor,
+    descendant) pair, including each item with itself at depth 0.
+    Maintained on save by hierarchy.py.
+    """
+
+    ancestor = models.ForeignKey('ItemDefinition', on_delete=models.CASCADE, related_name='descendant_paths')
+    descendant = models.ForeignKey('ItemDefinition', on_delete=models.CASCADE, related_name='ancestor_paths')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = "item_closure"
+        verbose_name = 'Item Closure'
+        verbose_name_plural = 'Item Closure'
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='item_closure_ancestor_descendant_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='item_closure_descendant_idx'),
+        ]
+
+    def __str__(self):
+        return f"Item #{self.ancestor_id} > #{self.descendant_id} ({self.depth})"
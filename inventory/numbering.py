@@ -0,0 +1,186 @@
+import os
+import socket
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.db.models.functions import Coalesce, Greatest, Now
+
+from .models import DocumentNumberLease, DocumentSequence
+
+
+def format_code(prefix, number, padding=4):
+    """
+    Formats a sequence number as a document code.
+    Format: PREFIX-0001
+    """
+    return f"{prefix}-{str(number).zfill(padding)}"
+
+
+def _get_or_seed_sequence(prefix, model=None, seed=None):
+    """
+    Makes sure a counter row exists for ``prefix``.
+
+    The first time a prefix is used the counter is seeded from ``model``:
+    by default from its highest id, so numbers continue from the ones the
+    old id-based generator handed out. ``seed`` is the aggregate to use
+    instead when the numbers also fill a column that was typed in by hand.
+    """
+    last_value = 0
+    if model is not None:
+        last_value = model.objects.aggregate(last=seed or Max('id'))['last'] or 0
+    DocumentSequence.objects.get_or_create(prefix=prefix, defaults={'last_value': last_value})
+
+
+def highest(*fields):
+    """Seed aggregate: the largest value in any of ``fields`` (0 for none)."""
+    return Greatest(*(Coalesce(Max(field), 0) for field in fields))
+
+
+def allocate_numbers(prefix, count=1, model=None, seed=None):
+    """
+    Atomically reserves ``count`` consecutive numbers for ``prefix`` and
+    returns the last one. The reserved block is ``last - count + 1 .. last``.
+
+    Only the counter row of this prefix is locked, and only until the
+    surrounding transaction commits, so different prefixes never wait on
+    each other and no table lock is taken. ``model`` and ``seed`` seed a
+    new counter (see ``_get_or_seed_sequence``).
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    for _ in range(2):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"UPDATE {DocumentSequence._meta.db_table} "
+                        "SET last_value = last_value + %s, updated_at = NOW() "
+                        "WHERE prefix = %s RETURNING last_value",
+                        [count, prefix],
+                    )
+                    row = cursor.fetchone()
+                if row:
+                    return row[0]
+            else:
+                updated = DocumentSequence.objects.filter(prefix=prefix).update(
+                    last_value=F('last_value') + count, updated_at=Now()
+                )
+                if updated:
+                    return DocumentSequence.objects.values_list('last_value', flat=True).get(prefix=prefix)
+        _get_or_seed_sequence(prefix, model, seed)
+
+    raise DocumentSequence.DoesNotExist(f"No sequence for prefix {prefix}")
+
+
+def allocate_code(model, prefix, padding=4):
+    """
+    Allocates the next document code for ``prefix`` (e.g. GRN-0001).
+
+    Call this at save time, inside the transaction that inserts the
+    document, never while rendering the empty form.
+    """
+    return format_code(prefix, allocate_numbers(prefix, model=model), padding)
+
+
+def block_size(prefix):
+    """Returns the lease block size configured for ``prefix`` (default 1)."""
+    return max(1, int(getattr(settings, 'DOCUMENT_NUMBER_BLOCK_SIZES', {}).get(prefix, 1)))
+
+
+class BlockAllocator:
+    """
+    Hands out document numbers from blocks leased by this process (hi-lo).
+
+    Each worker reserves ``block_size(prefix)`` numbers in one round trip
+    and serves them from memory. Numbers still unused when the worker
+    exits are never reissued; they show up in ``number_gaps`` (with
+    ``include_live`` while no later block of the worker exists).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._pid = os.getpid()
+
+    def next_number(self, prefix, model=None):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: blocks leased by the parent belong to the parent
+                self._blocks = {}
+                self._pid = os.getpid()
+
+            block = self._blocks.get(prefix)
+            if block is None or block[0] > block[1]:
+                block = self._lease(prefix, model)
+            number = block[0]
+            self._blocks[prefix] = (number + 1, block[1])
+            return number
+
+    def _lease(self, prefix, model):
+        if connection.in_atomic_block:
+            # A rolled back lease would let another worker reissue this block
+            raise transaction.TransactionManagementError(
+                "Document numbers must be leased outside of an atomic block."
+            )
+        size = block_size(prefix)
+        with transaction.atomic():
+            last = allocate_numbers(prefix, count=size, model=model)
+            DocumentNumberLease.objects.create(
+                prefix=prefix,
+                first_value=last - size + 1,
+                last_value=last,
+                holder=f"{socket.gethostname()}:{os.getpid()}"[:100],
+            )
+        return (last - size + 1, last)
+
+
+_allocator = BlockAllocator()
+
+
+def lease_code(model, prefix, padding=4):
+    """
+    Returns the next document code for ``prefix`` from this process's
+    leased block. Must be called before entering the transaction that
+    saves the document.
+    """
+    return format_code(prefix, _allocator.next_number(prefix, model), padding)
+
+
+def number_gaps(model, prefix, field_name, include_live=False):
+    """
+    Returns the leased numbers of ``prefix`` that no ``model`` row uses,
+    as a list of ``(first, last)`` ranges.
+
+    The newest block of each holder may still be handing out numbers, so
+    the unused numbers after its highest used one are left out unless
+    ``include_live`` is set (for when no worker is running).
+    """
+    used = set()
+    codes = model.objects.filter(**{f"{field_name}__startswith": f"{prefix}-"}).values_list(field_name, flat=True)
+    for code in codes.iterator():
+        suffix = code[len(prefix) + 1:]
+        if suffix.isdigit():
+            used.add(int(suffix))
+
+    leases = list(DocumentNumberLease.objects.filter(prefix=prefix).values_list('first_value', 'last_value', 'holder'))
+    newest = {}
+    for first, last, holder in leases:
+        newest[holder] = max(newest.get(holder, first), first)
+
+    gaps = []
+    for first, last, holder in leases:
+        if not include_live and newest[holder] == first:
+            last = max((number for number in range(first, last + 1) if number in used), default=first - 1)
+        start = None
+        for number in range(first, last + 1):
+            if number not in used and start is None:
+                start = number
+            elif number in used and start is not None:
+                gaps.append((start, number - 1))
+                start = None
+        if start is not None:
+            gaps.append((start, last))
+    return gaps
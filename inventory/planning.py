@@ -0,0 +1,167 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+from decimal import ROUND_CEILING, Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import (
+    ItemDefinition, PlanningRun, PurchaseOrder, ReceiptTransaction, ReorderSuggestion, Requisition, StockBalance,
+    StockMovement,
+)
+from .numbering import allocate_code
+from .stock import stock_as_of
+
+# Defaults, each overridable with a PLANNING_* setting of the same name
+DEFAULTS = {
+    'WINDOW_DAYS': 90,          # days of issues averaged into daily consumption
+    'LEAD_TIME_DAYS': 365,      # days of PO-to-GRN history averaged into lead time
+    'DEFAULT_LEAD_DAYS': 14,    # lead time of items never received against a PO
+    'SERVICE_FACTOR': 1.65,     # z-score of the service level (1.65 ~ 95%)
+    'REVIEW_DAYS': 30,          # consumption a suggestion covers beyond the reorder point
+}
+
+# Daily issued quantity per item: sum and sum of squares over the days with issues
+DEMAND_SQL = """
+SELECT item_id, SUM(quantity), SUM(quantity * quantity)
+FROM (
+    SELECT item_id, movement_date, -SUM(quantity) AS quantity
+    FROM {movement}
+    WHERE source_type = 'ISS' AND movement_date > %s AND movement_date <= %s
+    GROUP BY item_id, movement_date
+) daily
+GROUP BY item_id
+"""
+
+# Average days from PO date to GRN date per item
+LEAD_TIME_SQL = """
+SELECT g.item_id, AVG({days})
+FROM {grn} g JOIN {po} p ON p.id = g.po_id
+WHERE g.item_id IS NOT NULL AND g.transaction_date >= p.po_date
+  AND g.transaction_date > %s AND g.transaction_date <= %s
+GROUP BY g.item_id
+"""
+
+
+def planning_setting(name):
+    return getattr(settings, f'PLANNING_{name}', DEFAULTS[name])
+
+
+def _lead_days_expression():
+    if connection.vendor == 'postgresql':
+        return "g.transaction_date - p.po_date"
+    return "julianday(g.transaction_date) - julianday(p.po_date)"
+
+
+def _demand(as_of, window_days):
+    sql = DEMAND_SQL.format(movement=StockMovement._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [as_of - timedelta(days=window_days), as_of])
+        return {item_id: (float(total), float(squares)) for item_id, total, squares in cursor.fetchall()}
+
+
+def _lead_times(as_of):
+    sql = LEAD_TIME_SQL.format(
+        days=_lead_days_expression(),
+        grn=ReceiptTransaction._meta.db_table,
+        po=PurchaseOrder._meta.db_table,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [as_of - timedelta(days=planning_setting('LEAD_TIME_DAYS')), as_of])
+        return {item_id: float(days) for item_id, days in cursor.fetchall()}
+
+
+def _on_hand(as_of):
+    """Quantity on hand per item at the end of ``as_of``: the running balances today, the ledger history before."""
+    if as_of >= timezone.localdate():
+        return dict(
+            StockBalance.objects.values_list('item_id').annotate(quantity=Sum('quantity')).values_list('item_id', 'quantity')
+        )
+    on_hand = defaultdict(Decimal)
+    for (item_id, _area_id), (quantity, _value) in stock_as_of(as_of).items():
+        on_hand[item_id] += quantity
+    return on_hand
+
+
+def _quantity(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+def plan(as_of=None, window_days=None, service_factor=None):
+    """
+    Computes daily consumption, lead time, safety stock and reorder point
+    of every active item as they stood at the end of ``as_of``, with one
+    aggregate query per input and no per-item queries. Returns ``(items_planned, suggestions)``, the latter
+    unsaved ReorderSuggestion rows for items at or below their reorder point.
+
+    Safety stock is ``service_factor * sigma(daily issues) * sqrt(lead
+    time)``; an item is reordered up to its reorder point plus
+    PLANNING_REVIEW_DAYS of consumption.
+    """
+    as_of = as_of or timezone.localdate()
+    window_days = window_days or planning_setting('WINDOW_DAYS')
+    service_factor = float(service_factor if service_factor is not None else planning_setting('SERVICE_FACTOR'))
+    default_lead = float(planning_setting('DEFAULT_LEAD_DAYS'))
+    review_days = float(planning_setting('REVIEW_DAYS'))
+
+    items = list(ItemDefinition.objects.filter(active=True).values_list('id', flat=True))
+    demand = _demand(as_of, window_days)
+    lead_times = _lead_times(as_of)
+    on_hand = _on_hand(as_of)
+
+    suggestions = []
+    for item_id in items:
+        total, squares = demand.get(item_id, (0.0, 0.0))
+        daily = total / window_days
+        # Days without issues count as zero demand
+        sigma = math.sqrt(max(squares / window_days - daily * daily, 0.0))
+        lead = lead_times.get(item_id, default_lead)
+        safety = service_factor * sigma * math.sqrt(lead)
+        reorder_point = daily * lead + safety
+        stock = float(on_hand.get(item_id) or 0)
+        if daily <= 0 or stock > reorder_point:
+            continue
+        suggested = Decimal(reorder_point + daily * review_days - stock).quantize(Decimal('1'), rounding=ROUND_CEILING)
+        suggestions.append(ReorderSuggestion(
+            item_id=item_id,
+            on_hand=_quantity(stock),
+            daily_consumption=Decimal(daily).quantize(Decimal('0.0001')),
+            lead_time_days=_quantity(lead),
+            safety_stock=_quantity(safety),
+            reorder_point=_quantity(reorder_point),
+            suggested_quantity=suggested,
+        ))
+    return len(items), suggestions
+
+
+def run_planning(as_of=None, window_days=None, service_factor=None, department=None, batch_size=5000):
+    """
+    Runs ``plan`` and saves it as a PlanningRun with its suggestions,
+    recording the date it planned at. With a ``department``, one
+    requisition listing the suggestions is raised.
+    """
+    started_at = timezone.now()
+    as_of = as_of or timezone.localdate()
+    window_days = window_days or planning_setting('WINDOW_DAYS')
+    service_factor = service_factor if service_factor is not None else planning_setting('SERVICE_FACTOR')
+    items_planned, suggestions = plan(as_of, window_days, service_factor)
+    with transaction.atomic():
+        requisition = None
+        if department is not None and suggestions:
+            requisition = Requisition.objects.create(
+                doc_number=allocate_code(Requisition, 'REQ'),
+                department=department,
+                requisition_by="Reorder planning",
+                remarks=f"{len(suggestions)} item(s) at or below their reorder point; see the reorder report.",
+            )
+        run = PlanningRun.objects.create(
+            started_at=started_at, as_of=as_of, window_days=window_days, service_factor=service_factor,
+            items_planned=items_planned, requisition=requisition,
+        )
+        for suggestion in suggestions:
+            suggestion.run = run
+        ReorderSuggestion.objects.bulk_create(suggestions, batch_size=batch_size)
+    return run
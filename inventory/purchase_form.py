@@ -1,8 +1,9 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from .choices import SharedChoicesMixin
 from .models import Purchase
 
-class PurchaseModelForm(forms.ModelForm):
+class PurchaseModelForm(SharedChoicesMixin, forms.ModelForm):
     """Model form for managing purchase orders in the ERP system."""
 
     class Meta:
@@ -1,7 +1,10 @@
+from decimal import Decimal
+
 from django import forms
-from .models import PurchaseOrder
+from .autocomplete import AutocompleteFormMixin, AutocompleteModelChoiceField, AutocompleteSelect
+from .models import PurchaseOrder, PurchaseOrderLine
 
-class PurchaseOrderForm(forms.ModelForm):
+class PurchaseOrderForm(AutocompleteFormMixin, forms.ModelForm):
     class Meta:
         model = PurchaseOrder
         fields = [
@@ -17,13 +20,12 @@ class PurchaseOrderForm(forms.ModelForm):
             'delivery_at',
             'order_by',
             'condition',
-            'freight',
-            'quantity',
-            'rate',
-            'amount',
-            'sales_tax',
-            'discount'
         ]
+        field_classes = {
+            'area': AutocompleteModelChoiceField,
+            'supplier': AutocompleteModelChoiceField,
+            'requisition': AutocompleteModelChoiceField,
+        }
         widgets = {
             'po_number': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -42,10 +44,10 @@ class PurchaseOrderForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Enter PO type'
             }),
-            'area': forms.Select(attrs={
+            'area': AutocompleteSelect('area', ('areacode', 'areaname'), attrs={
                 'class': 'form-control'
             }),
-            'supplier': forms.Select(attrs={
+            'supplier': AutocompleteSelect('supplier', ('supplier_name',), attrs={
                 'class': 'form-control'
             }),
             'remarks': forms.Textarea(attrs={
@@ -58,7 +60,7 @@ class PurchaseOrderForm(forms.ModelForm):
                 'rows': 3,
                 'placeholder': 'Enter terms and conditions'
             }),
-            'requisition': forms.Select(attrs={
+            'requisition': AutocompleteSelect('requisition', ('doc_number',), attrs={
                 'class': 'form-control'
             }),
             'ref_no': forms.TextInput(attrs={
@@ -78,36 +80,6 @@ class PurchaseOrderForm(forms.ModelForm):
                 'rows': 3,
                 'placeholder': 'Enter conditions'
             }),
-            'freight': forms.NumberInput(attrs={
-                'class': 'form-control',
-                'step': '0.01',
-                'placeholder': '0.00'
-            }),
-            'quantity': forms.NumberInput(attrs={
-                'class': 'form-control',
-                'step': '0.01',
-                'placeholder': '0.00'
-            }),
-            'rate': forms.NumberInput(attrs={
-                'class': 'form-control',
-                'step': '0.01',
-                'placeholder': '0.00'
-            }),
-            'amount': forms.NumberInput(attrs={
-                'class': 'form-control',
-                'step': '0.01',
-                'placeholder': '0.00'
-            }),
-            'sales_tax': forms.NumberInput(attrs={
-                'class': 'form-control',
-                'step': '0.01',
-                'placeholder': '0.00'
-            }),
-            'discount': forms.NumberInput(attrs={
-                'class': 'form-control',
-                'step': '0.01',
-                'placeholder': '0.00'
-            }),
         }
         labels = {
             'po_number': 'PO Number',
@@ -122,12 +94,6 @@ class PurchaseOrderForm(forms.ModelForm):
             'delivery_at': 'Delivery At',
             'order_by': 'Order By',
             'condition': 'Condition',
-            'freight': 'Freight',
-            'quantity': 'Quantity',
-            'rate': 'Rate',
-            'amount': 'Amount',
-            'sales_tax': 'Sales Tax',
-            'discount': 'Discount'
         }
         help_texts = {
             'po_number': 'Unique purchase order number',
@@ -142,10 +108,135 @@ class PurchaseOrderForm(forms.ModelForm):
             'delivery_at': 'Delivery location',
             'order_by': 'Person who placed the order',
             'condition': 'Special conditions',
-            'freight': 'Freight cost',
-            'quantity': 'Quantity ordered',
-            'rate': 'Rate per unit',
-            'amount': 'Total amount',
-            'sales_tax': 'Sales tax amount',
-            'discount': 'Discount amount'
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Allocated from the document sequence when the form is saved
+        self.fields['po_number'].required = False
+
+
+class PurchaseOrderLineForm(AutocompleteFormMixin, forms.ModelForm):
+    class Meta:
+        model = PurchaseOrderLine
+        fields = ['item', 'quantity', 'rate', 'sales_tax', 'discount', 'freight']
+        field_classes = {
+            'item': AutocompleteModelChoiceField,
+        }
+        widgets = {
+            'item': AutocompleteSelect('item', ('item_code', 'item_name'), attrs={
+                'class': 'form-control'
+            }),
+            'quantity': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': '0.00'}),
+            'rate': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': '0.00'}),
+            'sales_tax': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': '0.00'}),
+            'discount': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': '0.00'}),
+            'freight': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': '0.00'}),
+        }
+        labels = {
+            'item': 'Item',
+            'quantity': 'Quantity',
+            'rate': 'Rate',
+            'sales_tax': 'Sales Tax',
+            'discount': 'Discount',
+            'freight': 'Freight',
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # No initial 0 from the model defaults, so an untouched row stays unchanged and is skipped
+        for name in ('sales_tax', 'discount', 'freight'):
+            self.fields[name].initial = None
+
+    def clean(self):
+        cleaned_data = super().clean()
+        quantity, rate = cleaned_data.get('quantity'), cleaned_data.get('rate')
+        if quantity is None or rate is None:
+            return cleaned_data
+        if exceeds_field(line_amount(quantity, rate), PurchaseOrderLine, 'amount'):
+            raise forms.ValidationError("Quantity x rate is too large for one line; split it over several lines.")
+        return cleaned_data
+
+
+# Header fields holding the totals of the lines
+TOTAL_FIELDS = ('quantity', 'amount', 'sales_tax', 'discount', 'freight')
+
+
+def line_amount(quantity, rate):
+    return (quantity * rate).quantize(Decimal('0.01'))
+
+
+def exceeds_field(value, model, name):
+    """Whether ``value`` has more integer digits than the decimal field ``name`` of ``model`` stores."""
+    field = model._meta.get_field(name)
+    return abs(value) >= Decimal(10) ** (field.max_digits - field.decimal_places)
+
+
+class BasePurchaseOrderLineFormSet(forms.BaseInlineFormSet):
+    def full_clean(self):
+        # One query for the items of every line instead of one per line
+        if self.is_bound:
+            pks = {self.data.get(form.add_prefix('item'), '') for form in self.forms}
+            field = self.form.base_fields['item']
+            items = field.queryset.in_bulk([pk for pk in pks if pk.isdigit()])
+            prefetched = {str(pk): item for pk, item in items.items()}
+            for form in self.forms:
+                form.fields['item'].prefetched = prefetched
+        super().full_clean()
+
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+        totals = dict.fromkeys(TOTAL_FIELDS, Decimal('0.00'))
+        for form in self.forms:
+            if not form.has_changed():
+                continue
+            data = form.cleaned_data
+            values = {**data, 'amount': line_amount(data['quantity'], data['rate'])}
+            for name in totals:
+                totals[name] += values.get(name) or 0
+        too_large = [
+            PurchaseOrder._meta.get_field(name).verbose_name
+            for name, total in totals.items() if exceeds_field(total, PurchaseOrder, name)
+        ]
+        if too_large:
+            raise forms.ValidationError(
+                f"The order total {', '.join(too_large)} is too large for one purchase order; split it over several orders."
+            )
+
+    def build_lines(self, purchase_order):
+        """
+        Numbers the entered lines and computes their amounts, and in the
+        same pass sets the order's quantity, amount, sales tax, discount
+        and freight to the line totals. Blank rows are skipped. Returns
+        the unsaved lines, ready for bulk_create once the order is saved.
+        """
+        zero = Decimal('0.00')
+        totals = dict.fromkeys(TOTAL_FIELDS, zero)
+        lines = []
+        for form in self.forms:
+            if not form.has_changed() or self._should_delete_form(form):
+                continue
+            line = form.save(commit=False)
+            line.purchase_order = purchase_order
+            line.line_no = len(lines) + 1
+            line.amount = line_amount(line.quantity, line.rate)
+            line.sales_tax = line.sales_tax or zero
+            line.discount = line.discount or zero
+            line.freight = line.freight or zero
+            for name in totals:
+                totals[name] += getattr(line, name)
+            lines.append(line)
+        for name, total in totals.items():
+            setattr(purchase_order, name, total)
+        # A rate only means something for a single-item order
+        purchase_order.rate = lines[0].rate if len(lines) == 1 else None
+        return lines
+
+
+# Blank rows shown for a new order; more are added in the browser
+PurchaseOrderLineFormSet = forms.inlineformset_factory(
+    PurchaseOrder, PurchaseOrderLine, form=PurchaseOrderLineForm, formset=BasePurchaseOrderLineFormSet,
+    extra=4, min_num=1, validate_min=True, max_num=200, validate_max=True, can_delete=False,
+)
@@ -1,7 +1,8 @@
 from django import forms
+from .choices import SharedChoicesMixin
 from .models import PurchaseVoucher
 
-class PurchaseVoucherForm(forms.ModelForm):
+class PurchaseVoucherForm(SharedChoicesMixin, forms.ModelForm):
     class Meta:
         model = PurchaseVoucher
         fields = [
@@ -67,3 +68,8 @@ class PurchaseVoucherForm(forms.ModelForm):
             'bilty_no': 'Bilty number',
             'days': 'Number of credit or delivery days'
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Allocated from the document sequence when the form is saved
+        self.fields['transaction_no'].required = False
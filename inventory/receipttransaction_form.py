@@ -1,7 +1,8 @@
 from django import forms
+from .autocomplete import AutocompleteFormMixin, AutocompleteModelChoiceField, AutocompleteSelect
 from .models import ReceiptTransaction
 
-class GRNForm(forms.ModelForm):
+class GRNForm(AutocompleteFormMixin, forms.ModelForm):
     class Meta:
         model = ReceiptTransaction
         fields = [
@@ -23,6 +24,14 @@ class GRNForm(forms.ModelForm):
             'gpi_status',
             'gpo'
         ]
+        field_classes = {
+            'area': AutocompleteModelChoiceField,
+            'supplier': AutocompleteModelChoiceField,
+            'client_po': AutocompleteModelChoiceField,
+            'gpo': AutocompleteModelChoiceField,
+            'po': AutocompleteModelChoiceField,
+            'item': AutocompleteModelChoiceField,
+        }
         widgets = {
             'transaction_no': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -37,17 +46,17 @@ class GRNForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Enter nature of transaction'
             }),
-            'area': forms.Select(attrs={
+            'area': AutocompleteSelect('area', ('areacode', 'areaname'), attrs={
                 'class': 'form-control'
             }),
             'delivery_challan_no': forms.TextInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Enter delivery challan number'
             }),
-            'supplier': forms.Select(attrs={
+            'supplier': AutocompleteSelect('supplier', ('supplier_name',), attrs={
                 'class': 'form-control'
             }),
-            'client_po': forms.Select(attrs={
+            'client_po': AutocompleteSelect('purchase_order', ('po_number',), attrs={
                 'class': 'form-control'
             }),
             'remarks': forms.Textarea(attrs={
@@ -62,13 +71,13 @@ class GRNForm(forms.ModelForm):
             'gpi_status': forms.Select(attrs={
                 'class': 'form-control'
             }),
-            'gpo': forms.Select(attrs={
+            'gpo': AutocompleteSelect('purchase_order', ('po_number',), attrs={
                 'class': 'form-control'
             }),
-            'po': forms.Select(attrs={
+            'po': AutocompleteSelect('purchase_order', ('po_number',), attrs={
                 'class': 'form-control'
             }),
-            'item': forms.Select(attrs={
+            'item': AutocompleteSelect('item', ('item_code', 'item_name'), attrs={
                 'class': 'form-control'
             }),
             'quantity': forms.NumberInput(attrs={
@@ -130,3 +139,8 @@ class GRNForm(forms.ModelForm):
             'gpi_status': 'GPI status',
             'gpo': 'GPO details'
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Allocated from the document sequence when the form is saved
+        self.fields['transaction_no'].required = False
@@ -1,7 +1,8 @@
 from django import forms
+from .choices import SharedChoicesMixin
 from .models import Requisition
 
-class RequisitionForm(forms.ModelForm):
+class RequisitionForm(SharedChoicesMixin, forms.ModelForm):
     class Meta:
         model = Requisition
         fields = [
@@ -41,3 +42,8 @@ class RequisitionForm(forms.ModelForm):
             'requisition_by': 'Name of the person making the requisition',
             'remarks': 'Additional remarks or notes'
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Allocated from the document sequence when the form is saved
+        self.fields['doc_number'].required = False
@@ -0,0 +1,52 @@
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Q, Value
+from django.db.models.functions import Greatest
+
+# Shorter queries have too few trigrams to rank meaningfully
+TRIGRAM_MIN_LENGTH = 3
+
+
+def search_filter(query, search_fields):
+    """
+    Builds a filter matching every whitespace separated term of ``query``
+    in at least one of ``search_fields``.
+    """
+    condition = Q()
+    for term in query.split():
+        term_condition = Q()
+        for field in search_fields:
+            term_condition |= Q(**{f"{field}__icontains": term})
+        condition &= term_condition
+    return condition
+
+
+def trigram_search_available():
+    """Trigram search needs PostgreSQL with the pg_trgm extension (migration 0016)."""
+    return connection.vendor == 'postgresql'
+
+
+def ranked_search(queryset, query, fields, search_fields=()):
+    """
+    Returns the rows of ``queryset`` matching ``query`` in any of ``fields``,
+    or in the other ``search_fields`` the way search_filter matches them,
+    annotated with ``rank`` and ordered best match first.
+
+    On PostgreSQL ``fields`` use the pg_trgm word-similarity operator, which
+    is answered from the GIN trigram indexes and tolerates typos; the rank
+    is the similarity over ``fields`` only, so rows found through the other
+    search fields come last. Elsewhere (SQLite in tests) it falls back to a
+    plain icontains filter with a constant rank, ordered by id.
+    """
+    other_fields = [field for field in search_fields if field not in fields]
+    if trigram_search_available() and len(query) >= TRIGRAM_MIN_LENGTH:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f"{field}__trigram_word_similar": query})
+        if other_fields:
+            condition |= search_filter(query, other_fields)
+        similarities = [TrigramWordSimilarity(query, field) for field in fields]
+        rank = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+        return queryset.filter(condition).annotate(rank=rank).order_by('-rank', 'id')
+
+    return queryset.filter(search_filter(query, [*fields, *other_fields])).annotate(rank=Value(1.0)).order_by('id')
@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .lookup_cache import bump_version
+from .models import (
+    AreaForm, Customer, DeletedRecord, DepartmentDefinition, INVcategory, IssueTransaction, ItemDefinition, LotTransaction,
+    Supplier,
+)
+from .hierarchy import check_base_item, link_item
+from .trace import link_document, unlink_document
+
+# Models whose lookups are served from the versioned lookup cache
+CACHED_LOOKUP_MODELS = (AreaForm, Customer, DepartmentDefinition, INVcategory, Supplier)
+
+# Models whose lookups support delta sync and need tombstones for deletes
+DELTA_SYNC_MODELS = (AreaForm, Customer, DepartmentDefinition, INVcategory, ItemDefinition, Supplier)
+
+
+def invalidate_lookup_cache(sender, **kwargs):
+    """Bump the lookup cache version of a master-data model once the change commits."""
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+def record_deletion(sender, instance, **kwargs):
+    """Log the deleted id so delta-sync clients can drop it."""
+    DeletedRecord.objects.create(model=sender._meta.label_lower, object_id=instance.pk)
+
+
+def update_trace_edges(sender, instance, **kwargs):
+    """Rewrite the traceability edges of a saved lot or issue transaction."""
+    link_document(instance)
+
+
+def remove_trace_edges(sender, instance, **kwargs):
+    unlink_document(instance)
+
+
+def check_item_cycle(sender, instance, raw=False, **kwargs):
+    """Refuse a base_item that is the item itself or one of its variants, before the row is written."""
+    if not raw:
+        check_base_item(instance)
+
+
+def update_item_closure(sender, instance, created, **kwargs):
+    """Keep the base_item closure table in step with the saved item."""
+    link_item(instance, created)
+
+
+# Connected per model: a receiver for every sender would disable Django's
+# fast-path deletes on all other models
+for model in CACHED_LOOKUP_MODELS:
+    post_save.connect(invalidate_lookup_cache, sender=model, dispatch_uid=f"lookup-cache-save-{model._meta.label_lower}")
+    post_delete.connect(invalidate_lookup_cache, sender=model, dispatch_uid=f"lookup-cache-delete-{model._meta.label_lower}")
+
+for model in DELTA_SYNC_MODELS:
+    post_delete.connect(record_deletion, sender=model, dispatch_uid=f"lookup-tombstone-{model._meta.label_lower}")
+
+for model in (LotTransaction, IssueTransaction):
+    post_save.connect(update_trace_edges, sender=model, dispatch_uid=f"trace-save-{model._meta.label_lower}")
+    post_delete.connect(remove_trace_edges, sender=model, dispatch_uid=f"trace-delete-{model._meta.label_lower}")
+
+pre_save.connect(check_item_cycle, sender=ItemDefinition, dispatch_uid="item-closure-cycle")
+post_save.connect(update_item_closure, sender=ItemDefinition, dispatch_uid="item-closure-save")
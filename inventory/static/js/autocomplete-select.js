@@ -0,0 +1,133 @@
+// Typeahead for <select data-autocomplete-url> rendered by autocomplete.AutocompleteSelect.
+// The select only carries the selected option; candidates are fetched page by
+// page from the lookup endpoint as the user types.
+class AutocompleteSelect {
+  constructor(select, options = {}) {
+    this.select = select;
+    this.url = select.dataset.autocompleteUrl;
+    this.pageSize = options.pageSize || 20;
+    this.debounceMs = options.debounceMs || 250;
+    this.nextCursor = null;
+    this.searchTimer = null;
+    this.pendingRequest = null;
+    this.build();
+  }
+
+  build() {
+    this.panel = document.createElement('div');
+    this.panel.className = 'autocomplete-panel';
+    this.panel.style.display = 'none';
+    this.panel.innerHTML = `
+      <input type="text" class="autocomplete-input" placeholder="Type to search...">
+      <ul class="autocomplete-results"></ul>
+    `;
+    this.select.parentNode.appendChild(this.panel);
+    this.input = this.panel.querySelector('.autocomplete-input');
+    this.results = this.panel.querySelector('.autocomplete-results');
+
+    // Open our panel instead of the native dropdown
+    this.select.addEventListener('mousedown', e => {
+      e.preventDefault();
+      this.toggle();
+    });
+    this.select.addEventListener('keydown', e => {
+      if (['Enter', ' ', 'ArrowDown'].includes(e.key)) {
+        e.preventDefault();
+        this.open();
+      }
+    });
+    this.input.addEventListener('input', () => {
+      clearTimeout(this.searchTimer);
+      this.searchTimer = setTimeout(() => this.search(), this.debounceMs);
+    });
+    this.input.addEventListener('keydown', e => {
+      if (e.key === 'Escape') this.close();
+    });
+    this.results.addEventListener('scroll', () => {
+      const nearBottom = this.results.scrollTop + this.results.clientHeight >= this.results.scrollHeight - 20;
+      if (nearBottom && this.nextCursor !== null && !this.pendingRequest) this.search(this.nextCursor);
+    });
+    document.addEventListener('click', e => {
+      if (!this.panel.contains(e.target) && e.target !== this.select) this.close();
+    });
+  }
+
+  open() {
+    this.panel.style.display = 'block';
+    this.input.value = '';
+    this.input.focus();
+    this.search();
+  }
+
+  close() {
+    this.panel.style.display = 'none';
+    if (this.pendingRequest) this.pendingRequest.abort();
+  }
+
+  toggle() {
+    if (this.panel.style.display === 'none') this.open();
+    else this.close();
+  }
+
+  async search(cursor = null) {
+    if (this.pendingRequest) this.pendingRequest.abort();
+    const controller = new AbortController();
+    this.pendingRequest = controller;
+
+    const url = new URL(this.url, window.location.origin);
+    const q = this.input.value.trim();
+    if (q) url.searchParams.set('q', q);
+    url.searchParams.set('limit', this.pageSize);
+    url.searchParams.set('format', 'columnar');
+    if (cursor !== null) url.searchParams.set('cursor', cursor);
+
+    try {
+      const response = await fetch(url, { signal: controller.signal });
+      if (!response.ok) throw new Error('Failed to load data');
+      const page = LookupModal.decodePayload(await response.json());
+      this.nextCursor = page.next;
+      this.render(page.results, cursor !== null);
+    } catch (error) {
+      if (error.name !== 'AbortError') console.error('Autocomplete error:', error);
+    } finally {
+      if (this.pendingRequest === controller) this.pendingRequest = null;
+    }
+  }
+
+  render(rows, append) {
+    if (!append) this.results.innerHTML = '';
+    rows.forEach(row => {
+      const entry = document.createElement('li');
+      entry.textContent = AutocompleteSelect.labelFor(this.select, row);
+      entry.addEventListener('click', () => {
+        AutocompleteSelect.setValue(this.select, row.id, AutocompleteSelect.labelFor(this.select, row));
+        this.close();
+      });
+      this.results.appendChild(entry);
+    });
+  }
+
+  // Selects ``id``, adding its option first when the page did not render it
+  static setValue(select, id, label) {
+    let option = Array.from(select.options).find(opt => opt.value === String(id));
+    if (!option) {
+      option = new Option(label, id);
+      select.add(option);
+    }
+    select.value = String(id);
+    select.dispatchEvent(new Event('change'));
+  }
+
+  // Option text for a lookup row, built from the widget's label fields
+  static labelFor(select, row) {
+    const fields = (select.dataset.autocompleteLabel || '').split(',').filter(Boolean);
+    return fields
+      .map(field => row[field])
+      .filter(value => value !== null && value !== undefined && value !== '')
+      .join(' - ');
+  }
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('select[data-autocomplete-url]').forEach(select => new AutocompleteSelect(select));
+});
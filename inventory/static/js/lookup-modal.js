@@ -5,6 +5,22 @@ class LookupModal {
     this.fieldId = options.fieldId;
     this.columns = options.columns;
     this.title = options.title;
+    // Name used by the batched /inventory/lookups endpoint (lookup_<name>)
+    this.lookupName = options.lookup || (this.endpoint.match(/lookup_(\w+)\/?$/) || [])[1];
+    this.preloaded = false;
+    // serverSearch: query the endpoint as the user types instead of
+    // downloading the whole table and filtering it in the browser
+    this.serverSearch = options.serverSearch || false;
+    this.pageSize = options.pageSize || 50;
+    this.debounceMs = options.debounceMs || 250;
+    // deltaSync: keep the list in IndexedDB and fetch only changes since
+    // the last sync token on each open (local mode only)
+    this.deltaSync = options.deltaSync || false;
+    // columnar: ask for the compact {columns, rows, dictionaries} encoding
+    this.columnar = options.columnar !== false;
+    this.nextCursor = null;
+    this.searchTimer = null;
+    this.pendingRequest = null;
     this.data = [];
     this.filteredData = [];
     this.modal = null;
@@ -58,7 +74,27 @@ class LookupModal {
     });
 
     // Search input
-    this.searchInput.addEventListener('input', () => this.filterData());
+    this.searchInput.addEventListener('input', () => {
+      if (!this.serverSearch) {
+        this.filterData();
+        return;
+      }
+      clearTimeout(this.searchTimer);
+      this.searchTimer = setTimeout(async () => {
+        await this.loadData();
+        this.renderTable();
+      }, this.debounceMs);
+    });
+
+    // Fetch the next page when scrolled to the bottom (server search only)
+    const tableContainer = this.modal.querySelector('.lookup-table-container');
+    tableContainer.addEventListener('scroll', async () => {
+      if (!this.serverSearch || this.nextCursor === null || this.pendingRequest) return;
+      if (tableContainer.scrollTop + tableContainer.clientHeight >= tableContainer.scrollHeight - 20) {
+        await this.loadMore();
+        this.renderTable();
+      }
+    });
 
     // Attach to all lookup buttons for this model
     const lookupButtons = document.querySelectorAll(`button[data-lookup-model="${this.model}"]`);
@@ -80,19 +116,199 @@ class LookupModal {
     this.modal.style.display = 'none';
   }
 
-  async loadData() {
+  buildUrl(params) {
+    const url = new URL(this.endpoint, window.location.origin);
+    Object.entries(params).forEach(([key, value]) => {
+      if (value !== null && value !== undefined && value !== '') url.searchParams.set(key, value);
+    });
+    return url;
+  }
+
+  // Turns a columnar payload back into row objects
+  static decodePayload(payload) {
+    // Older endpoints return a bare array
+    if (Array.isArray(payload)) return { results: payload, next: null };
+    if (!payload.columns) return payload;
+
+    const { columns, rows, dictionaries, ...rest } = payload;
+    const lookups = columns.map(col => (dictionaries && dictionaries[col]) || null);
+    const results = rows.map(row => {
+      const item = {};
+      columns.forEach((col, index) => {
+        const value = row[index];
+        item[col] = lookups[index] && value !== null ? lookups[index][value] : value;
+      });
+      return item;
+    });
+    return { ...rest, results: results };
+  }
+
+  async fetchPage(params) {
+    if (this.pendingRequest) this.pendingRequest.abort();
+    const controller = new AbortController();
+    this.pendingRequest = controller;
     try {
-      const response = await fetch(this.endpoint);
+      if (this.columnar) params = { ...params, format: 'columnar' };
+      const response = await fetch(this.buildUrl(params), { signal: controller.signal });
       if (!response.ok) throw new Error('Failed to load data');
-      this.data = await response.json();
+      return LookupModal.decodePayload(await response.json());
+    } finally {
+      if (this.pendingRequest === controller) this.pendingRequest = null;
+    }
+  }
+
+  async fetchAll(params) {
+    // limit=all streams the whole list in one response; follow the cursor
+    // anyway in case the endpoint pages. Sync fields come from the first page.
+    const first = await this.fetchPage({ ...params, limit: 'all' });
+    const results = [...first.results];
+    let cursor = first.next;
+    while (cursor !== null && cursor !== undefined) {
+      const page = await this.fetchPage({ ...params, limit: 500, cursor: cursor });
+      results.push(...page.results);
+      cursor = page.next;
+    }
+    return { ...first, results: results };
+  }
+
+  static openStore() {
+    if (!LookupModal.storePromise) {
+      LookupModal.storePromise = new Promise((resolve, reject) => {
+        const request = indexedDB.open('erp-lookups', 1);
+        request.onupgradeneeded = () => request.result.createObjectStore('snapshots');
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+      });
+    }
+    return LookupModal.storePromise;
+  }
+
+  async readSnapshot() {
+    const db = await LookupModal.openStore();
+    return new Promise((resolve, reject) => {
+      const request = db.transaction('snapshots').objectStore('snapshots').get(this.endpoint);
+      request.onsuccess = () => resolve(request.result || null);
+      request.onerror = () => reject(request.error);
+    });
+  }
+
+  async writeSnapshot(snapshot) {
+    const db = await LookupModal.openStore();
+    return new Promise((resolve, reject) => {
+      const tx = db.transaction('snapshots', 'readwrite');
+      tx.objectStore('snapshots').put(snapshot, this.endpoint);
+      tx.oncomplete = () => resolve();
+      tx.onerror = () => reject(tx.error);
+    });
+  }
+
+  async applyDelta(snapshot, delta) {
+    const rows = new Map();
+    if (snapshot && !delta.reset) snapshot.rows.forEach(row => rows.set(row.id, row));
+    delta.results.forEach(row => rows.set(row.id, row));
+    (delta.deleted || []).forEach(id => rows.delete(id));
+    this.data = [...rows.values()].sort((a, b) => a.id - b.id);
+
+    if (delta.sync_token) {
+      await this.writeSnapshot({ rows: this.data, syncToken: delta.sync_token })
+        .catch(error => console.error('Error saving lookup snapshot:', error));
+    }
+  }
+
+  async syncData() {
+    const snapshot = await this.readSnapshot().catch(() => null);
+    const delta = await this.fetchAll(snapshot ? { since: snapshot.syncToken } : {});
+    await this.applyDelta(snapshot, delta);
+  }
+
+  async applyPayload(payload, snapshot) {
+    if (!payload) return;
+    if (this.serverSearch) {
+      this.data = payload.results;
+      this.nextCursor = payload.next;
+    } else if (this.deltaSync && window.indexedDB) {
+      await this.applyDelta(snapshot, payload);
+    } else {
+      this.data = payload.results;
+    }
+    this.filteredData = [...this.data];
+    this.preloaded = true;
+  }
+
+  // Loads the first view of every modal on a form with one request to the
+  // batched lookup endpoint, so opening a modal needs no round trip.
+  static async preload(modals, endpoint = '/inventory/lookups') {
+    modals = modals.filter(modal => modal.lookupName);
+    if (!modals.length) return;
+
+    const url = new URL(endpoint, window.location.origin);
+    url.searchParams.set('models', [...new Set(modals.map(modal => modal.lookupName))].join(','));
+    url.searchParams.set('limit', 'all');
+    modals.forEach(modal => {
+      url.searchParams.set(`${modal.lookupName}.format`, modal.columnar ? 'columnar' : 'rows');
+    });
+    const snapshots = await Promise.all(modals.map(modal =>
+      modal.deltaSync && window.indexedDB ? modal.readSnapshot().catch(() => null) : null
+    ));
+    modals.forEach((modal, index) => {
+      if (modal.serverSearch) url.searchParams.set(`${modal.lookupName}.limit`, modal.pageSize);
+      if (snapshots[index]) url.searchParams.set(`${modal.lookupName}.since`, snapshots[index].syncToken);
+    });
+
+    try {
+      const response = await fetch(url);
+      if (!response.ok) throw new Error('Failed to preload lookups');
+      const payloads = await response.json();
+      await Promise.all(modals.map((modal, index) =>
+        modal.applyPayload(payloads[modal.lookupName] && LookupModal.decodePayload(payloads[modal.lookupName]), snapshots[index])
+      ));
+    } catch (error) {
+      // Modals fall back to loading on open
+      console.error('Error preloading lookups:', error);
+    }
+  }
+
+  async loadData() {
+    if (this.preloaded) {
+      this.preloaded = false;
+      return;
+    }
+    try {
+      if (this.serverSearch) {
+        const page = await this.fetchPage({ q: this.searchInput.value.trim(), limit: this.pageSize });
+        this.data = page.results;
+        this.nextCursor = page.next;
+      } else if (this.deltaSync && window.indexedDB) {
+        await this.syncData();
+      } else {
+        // Small tables: load everything and filter locally
+        this.data = (await this.fetchAll({})).results;
+      }
       this.filteredData = [...this.data];
     } catch (error) {
+      if (error.name === 'AbortError') return;
       console.error('Error loading lookup data:', error);
       this.data = [];
       this.filteredData = [];
     }
   }
 
+  async loadMore() {
+    try {
+      const page = await this.fetchPage({
+        q: this.searchInput.value.trim(),
+        limit: this.pageSize,
+        cursor: this.nextCursor
+      });
+      this.data.push(...page.results);
+      this.filteredData = [...this.data];
+      this.nextCursor = page.next;
+    } catch (error) {
+      if (error.name === 'AbortError') return;
+      console.error('Error loading lookup data:', error);
+    }
+  }
+
   filterData() {
     const searchTerm = this.searchInput.value.toLowerCase();
     this.filteredData = this.data.filter(item =>
@@ -121,7 +337,11 @@ class LookupModal {
   selectItem(id) {
     const fieldId = this.currentFieldId || this.fieldId;
     const selectElement = document.getElementById(fieldId);
-    if (selectElement) {
+    if (selectElement && selectElement.dataset.autocompleteUrl && typeof AutocompleteSelect !== 'undefined') {
+      // Autocomplete selects only render the selected option
+      const row = this.data.find(item => item.id === id) || { id: id };
+      AutocompleteSelect.setValue(selectElement, id, AutocompleteSelect.labelFor(selectElement, row));
+    } else if (selectElement) {
       selectElement.value = id;
       // Trigger change event if needed
       selectElement.dispatchEvent(new Event('change'));
@@ -0,0 +1,325 @@
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+from heapq import merge
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Min, Sum
+from django.db.models.functions import Coalesce, Greatest, Now
+from django.utils import timezone
+
+from .costing import item_unit_cost
+from .models import CostingRun, CostLayer, IssueTransaction, PendingCost, ReceiptTransaction, StockBalance, StockMovement, StockSnapshot
+
+ZERO = Decimal('0')
+
+
+def _apply_to_balance(item_id, area_id, quantity, value, movement_date):
+    """Adds a movement to the (item, area) balance, creating the row on first use."""
+    changes = {
+        'quantity': F('quantity') + quantity,
+        'value': F('value') + value,
+        'last_movement_date': Greatest(F('last_movement_date'), movement_date),
+        'updated_at': Now(),
+    }
+    balance = StockBalance.objects.filter(item_id=item_id, area_id=area_id)
+    if balance.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            StockBalance.objects.create(
+                item_id=item_id, area_id=area_id, quantity=quantity, value=value, last_movement_date=movement_date
+            )
+    except IntegrityError:
+        # Another transaction created the row first
+        balance.update(**changes)
+
+
+def _apply_to_snapshots(item_id, area_id, quantity, value, movement_date):
+    """Adds a backdated movement to the snapshots already taken on or after its date."""
+    dates = set(
+        StockSnapshot.objects.filter(snapshot_date__gte=movement_date)
+        .values_list('snapshot_date', flat=True).distinct()
+    )
+    if not dates:
+        return
+    snapshots = StockSnapshot.objects.filter(item_id=item_id, area_id=area_id, snapshot_date__gte=movement_date)
+    existing = set(snapshots.values_list('snapshot_date', flat=True))
+    snapshots.update(quantity=F('quantity') + quantity, value=F('value') + value)
+    StockSnapshot.objects.bulk_create(
+        StockSnapshot(snapshot_date=snapshot_date, item_id=item_id, area_id=area_id, quantity=quantity, value=value)
+        for snapshot_date in dates - existing
+    )
+
+
+def record_movement(*, item_id, area_id, movement_date, quantity, value, source_type, source_id, document_no):
+    """
+    Appends one ledger line and updates the matching balance.
+
+    Must run inside the transaction that saves the source document, so the
+    document, its ledger line and the balance commit or roll back together.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        raise transaction.TransactionManagementError("Stock movements must be recorded inside an atomic block.")
+    movement = StockMovement.objects.create(
+        item_id=item_id, area_id=area_id, movement_date=movement_date, quantity=quantity, value=value,
+        source_type=source_type, source_id=source_id, document_no=document_no,
+    )
+    _apply_to_balance(item_id, area_id, quantity, value, movement_date)
+    _apply_to_snapshots(item_id, area_id, quantity, value, movement_date)
+    # Queue the item for the next costing run. The upsert holds the queue row
+    # until this transaction commits, so a costing run waits for the movement.
+    PendingCost.objects.bulk_create(
+        [PendingCost(item_id=item_id, queued_at=timezone.now())],
+        update_conflicts=True, unique_fields=['item'], update_fields=['queued_at'],
+    )
+    return movement
+
+
+def unit_cost(item_id, area_id, default=ZERO):
+    """Average cost of the stock on hand, or ``default`` when there is none."""
+    row = (
+        StockBalance.objects.select_for_update()
+        .filter(item_id=item_id, area_id=area_id, quantity__gt=0)
+        .values_list('quantity', 'value')
+        .first()
+    )
+    if row is None:
+        return default
+    quantity, value = row
+    return value / quantity
+
+
+def post_receipt(receipt):
+    """Records the stock received by a GRN. GRNs without item, area or quantity move no stock."""
+    if not (receipt.item_id and receipt.area_id and receipt.quantity):
+        return None
+    value = receipt.amount if receipt.amount is not None else receipt.quantity * (receipt.rate or ZERO)
+    return record_movement(
+        item_id=receipt.item_id, area_id=receipt.area_id, movement_date=receipt.transaction_date,
+        quantity=receipt.quantity, value=value,
+        source_type='GRN', source_id=receipt.pk, document_no=receipt.transaction_no,
+    )
+
+
+def post_issue(issue):
+    """
+    Records the stock moved by an issue transaction: an Issue takes stock
+    out of the area, a Return brings it back. Valued at the current average
+    cost of the area's stock, falling back to the item's computed cost
+    (costing.item_unit_cost) and then to its std_cost.
+    """
+    if not (issue.item_id and issue.area_id and issue.quantity):
+        return None
+    cost = unit_cost(issue.item_id, issue.area_id, default=None)
+    if cost is None:
+        cost = item_unit_cost(issue.item)
+    quantity = issue.quantity if issue.nature == 'Return' else -issue.quantity
+    return record_movement(
+        item_id=issue.item_id, area_id=issue.area_id, movement_date=issue.date,
+        quantity=quantity, value=(quantity * cost).quantize(Decimal('0.01')),
+        source_type='ISS', source_id=issue.pk, document_no=issue.transaction_no,
+    )
+
+
+def stock_on_hand(item, area):
+    """Quantity of ``item`` on hand in ``area``: one indexed read of StockBalance."""
+    quantity = StockBalance.objects.filter(item=item, area=area).values_list('quantity', flat=True).first()
+    return quantity if quantity is not None else ZERO
+
+
+def _ledger_sources():
+    """GRN and issue lines in posting order: by date, receipts before issues, then by id."""
+    receipts = (
+        ReceiptTransaction.objects.filter(item__isnull=False, quantity__isnull=False)
+        .exclude(quantity=0)
+        .order_by('transaction_date', 'id')
+        .values_list('transaction_date', 'id', 'item_id', 'area_id', 'quantity', 'rate', 'amount', 'transaction_no')
+    )
+    issues = (
+        IssueTransaction.objects.filter(item__isnull=False, area__isnull=False, quantity__isnull=False)
+        .exclude(quantity=0)
+        .order_by('date', 'id')
+        .annotate(fallback_cost=Coalesce('item__cost__average_cost', 'item__std_cost'))
+        .values_list('date', 'id', 'item_id', 'area_id', 'quantity', 'nature', 'fallback_cost', 'transaction_no')
+    )
+    return merge(
+        ((row[0], 0, row) for row in receipts.iterator()),
+        ((row[0], 1, row) for row in issues.iterator()),
+        key=lambda entry: entry[:2] + (entry[2][1],),
+    )
+
+
+def rebuild_ledger(batch_size=5000):
+    """
+    Rebuilds StockMovement and StockBalance from every GRN and issue,
+    valuing issues the way ``post_issue`` does. Used to backfill existing
+    documents and after bulk loads, which bypass the posting functions.
+    Drops all snapshots. Returns the number of movements written.
+    """
+    balances = {}
+    movements = []
+    written = 0
+    with transaction.atomic():
+        # Cost layers point at the old movements; the next costing run is a full one
+        CostLayer.objects.all().delete()
+        CostingRun.objects.all().delete()
+        PendingCost.objects.all().delete()
+        StockMovement.objects.all().delete()
+        StockBalance.objects.all().delete()
+        # Snapshots are derived from the ledger; build_snapshots takes them again
+        StockSnapshot.objects.all().delete()
+        for movement_date, kind, row in _ledger_sources():
+            key = (row[2], row[3])
+            quantity, value, last_date = balances.get(key, (ZERO, ZERO, None))
+            if kind == 0:
+                moved = row[4]
+                moved_value = row[6] if row[6] is not None else moved * (row[5] or ZERO)
+                source_type = 'GRN'
+            else:
+                cost = value / quantity if quantity > 0 else row[6]
+                moved = row[4] if row[5] == 'Return' else -row[4]
+                moved_value = (moved * cost).quantize(Decimal('0.01'))
+                source_type = 'ISS'
+            balances[key] = (quantity + moved, value + moved_value, movement_date)
+            movements.append(StockMovement(
+                item_id=key[0], area_id=key[1], movement_date=movement_date, quantity=moved, value=moved_value,
+                source_type=source_type, source_id=row[1], document_no=row[7],
+            ))
+            if len(movements) >= batch_size:
+                StockMovement.objects.bulk_create(movements)
+                written += len(movements)
+                movements = []
+        StockMovement.objects.bulk_create(movements)
+        written += len(movements)
+        StockBalance.objects.bulk_create(
+            (
+                StockBalance(item_id=item_id, area_id=area_id, quantity=quantity, value=value, last_movement_date=last_date)
+                for (item_id, area_id), (quantity, value, last_date) in balances.items()
+            ),
+            batch_size=batch_size,
+        )
+    return written
+
+
+SNAPSHOT_PERIODS = ('month', 'week')
+
+
+def period_ends(after, until, period='month'):
+    """Last days of the periods ending after ``after`` and on or before ``until``."""
+    if period not in SNAPSHOT_PERIODS:
+        raise ValueError(f"Unknown snapshot period {period!r}")
+    ends = []
+    day = after + timedelta(days=1)
+    while True:
+        if period == 'month':
+            end = date(day.year, day.month, calendar.monthrange(day.year, day.month)[1])
+        else:
+            end = day + timedelta(days=6 - day.weekday())
+        if end > until:
+            return ends
+        ends.append(end)
+        day = end + timedelta(days=1)
+
+
+def _movement_totals(start, end, items=None, areas=None):
+    """Summed movements dated after ``start`` (all history when None) up to ``end``, per (item, area)."""
+    movements = StockMovement.objects.filter(movement_date__lte=end)
+    if start is not None:
+        movements = movements.filter(movement_date__gt=start)
+    if items is not None:
+        movements = movements.filter(item__in=items)
+    if areas is not None:
+        movements = movements.filter(area__in=areas)
+    return movements.values_list('item_id', 'area_id').annotate(Sum('quantity'), Sum('value')).order_by()
+
+
+def build_snapshots(until=None, period='month', batch_size=5000):
+    """
+    Takes a snapshot at the end of every period since the latest one, up
+    to ``until`` (default: the last period that has ended). Each snapshot
+    is the previous one plus the movements in between, so only new
+    history is read. Returns the snapshot dates taken.
+    """
+    until = until or date.today() - timedelta(days=1)
+    latest = StockSnapshot.objects.aggregate(latest=Max('snapshot_date'))['latest']
+    if latest is None:
+        first = StockMovement.objects.aggregate(first=Min('movement_date'))['first']
+        if first is None:
+            return []
+        start = first - timedelta(days=1)
+    else:
+        start = latest
+
+    stock = {
+        (item_id, area_id): (quantity, value)
+        for item_id, area_id, quantity, value in StockSnapshot.objects.filter(snapshot_date=latest)
+        .values_list('item_id', 'area_id', 'quantity', 'value')
+    } if latest else {}
+    taken = []
+    previous = latest
+    for end in period_ends(start, until, period):
+        with transaction.atomic():
+            for item_id, area_id, quantity, value in _movement_totals(previous, end):
+                held_quantity, held_value = stock.get((item_id, area_id), (ZERO, ZERO))
+                stock[(item_id, area_id)] = (held_quantity + quantity, held_value + value)
+            StockSnapshot.objects.bulk_create(
+                (
+                    StockSnapshot(snapshot_date=end, item_id=item_id, area_id=area_id, quantity=quantity, value=value)
+                    for (item_id, area_id), (quantity, value) in stock.items()
+                    if quantity or value
+                ),
+                batch_size=batch_size,
+            )
+        taken.append(end)
+        previous = end
+    return taken
+
+
+def compact_snapshots(before):
+    """
+    Deletes snapshots dated before ``before``, keeping the last one of each
+    year. Returns the number of rows deleted.
+    """
+    dates = (
+        StockSnapshot.objects.filter(snapshot_date__lt=before)
+        .values_list('snapshot_date', flat=True).distinct().order_by('snapshot_date')
+    )
+    year_ends = {}
+    for snapshot_date in dates:
+        year_ends[snapshot_date.year] = snapshot_date
+    deleted, _ = (
+        StockSnapshot.objects.filter(snapshot_date__lt=before)
+        .exclude(snapshot_date__in=year_ends.values())
+        .delete()
+    )
+    return deleted
+
+
+def stock_as_of(as_of, items=None, areas=None):
+    """
+    Stock on hand at the end of ``as_of`` as ``{(item_id, area_id):
+    (quantity, value)}``, optionally limited to some items and areas.
+
+    Starts from the latest snapshot on or before ``as_of`` and adds only the
+    movements dated after it, so the cost grows with the gap since that
+    snapshot rather than with the whole history.
+    """
+    snapshot_date = (
+        StockSnapshot.objects.filter(snapshot_date__lte=as_of)
+        .aggregate(latest=Max('snapshot_date'))['latest']
+    )
+    stock = {}
+    if snapshot_date is not None:
+        snapshots = StockSnapshot.objects.filter(snapshot_date=snapshot_date)
+        if items is not None:
+            snapshots = snapshots.filter(item__in=items)
+        if areas is not None:
+            snapshots = snapshots.filter(area__in=areas)
+        for item_id, area_id, quantity, value in snapshots.values_list('item_id', 'area_id', 'quantity', 'value'):
+            stock[(item_id, area_id)] = (quantity, value)
+    if snapshot_date != as_of:
+        for item_id, area_id, quantity, value in _movement_totals(snapshot_date, as_of, items, areas):
+            held_quantity, held_value = stock.get((item_id, area_id), (ZERO, ZERO))
+            stock[(item_id, area_id)] = (held_quantity + quantity, held_value + value)
+    return {key: totals for key, totals in stock.items() if totals[0] or totals[1]}
@@ -0,0 +1,78 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .columnar import CONTENT_TYPES
+
+# Rows fetched from the database cursor and encoded per yielded chunk
+STREAM_CHUNK_SIZE = 2000
+
+
+def iter_json_array(rows, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yields a JSON array of ``rows`` as encoded bytes, ``chunk_size`` rows at
+    a time, so only one chunk is ever held in memory.
+    """
+    encode = DjangoJSONEncoder().encode
+    yield b'['
+    separator = ''
+    batch = []
+    for row in rows:
+        batch.append(encode(row))
+        if len(batch) >= chunk_size:
+            yield (separator + ', '.join(batch)).encode()
+            separator = ', '
+            batch = []
+    if batch:
+        yield (separator + ', '.join(batch)).encode()
+    yield b']'
+
+
+class _Echo:
+    """File-like object csv.writer writes to, handing back each line."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, header, chunk_size=STREAM_CHUNK_SIZE):
+    """Yields ``header`` and ``rows`` as CSV, ``chunk_size`` lines per encoded chunk."""
+    writer = csv.writer(_Echo())
+    batch = [writer.writerow(header)]
+    for row in rows:
+        batch.append(writer.writerow(row))
+        if len(batch) >= chunk_size:
+            yield ''.join(batch).encode()
+            batch = []
+    if batch:
+        yield ''.join(batch).encode()
+
+
+def streaming_json_response(queryset, fields, chunk_size=STREAM_CHUNK_SIZE, encoder=None, **extra):
+    """
+    Streams ``{"results": [...], **extra}`` for ``queryset.values(*fields)``,
+    or the columnar form (see columnar.py) when a ``ColumnarEncoder`` is
+    given. Dictionaries are only complete after the last row, so they are
+    written after the rows.
+
+    Rows are read with ``QuerySet.iterator(chunk_size=...)`` (a server-side
+    cursor on PostgreSQL) and encoded as they arrive, so worker memory stays
+    flat however many rows there are and the first bytes go out right away.
+    """
+    rows = queryset.values(*fields).iterator(chunk_size=chunk_size)
+    tail = json.dumps(extra, cls=DjangoJSONEncoder)[1:]
+
+    def stream():
+        if encoder is None:
+            yield b'{"results": '
+            yield from iter_json_array(rows, chunk_size)
+        else:
+            yield ('{"columns": ' + json.dumps(encoder.fields) + ', "rows": ').encode()
+            yield from iter_json_array((encoder.encode(row) for row in rows), chunk_size)
+            yield (', "dictionaries": ' + json.dumps(encoder.dictionary_payload(), cls=DjangoJSONEncoder)).encode()
+        yield (', ' + tail if extra else tail).encode()
+
+    content_type = CONTENT_TYPES['rows' if encoder is None else 'columnar']
+    return StreamingHttpResponse(stream(), content_type=content_type)
@@ -0,0 +1,92 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.forms.models import ModelChoiceField
+
+from inventory.autocomplete import AutocompleteSelect
+from inventory.lookup_cache import current_versions
+from inventory.signals import CACHED_LOOKUP_MODELS
+
+register = template.Library()
+
+
+def fragment_cache():
+    return caches[getattr(settings, 'TEMPLATE_FRAGMENT_CACHE_ALIAS', 'default')]
+
+
+def form_fragment_key(form):
+    """
+    Returns a key identifying the rendered markup of an unbound ``form``,
+    or None when it cannot be cached.
+
+    The key covers the form class, its prefix and initial values, and the
+    cache versions of the models its select choices come from. Bound forms
+    (submitted values, errors) and selects over models without a cache
+    version are never cached.
+    """
+    if form.is_bound:
+        return None
+    parts = [f"{type(form).__module__}.{type(form).__qualname__}", str(form.prefix), str(form.auto_id)]
+    models = []
+    for name, field in form.fields.items():
+        parts.append(f"{name}={form.get_initial_for_field(field, name)!r}")
+        if isinstance(field, ModelChoiceField) and not isinstance(field.widget, AutocompleteSelect):
+            if field.queryset.model not in CACHED_LOOKUP_MODELS:
+                return None
+            try:
+                parts.append(str(field.queryset.query))
+            except EmptyResultSet:
+                parts.append('empty')
+            models.append(field.queryset.model)
+    if models:
+        parts.append(repr(current_versions(*models)))
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+class RenderCacheNode(template.Node):
+    def __init__(self, nodelist, name, form):
+        self.nodelist = nodelist
+        self.name = name
+        self.form = form
+
+    def render(self, context):
+        if not getattr(settings, 'RENDER_CACHE', False):
+            return self.nodelist.render(context)
+
+        key = f"fragment:{self.origin.template_name}:{self.name}"
+        if self.form is not None:
+            form_key = form_fragment_key(self.form.resolve(context))
+            if form_key is None:
+                return self.nodelist.render(context)
+            key += f":{form_key}"
+
+        cache = fragment_cache()
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, timeout=None)
+        return content
+
+
+@register.tag
+def rendercache(parser, token):
+    """
+    Caches the enclosed markup until the process restarts::
+
+        {% rendercache sidebar %} ... {% endrendercache %}
+        {% rendercache fields form %} ... {% endrendercache %}
+
+    With a form, the markup is only cached while the form is unbound and is
+    keyed by ``form_fragment_key``. Only wrap markup that depends on nothing
+    but the form. Disabled unless ``settings.RENDER_CACHE`` is on.
+    """
+    bits = token.split_contents()
+    if len(bits) not in (2, 3):
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a fragment name and an optional form")
+    nodelist = parser.parse(('endrendercache',))
+    parser.delete_first_token()
+    form = parser.compile_filter(bits[2]) if len(bits) == 3 else None
+    return RenderCacheNode(nodelist, bits[1], form)
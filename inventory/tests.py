@@ -1,3 +1,888 @@
-from django.test import TestCase
+import json
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import urls
+from .autocomplete import AutocompleteModelChoiceField, AutocompleteSelect
+from .checks import check_lookup_cache
+from .choices import ChoiceCacheMiddleware
+from .columnar import COLUMNAR_CONTENT_TYPE
+from .models import (
+    AreaForm, CostingRun, CostLayer, Customer, DepartmentDefinition, DocumentNumberLease, DocumentSequence, INVcategory, IssueTransaction, ItemDefinition, LotTransaction,
+    Purchase, PurchaseOrder, PurchaseVoucher, ReceiptTransaction, Requisition, StockBalance, StockMovement, StockSnapshot, Supplier,
+)
+from .costing import item_unit_cost, run_costing
+from .hierarchy import ancestors, descendants, rebuild_closure
+from .lookup_cache import current_versions
+from .numbering import BlockAllocator, allocate_numbers, number_gaps
+from .planning import run_planning
+from .purchasevoucher_form import PurchaseVoucherForm
+from .receipttransaction_form import GRNForm
+from .stock import build_snapshots, compact_snapshots, rebuild_ledger, stock_as_of, stock_on_hand
+
+# Rows seeded into every master and document table. Large enough that a
+# select rendering a whole table, or one query per row, blows the budgets.
+SEED_ROWS = 60
+
+# Budgets are (max queries, max response bytes), set with some headroom
+# over the measured values. Raise one only when the increase is expected.
+GET_BUDGETS = {
+    'home_page': (0, 12_000),
+    'area_form': (0, 16_000),
+    'supplier_form': (0, 27_000),
+    'customer_form': (0, 24_000),
+    'purchase_form': (1, 21_000),
+    'department_definition': (1, 14_000),
+    'inv_category': (1, 14_000),
+    'item_definition': (1, 21_000),
+    'requisition_form': (1, 20_000),
+    'purchase_order_form': (0, 34_000),
+    'receipttransaction_form': (0, 28_000),
+    'purchasevoucher_form': (0, 24_000),
+    'lottransaction_form': (1, 25_000),
+    'issuetransaction_form': (0, 23_000),
+    'lookup_cache_stats': (0, 1_000),
+    'reorder_report': (4, 40_000),
+    'item_families': (6, 40_000),
+    'stock_valuation': (3, 40_000),
+}
+
+POST_BUDGETS = {
+    'area_form': (8, 16_000),
+    'supplier_form': (8, 27_000),
+    'customer_form': (8, 24_000),
+    'purchase_form': (5, 21_000),
+    'department_definition': (7, 14_000),
+    'inv_category': (7, 14_000),
+    'item_definition': (11, 22_000),
+    'requisition_form': (11, 20_000),
+    'purchase_order_form': (16, 34_000),
+    'receipttransaction_form': (25, 28_000),
+    'purchasevoucher_form': (10, 24_000),
+    'lottransaction_form': (12, 26_000),
+    'issuetransaction_form': (23, 24_000),
+}
+
+# Lookups are checked for the first page, a search and a delta sync
+LOOKUP_BUDGETS = {
+    'lookup_area': (2, 5_000),
+    'lookup_customer': (2, 7_000),
+    'lookup_department': (2, 3_000),
+    'lookup_inventory_category': (2, 3_000),
+    'lookup_item': (3, 10_000),
+    'lookup_purchase_order': (1, 8_000),
+    'lookup_requisition': (1, 7_000),
+    'lookup_supplier': (2, 10_000),
+    'lookup_batch': (10, 50_000),
+}
+
+# Traces are checked forward from a gray receipt and backward from a challan
+TRACE_BUDGETS = {
+    'lot_trace': (8, 3_000),
+}
+
+
+
+def seed_dataset(rows=SEED_ROWS):
+    areas = AreaForm.objects.bulk_create(
+        AreaForm(areacode=i, area_code=f"AREA-{i:04}", areaname=f"Area {i}") for i in range(1, rows + 1)
+    )
+    suppliers = Supplier.objects.bulk_create(
+        Supplier(supplier_id=i, supplier_code=f"SUP-{i:04}", supplier_name=f"Supplier {i}",
+                 contact_person_name=f"Contact {i}", contact_email=f"supplier{i}@example.com")
+        for i in range(1, rows + 1)
+    )
+    customers = Customer.objects.bulk_create(
+        Customer(customer_code=f"CUST-{i:04}", customer_name=f"Customer {i}", contact_person_name=f"Contact {i}")
+        for i in range(1, rows + 1)
+    )
+    departments = DepartmentDefinition.objects.bulk_create(
+        DepartmentDefinition(name=f"Department {i}") for i in range(1, rows + 1)
+    )
+    categories = INVcategory.objects.bulk_create(INVcategory(name=f"Category {i}") for i in range(1, rows + 1))
+    ItemDefinition.objects.bulk_create(
+        ItemDefinition(item_code=f"ITEM-{i:04}", item_name=f"Item {i}", specification="Standard",
+                       item_category=categories[i % len(categories)], salestax_type='GST',
+                       unit_of_measure='kg', std_cost=Decimal('10.00'))
+        for i in range(1, rows + 1)
+    )
+    requisitions = Requisition.objects.bulk_create(
+        Requisition(doc_number=f"REQ-{i:04}", department=departments[i % len(departments)], requisition_by="Store")
+        for i in range(1, rows + 1)
+    )
+    PurchaseOrder.objects.bulk_create(
+        PurchaseOrder(po_number=f"PO-{i:04}", po_date=date(2026, 1, 1), po_type="Local",
+                      area=areas[i % len(areas)], supplier=suppliers[i % len(suppliers)],
+                      requisition=requisitions[i % len(requisitions)], delivery_at="Main store", order_by="Buyer")
+        for i in range(1, rows + 1)
+    )
+    # Counters as they are once each prefix has been used (numbering.allocate_numbers)
+    DocumentSequence.objects.bulk_create(
+        DocumentSequence(prefix=prefix, last_value=rows)
+        for prefix in ('AREA', 'SUP', 'CUST', 'ITEM', 'REQ', 'PO', 'PV', 'GRN', 'ISS', 'LOT')
+    )
+    return {
+        'area': areas[0], 'supplier': suppliers[0], 'customer': customers[0], 'department': departments[0],
+        'category': categories[0], 'requisition': requisitions[0], 'item': ItemDefinition.objects.first(),
+        'purchase_order': PurchaseOrder.objects.first(),
+    }
+
+
+def valid_post_data(seed, name):
+    """Form data a POST to the view ``name`` saves, referencing rows of ``seed``."""
+    today = date(2026, 1, 15).isoformat()
+    return {
+        'area_form': {'area_name': 'New area', 'status': 'active'},
+        'supplier_form': {
+            'supplier_name': 'New supplier', 'contact_person_name': 'Ali', 'contact_email': 'ali@example.com',
+            'contact_phone': '+92300123456', 'business_type': 'manufacturer', 'city': 'Lahore',
+            'country': 'Pakistan', 'payment_terms': 'net_30', 'currency': 'PKR', 'status': 'active',
+        },
+        'customer_form': {
+            'customer_name': 'New customer', 'customer_type': 'business', 'contact_person_name': 'Sara',
+            'contact_email': 'sara@example.com', 'contact_phone': '+92300123456', 'country': 'Pakistan',
+            'payment_terms': 'net_30', 'currency': 'PKR', 'status': 'active',
+        },
+        'purchase_form': {
+            'supplier': seed['supplier'].pk, 'purchase_date': today, 'total_amount': '100.00',
+            'currency': 'PKR', 'status': 'draft',
+        },
+        'department_definition': {'name': 'New department'},
+        'inv_category': {'name': 'New category'},
+        'item_definition': {
+            'item_name': 'New item', 'item_category': seed['category'].pk, 'salestax_type': 'GST',
+            'unit_of_measure': 'kg', 'std_cost': '12.50',
+        },
+        'requisition_form': {'department': seed['department'].pk, 'requisition_by': 'Store'},
+        'purchase_order_form': {
+            'po_date': today, 'po_type': 'Local', 'area': seed['area'].pk, 'supplier': seed['supplier'].pk,
+            'requisition': seed['requisition'].pk, 'delivery_at': 'Main store', 'order_by': 'Buyer',
+            'lines-TOTAL_FORMS': '1', 'lines-INITIAL_FORMS': '0',
+            'lines-0-item': seed['item'].pk, 'lines-0-quantity': '5', 'lines-0-rate': '10',
+        },
+        'receipttransaction_form': {
+            'transaction_date': today, 'nature': 'Purchase', 'area': seed['area'].pk,
+            'supplier': seed['supplier'].pk, 'po': seed['purchase_order'].pk, 'item': seed['item'].pk,
+            'quantity': '5', 'rate': '10', 'amount': '50', 'grir': 'GRIR-1', 'gpi_status': 'Pending',
+        },
+        'purchasevoucher_form': {
+            'transaction_type': 'Credit', 'transaction_date': today, 'supplier': seed['supplier'].pk,
+            'bill_no': 'B-1', 'st_inv_no': 'ST-1', 'bilty_no': 'BL-1', 'days': 30,
+        },
+        'lottransaction_form': {
+            'date': today, 'customer': seed['customer'].pk, 'gray_receipt_no': 'GR-1', 'dc_no': 'DC-1',
+            'lot_no': 'L-1', 'nature': 'Dyeing', 'start_date': today, 'end_date': today,
+        },
+        'issuetransaction_form': {
+            'date': today, 'nature': 'Issue', 'area': seed['area'].pk, 'department': seed['department'].pk,
+            'customer': seed['customer'].pk, 'lot_no': 'L-1', 'dc_no': 'DC-1', 'material': 'Dye',
+            'item': seed['item'].pk, 'quantity': '2',
+        },
+    }[name]
+
+
+class ViewBudgetTests(TransactionTestCase):
+    """
+    Query-count and response-size budgets for every URL in inventory/urls.py.
+
+    A TransactionTestCase because GRN, lot and issue numbers are leased
+    outside of any transaction (numbering.lease_code). Caches are cleared
+    before each test, so budgets cover the cold path.
+    """
+
+    def setUp(self):
+        for alias in ('lookups', 'template_fragments'):
+            caches[alias].clear()
+        self.seed = seed_dataset()
+
+    # Model a valid POST to each view creates
+    CREATED_MODELS = {
+        'area_form': AreaForm,
+        'supplier_form': Supplier,
+        'customer_form': Customer,
+        'purchase_form': Purchase,
+        'department_definition': DepartmentDefinition,
+        'inv_category': INVcategory,
+        'item_definition': ItemDefinition,
+        'requisition_form': Requisition,
+        'purchase_order_form': PurchaseOrder,
+        'receipttransaction_form': ReceiptTransaction,
+        'purchasevoucher_form': PurchaseVoucher,
+        'lottransaction_form': LotTransaction,
+        'issuetransaction_form': IssueTransaction,
+    }
+
+    # Lookups without delta sync: their models have no updated_at
+    UNSYNCED_LOOKUPS = ('lookup_purchase_order', 'lookup_requisition')
+
+    def request(self, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, len(queries), len(content)
+
+    def assertWithinBudget(self, label, budget, queries, size):
+        max_queries, max_bytes = budget
+        self.assertLessEqual(queries, max_queries, f"{label} ran {queries} queries (budget {max_queries})")
+        self.assertLessEqual(size, max_bytes, f"{label} returned {size} bytes (budget {max_bytes})")
+
+    def test_every_url_has_a_budget(self):
+        budgeted = set(GET_BUDGETS) | set(LOOKUP_BUDGETS) | set(TRACE_BUDGETS)
+        for pattern in urls.urlpatterns:
+            with self.subTest(url=pattern.name):
+                self.assertIn(pattern.name, budgeted)
+
+    def test_get(self):
+        for name, budget in GET_BUDGETS.items():
+            with self.subTest(url=name):
+                response, queries, size = self.request('get', reverse(name))
+                self.assertEqual(response.status_code, 200)
+                self.assertWithinBudget(f"GET {name}", budget, queries, size)
+
+    def test_valid_post(self):
+        for name, budget in POST_BUDGETS.items():
+            with self.subTest(url=name):
+                model = self.CREATED_MODELS[name]
+                count = model.objects.count()
+                response, queries, size = self.request('post', reverse(name), data=valid_post_data(self.seed, name))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(model.objects.count(), count + 1, f"POST {name} did not save")
+                self.assertWithinBudget(f"POST {name}", budget, queries, size)
+
+    def test_lookups(self):
+        params = [{}, {'q': '1'}, {'since': '2026-01-01T00:00:00+00:00'}]
+        for name, budget in LOOKUP_BUDGETS.items():
+            for query in params:
+                if name in self.UNSYNCED_LOOKUPS and 'since' in query:
+                    continue
+                if name == 'lookup_batch':
+                    models = 'area,customer,department,inventory_category,item,supplier'
+                    query = dict(query, models=models if 'since' in query else f'{models},purchase_order,requisition')
+                with self.subTest(url=name, params=query):
+                    response, queries, size = self.request('get', reverse(name), data=query)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertWithinBudget(f"GET {name} {query}", budget, queries, size)
+
+    def test_since_on_unsynced_lookup_is_rejected(self):
+        # Without delta sync the full list would pass for an empty delta
+        for name in self.UNSYNCED_LOOKUPS:
+            with self.subTest(url=name):
+                response = self.client.get(reverse(name), data={'since': '2026-01-01T00:00:00+00:00'})
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('lookup_batch'), data={'models': 'area,requisition', 'since': '1767225600'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_trace(self):
+        # The last issue goes out on a challan numbered like the inbound one of L-7
+        for name, data in (('lottransaction_form', {'gray_receipt_no': 'GR-7', 'lot_no': 'L-7', 'dc_no': 'DC-IN-7'}),
+                           ('issuetransaction_form', {'lot_no': 'L-7', 'dc_no': 'DC-OUT-7'}),
+                           ('issuetransaction_form', {'lot_no': 'L-8', 'dc_no': 'DC-IN-7'})):
+            self.client.post(reverse(name), data=dict(valid_post_data(self.seed, name), **data))
+
+        traces = {
+            'forward': ({'kind': 'gray_receipt', 'key': 'GR-7'}, ['gray_receipt', 'lot_doc', 'lot', 'issue', 'dc_out']),
+            'backward': ({'kind': 'dc_out', 'key': 'DC-OUT-7', 'direction': 'backward'},
+                         ['dc_out', 'issue', 'lot', 'lot_doc', 'dc_in', 'gray_receipt']),
+            'shared challan number': ({'kind': 'lot', 'key': 'L-8'}, ['lot', 'issue', 'dc_out']),
+        }
+        for direction, (query, kinds) in traces.items():
+            with self.subTest(direction=direction):
+                response, queries, size = self.request('get', reverse('lot_trace'), data=query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([node['kind'] for node in response.json()['nodes']], kinds)
+                self.assertWithinBudget(f"GET lot_trace {query}", TRACE_BUDGETS['lot_trace'], queries, size)
+
+    def test_purchase_order_lines(self):
+        # A 60-line order is one post and the same queries as a one-line order
+        items = list(ItemDefinition.objects.order_by('pk')[:3])
+        data = valid_post_data(self.seed, 'purchase_order_form')
+        data['lines-TOTAL_FORMS'] = '61'
+        for i in range(60):
+            data.update({
+                f'lines-{i}-item': items[i % 3].pk, f'lines-{i}-quantity': '2', f'lines-{i}-rate': '1.50',
+                f'lines-{i}-sales_tax': '0.50', f'lines-{i}-discount': '',
+            })
+        response, queries, size = self.request('post', reverse('purchase_order_form'), data=data)
+        self.assertContains(response, 'successfully created with 60 line(s)')
+        self.assertWithinBudget("POST purchase_order_form (60 lines)", POST_BUDGETS['purchase_order_form'], queries, size)
+
+        order = PurchaseOrder.objects.latest('pk')
+        self.assertEqual(list(order.lines.order_by('line_no').values_list('line_no', flat=True)), list(range(1, 61)))
+        self.assertEqual(
+            (order.quantity, order.rate, order.amount, order.sales_tax, order.discount, order.freight),
+            (Decimal('120.00'), None, Decimal('180.00'), Decimal('30.00'), Decimal('0.00'), Decimal('0.00')),
+        )
+
+        # Amounts and totals the columns cannot hold are form errors, not database errors
+        count = PurchaseOrder.objects.count()
+        data = valid_post_data(self.seed, 'purchase_order_form')
+        data.update({'lines-0-quantity': '9999999', 'lines-0-rate': '99999'})
+        self.assertContains(self.client.post(reverse('purchase_order_form'), data=data), 'too large for one line')
+        data = valid_post_data(self.seed, 'purchase_order_form')
+        data['lines-TOTAL_FORMS'] = '60'
+        for i in range(60):
+            data.update({f'lines-{i}-item': items[0].pk, f'lines-{i}-quantity': '2000000', f'lines-{i}-rate': '1'})
+        self.assertContains(self.client.post(reverse('purchase_order_form'), data=data), 'The order total quantity is too large')
+        self.assertEqual(PurchaseOrder.objects.count(), count)
+
+        # An order needs at least one line
+        data = valid_post_data(self.seed, 'purchase_order_form')
+        data.update({'lines-0-item': '', 'lines-0-quantity': '', 'lines-0-rate': ''})
+        count = PurchaseOrder.objects.count()
+        self.assertContains(self.client.post(reverse('purchase_order_form'), data=data), 'Please correct the errors')
+        self.assertEqual(PurchaseOrder.objects.count(), count)
+
+    def test_ranked_lookups_search_every_field(self):
+        # Supplier search ranks on the name but still matches contact details
+        response = self.client.get(reverse('lookup_supplier'), {'q': 'supplier3@example.com'})
+        self.assertEqual([row['supplier_name'] for row in response.json()['results']], ['Supplier 3'])
+        category = self.seed['item'].item_category
+        response = self.client.get(reverse('lookup_item'), {'q': category.name})
+        self.assertIn(self.seed['item'].pk, [row['id'] for row in response.json()['results']])
+
+    def test_lookup_pages_are_bounded(self):
+        # A full page must not grow with the table: seed more rows, same budget
+        seed_more = SEED_ROWS * 3
+        ItemDefinition.objects.bulk_create(
+            ItemDefinition(item_code=f"ITEM-X{i:04}", item_name=f"Extra item {i}", item_category=self.seed['category'],
+                           salestax_type='GST', unit_of_measure='kg', std_cost=Decimal('1.00'))
+            for i in range(seed_more)
+        )
+        response, queries, size = self.request('get', reverse('lookup_item'))
+        self.assertWithinBudget("GET lookup_item (large table)", LOOKUP_BUDGETS['lookup_item'], queries, size)
+
+
+class StockLedgerTests(TransactionTestCase):
+    """GRN and issue posting keeps StockMovement and StockBalance in step."""
+
+    def setUp(self):
+        caches['lookups'].clear()
+        self.seed = seed_dataset(rows=3)
+
+    def post(self, name, **data):
+        base = valid_post_data(self.seed, name)
+        response = self.client.post(reverse(name), data=dict(base, **data))
+        self.assertContains(response, 'successfully created')
+
+    def test_receipts_and_issues_move_stock(self):
+        item, area = self.seed['item'], self.seed['area']
+        self.post('receipttransaction_form', quantity='10', rate='4', amount='40')
+        self.post('receipttransaction_form', quantity='10', rate='6', amount='60')
+        self.post('issuetransaction_form', quantity='5')
+        self.post('issuetransaction_form', quantity='1', nature='Return')
+
+        self.assertEqual(stock_on_hand(item, area), Decimal('16'))
+        balance = StockBalance.objects.get(item=item, area=area)
+        # Issues and returns are valued at the average cost (5.00) when posted
+        self.assertEqual(balance.value, Decimal('80.00'))
+        self.assertEqual(
+            list(StockMovement.objects.order_by('id').values_list('source_type', 'quantity')),
+            [('GRN', Decimal('10')), ('GRN', Decimal('10')), ('ISS', Decimal('-5')), ('ISS', Decimal('1'))],
+        )
+
+        # Replaying the documents gives the same ledger
+        self.assertEqual(rebuild_ledger(), 4)
+        rebuilt = StockBalance.objects.get(item=item, area=area)
+        self.assertEqual((rebuilt.quantity, rebuilt.value), (balance.quantity, balance.value))
+
+    def test_documents_without_item_move_no_stock(self):
+        self.post('issuetransaction_form', item='', quantity='')
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertEqual(stock_on_hand(self.seed['item'], self.seed['area']), 0)
+
+    def test_stock_as_of_matches_history(self):
+        item, area = self.seed['item'], self.seed['area']
+        key = (item.pk, area.pk)
+        for day, quantity in (('2026-01-10', '10'), ('2026-02-10', '6'), ('2026-03-10', '4')):
+            self.post('receipttransaction_form', transaction_date=day, quantity=quantity, rate='1', amount=quantity)
+        self.post('issuetransaction_form', date='2026-02-20', quantity='3')
+
+        self.assertEqual(build_snapshots(until=date(2026, 3, 31)), [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31)])
+        self.assertEqual(build_snapshots(until=date(2026, 3, 31)), [])
+        expected = {'2026-01-09': None, '2026-01-31': '10', '2026-02-25': '13', '2026-03-10': '17'}
+        for as_of, quantity in expected.items():
+            with self.subTest(as_of=as_of):
+                stock = stock_as_of(date.fromisoformat(as_of), items=[item])
+                self.assertEqual(stock.get(key, (None,))[0], quantity and Decimal(quantity))
+
+        # A backdated receipt is added to the snapshots taken after its date
+        self.post('receipttransaction_form', transaction_date='2026-01-05', quantity='2', rate='1', amount='2')
+        self.assertEqual(
+            list(StockSnapshot.objects.filter(item=item, area=area).order_by('snapshot_date').values_list('quantity', flat=True)),
+            [Decimal('12'), Decimal('15'), Decimal('19')],
+        )
+        self.assertEqual(stock_as_of(date(2026, 4, 1))[key][0], stock_on_hand(item, area))
+
+        self.assertEqual(compact_snapshots(date(2026, 3, 1)), 1)
+        self.assertEqual(stock_as_of(date(2026, 2, 25))[key][0], Decimal('15'))
+
+    def test_costing(self):
+        item, area = self.seed['item'], self.seed['area']
+        other = ItemDefinition.objects.exclude(pk=item.pk).first()
+        self.assertEqual(item_unit_cost(item), item.std_cost)
+
+        self.post('receipttransaction_form', transaction_date='2026-01-01', quantity='10', rate='4', amount='40')
+        self.post('receipttransaction_form', transaction_date='2026-01-02', quantity='10', rate='6', amount='60')
+        self.post('issuetransaction_form', date='2026-01-03', quantity='12')
+        self.post('issuetransaction_form', date='2026-01-04', quantity='1', nature='Return')
+        run = run_costing()
+        self.assertEqual((run.mode, run.items_costed), ('full', 1))
+
+        # 11 issued net: the first layer is used up, 9 of the second remain
+        self.assertEqual(
+            list(CostLayer.objects.filter(item=item).values_list('remaining_quantity', 'unit_cost')),
+            [(Decimal('9.00'), Decimal('6.0000'))],
+        )
+        self.assertEqual(item.cost.on_hand_quantity, Decimal('9.00'))
+        self.assertEqual(item.cost.fifo_value, Decimal('54.00'))
+        self.assertEqual(item_unit_cost(item), Decimal('5.0000'))
+        self.assertEqual(item_unit_cost(item, 'fifo'), Decimal('6.0000'))
+
+        # Only items with new movements are recomputed
+        self.post('receipttransaction_form', item=other.pk, quantity='2', rate='3', amount='6')
+        run = run_costing()
+        self.assertEqual((run.mode, run.items_costed), ('incremental', 1))
+        self.assertEqual(item_unit_cost(other, 'fifo'), Decimal('3.0000'))
+        self.assertEqual(ItemDefinition.objects.get(pk=item.pk).cost.fifo_value, Decimal('54.00'))
+
+        # Items are queued by their movements, not found by movement id: a
+        # movement numbered below the last run's high-water mark is still costed
+        CostingRun.objects.update(last_movement_id=10 ** 9)
+        self.post('receipttransaction_form', item=other.pk, quantity='2', rate='5', amount='10')
+        run = run_costing()
+        self.assertEqual((run.mode, run.items_costed), ('incremental', 1))
+        self.assertEqual(item_unit_cost(other), Decimal('4.0000'))
+        self.assertEqual(run_costing().items_costed, 0)
+
+    def test_reorder_planning(self):
+        item, other = self.seed['item'], ItemDefinition.objects.exclude(pk=self.seed['item'].pk).first()
+        # Received 6 days after the PO date; 30 in stock, 2 a day issued over the last 10 days
+        self.post('receipttransaction_form', transaction_date='2026-01-07', quantity='30', rate='1', amount='30')
+        self.post('receipttransaction_form', item=other.pk, transaction_date='2026-01-07', quantity='500', rate='1', amount='500')
+        for day in range(1, 11):
+            self.post('issuetransaction_form', date=f'2026-02-{day:02}', quantity='2')
+            self.post('issuetransaction_form', item=other.pk, date=f'2026-02-{day:02}', quantity='2')
+        # Received after the run date: neither the stock nor the lead time of a backdated run
+        po = self.seed['purchase_order']
+        self.post('receipttransaction_form', transaction_date='2026-03-31', quantity='100', rate='1', amount='100', po=po.pk)
+
+        run = run_planning(as_of=date(2026, 2, 10), window_days=10, service_factor=1.65, department=self.seed['department'])
+        # 10 on hand against a reorder point of 2/day * 6 days (steady use: no safety stock)
+        suggestion = run.suggestions.get()
+        self.assertEqual(suggestion.item, item)
+        self.assertEqual((suggestion.on_hand, suggestion.lead_time_days), (Decimal('10.00'), Decimal('6.00')))
+        self.assertEqual((suggestion.safety_stock, suggestion.reorder_point), (Decimal('0.00'), Decimal('12.00')))
+        self.assertEqual(suggestion.suggested_quantity, Decimal('62'))
+        self.assertEqual(run.requisition.requisition_by, "Reorder planning")
+        self.assertEqual(run.as_of, date(2026, 2, 10))
+
+        response = self.client.get(reverse('reorder_report'), data={'run': run.pk})
+        self.assertContains(response, item.item_code)
+        self.assertNotContains(response, other.item_code)
+        self.assertContains(response, "Backdated run")
+
+    def test_reorder_report_defaults_to_todays_run(self):
+        current = run_planning()
+        backdated = run_planning(as_of=date(2026, 2, 10))
+        self.assertEqual(current.as_of, timezone.localdate())
+        # The backdated run is newer but shows only when asked for
+        response = self.client.get(reverse('reorder_report'))
+        self.assertEqual(response.context['run'], current)
+        self.assertNotContains(response, "Backdated run")
+        current.delete()
+        response = self.client.get(reverse('reorder_report'))
+        self.assertIsNone(response.context['run'])
+        self.assertEqual(self.client.get(reverse('reorder_report'), data={'run': backdated.pk}).context['run'], backdated)
+
+    def test_stock_valuation(self):
+        item, area = self.seed['item'], self.seed['area']
+        category = item.item_category
+        self.post('receipttransaction_form', transaction_date='2026-01-10', quantity='10', rate='4', amount='40')
+        self.post('issuetransaction_form', date='2026-02-10', quantity='4')
+        build_snapshots(until=date(2026, 1, 31))
+
+        def rows(**params):
+            response = self.client.get(reverse('stock_valuation'), dict(params, format='csv'))
+            self.assertEqual(response['Content-Type'], 'text/csv')
+            return [line.split(',') for line in b''.join(response.streaming_content).decode().splitlines()[1:]]
+
+        self.assertEqual(rows(), [[str(category.pk), category.name, str(area.pk), area.areaname, '1', '6.00', '24.00']])
+        # Month-end close reads the snapshot plus the movements after it
+        self.assertEqual(rows(as_of='2026-01-31')[0][-2:], ['10.00', '40.00'])
+        self.assertEqual(rows(as_of='2026-02-28')[0][-2:], ['6.00', '24.00'])
+        self.assertEqual(rows(as_of='2026-01-09'), [])
+        self.assertEqual(
+            rows(level='items', category=category.pk, area=area.pk),
+            [[category.name, area.areaname, item.item_code, item.item_name, item.unit_of_measure, '6.00', '24.00']],
+        )
+
+        response = self.client.get(reverse('stock_valuation'), {'level': 'items'})
+        self.assertContains(response, item.item_code)
+        self.assertEqual(self.client.get(reverse('stock_valuation'), {'as_of': '2026-02-30'}).status_code, 400)
+
+    def test_item_families(self):
+        # The seeded items were bulk created, without closure rows
+        rebuild_closure()
+        base = self.seed['item']
+        variant = ItemDefinition.objects.create(
+            item_code='ITEM-V1', item_name='Variant', base_item=base, item_category=base.item_category,
+            salestax_type='GST', unit_of_measure='kg', std_cost=Decimal('1.00'),
+        )
+        sub_variant = ItemDefinition.objects.create(
+            item_code='ITEM-V2', item_name='Sub-variant', base_item=variant, item_category=base.item_category,
+            salestax_type='GST', unit_of_measure='kg', std_cost=Decimal('1.00'),
+        )
+        self.assertEqual(list(descendants(base).order_by('item_code')), [variant, sub_variant])
+        self.assertEqual(list(ancestors(sub_variant)), [variant, base])
+
+        # Moving a variant moves its own variants with it
+        sub_variant.base_item = None
+        sub_variant.save()
+        variant.base_item = sub_variant
+        variant.save()
+        self.assertEqual(list(ancestors(variant)), [sub_variant])
+        self.assertEqual(list(descendants(base)), [])
+        # A cycle is refused before the row is written
+        sub_variant.base_item = variant
+        with self.assertRaises(ValueError):
+            sub_variant.save()
+        self.assertIsNone(ItemDefinition.objects.get(pk=sub_variant.pk).base_item_id)
+        with self.assertRaises(ValidationError):
+            sub_variant.full_clean()
+
+        sub_variant.base_item = base
+        sub_variant.save()
+        self.assertEqual(list(ancestors(variant)), [sub_variant, base])
+
+        for item, quantity in ((base, '5'), (variant, '7'), (sub_variant, '11')):
+            self.post('receipttransaction_form', item=item.pk, quantity=quantity, rate='1', amount=quantity,
+                      transaction_date=date.today().isoformat())
+        response = self.client.get(reverse('item_families'))
+        row = next(row for row in response.context['rows'] if row['item'] == base)
+        self.assertEqual((row['variants'], row['on_hand']), (2, Decimal('23.00')))
+
+
+class NumberingTests(TransactionTestCase):
+    """Document numbers are handed out once each, without holes."""
+
+    def test_allocate_numbers_reserves_consecutive_blocks(self):
+        DocumentSequence.objects.create(prefix='TST', last_value=0)
+        blocks = [(count, allocate_numbers('TST', count)) for count in (3, 1, 2, 1)]
+        numbers = [number for count, last in blocks for number in range(last - count + 1, last + 1)]
+        self.assertEqual(numbers, list(range(1, 8)))
+        with self.assertRaises(ValueError):
+            allocate_numbers('TST', 0)
+
+    def test_allocate_numbers_seeds_from_model(self):
+        area = AreaForm.objects.create(areacode=1, area_code='AREA-0001', areaname='Area 1')
+        self.assertEqual(allocate_numbers('NEW', model=AreaForm), area.pk + 1)
+
+    def test_supplier_numbers_pass_hand_entered_ids(self):
+        # Supplier ids used to be typed in, so they can be far above the row ids
+        seed = seed_dataset(rows=3)
+        Supplier.objects.filter(pk=seed['supplier'].pk).update(supplier_id=500)
+        DocumentSequence.objects.filter(prefix='SUP').delete()
+        for expected in (501, 502):
+            response = self.client.post(reverse('supplier_form'), data=valid_post_data(seed, 'supplier_form'))
+            self.assertIsNone(response.context['errors'])
+            self.assertEqual(Supplier.objects.latest('id').supplier_id, expected)
+
+    @override_settings(DOCUMENT_NUMBER_BLOCK_SIZES={'TST': 3})
+    def test_block_allocators_never_share_or_skip_numbers(self):
+        # Two workers and a direct allocation interleaved on one prefix
+        first, second = BlockAllocator(), BlockAllocator()
+        numbers = []
+        for _ in range(4):
+            numbers += [first.next_number('TST'), second.next_number('TST')]
+        numbers.append(allocate_numbers('TST'))
+        self.assertEqual(len(numbers), len(set(numbers)))
+
+        leases = DocumentNumberLease.objects.filter(prefix='TST').values_list('first_value', 'last_value')
+        leased = [number for low, high in leases for number in range(low, high + 1)]
+        self.assertEqual(sorted(leased + numbers[-1:]), list(range(1, numbers[-1] + 1)))
+        self.assertTrue(set(numbers[:-1]) <= set(leased))
+
+    @override_settings(DOCUMENT_NUMBER_BLOCK_SIZES={'AREA': 5})
+    def test_number_gaps_leave_out_the_live_tail(self):
+        allocator = BlockAllocator()
+
+        def use(count, skip=()):
+            for _ in range(count):
+                number = allocator.next_number('AREA')
+                if number not in skip:
+                    AreaForm.objects.create(areacode=number, area_code=f"AREA-{number:04}", areaname=f"Area {number}")
+
+        use(3, skip={2})
+        self.assertEqual(number_gaps(AreaForm, 'AREA', 'area_code'), [(2, 2)])
+        self.assertEqual(number_gaps(AreaForm, 'AREA', 'area_code', include_live=True), [(2, 2), (4, 5)])
+
+        # Once the worker leases its next block, the unused end of the first is a gap
+        use(3, skip={4, 5})
+        self.assertEqual(number_gaps(AreaForm, 'AREA', 'area_code'), [(2, 2), (4, 5)])
+        self.assertEqual(number_gaps(AreaForm, 'AREA', 'area_code', include_live=True), [(2, 2), (4, 5), (7, 10)])
+
+
+class ConditionalLookupTests(TransactionTestCase):
+    """Lookups answer a revalidation of an unchanged list with 304 and no body."""
+
+    # A versioned-cache lookup and a lookup_condition one
+    LOOKUPS = ('lookup_area', 'lookup_item')
+
+    def setUp(self):
+        caches['lookups'].clear()
+        self.seed = seed_dataset(rows=3)
+
+    def test_if_none_match(self):
+        for name in self.LOOKUPS:
+            with self.subTest(url=name):
+                etag = self.client.get(reverse(name))['ETag']
+                response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_if_modified_since(self):
+        for name in self.LOOKUPS:
+            with self.subTest(url=name):
+                last_modified = self.client.get(reverse(name))['Last-Modified']
+                response = self.client.get(reverse(name), HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+
+@override_settings(RENDER_CACHE=True)
+class RenderCacheTests(TransactionTestCase):
+    """Unbound form markup is served from the fragment cache until its choices change."""
+
+    def setUp(self):
+        for alias in ('lookups', 'template_fragments'):
+            caches[alias].clear()
+        self.seed = seed_dataset(rows=3)
+
+    def get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('purchasevoucher_form'))
+        return response, len(queries)
+
+    def test_unbound_form_is_cached_until_choices_change(self):
+        supplier = self.seed['supplier']
+        first, cold_queries = self.get()
+        self.assertContains(first, supplier.supplier_name)
+        second, warm_queries = self.get()
+        self.assertContains(second, supplier.supplier_name)
+        # The supplier choices come with the cached markup
+        self.assertLess(warm_queries, cold_queries)
+
+        supplier.supplier_name = 'Renamed Supplier'
+        supplier.save()
+        third, _ = self.get()
+        self.assertContains(third, 'Renamed Supplier')
+
+    def test_bound_form_is_never_cached(self):
+        self.get()
+        other = Supplier.objects.exclude(pk=self.seed['supplier'].pk).first()
+        data = dict(valid_post_data(self.seed, 'purchasevoucher_form'), supplier=other.pk, transaction_date='')
+        for _ in range(2):
+            response = self.client.post(reverse('purchasevoucher_form'), data=data)
+            self.assertContains(response, f'value="{other.pk}" selected')
+            self.assertEqual(response.context['form'].errors.keys(), {'transaction_date'})
+        self.assertNotContains(self.get()[0], f'value="{other.pk}" selected')
+
+
+class InstrumentationTests(TransactionTestCase):
+    """Every response reports its query count and timings in Server-Timing."""
+
+    def setUp(self):
+        caches['template_fragments'].clear()
+        self.seed = seed_dataset(rows=3)
+
+    def test_server_timing_counts_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('reorder_report'))
+        self.assertGreater(len(queries), 0)
+        timings = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertRegex(timings['db'], rf'^dur=[0-9.]+;desc="{len(queries)} queries"$')
+        self.assertRegex(timings['tpl'], r'^dur=[0-9.]+$')
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=1)
+    def test_sampled_request_is_logged(self):
+        with self.assertLogs('inventory.instrumentation', 'INFO') as logs, CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('reorder_report'))
+        line = json.loads(logs.records[0].getMessage())
+        self.assertGreater(line['queries'], 0)
+        self.assertEqual((line['view'], line['status'], line['queries']), ('reorder_report', 200, len(queries)))
+
+
+class SharedChoicesTests(TransactionTestCase):
+    """Forms of one request share their select choices; later requests see saved rows."""
+
+    def setUp(self):
+        caches['lookups'].clear()
+        self.seed = seed_dataset(rows=3)
+
+    def render_supplier_selects(self, forms=1):
+        """Renders the supplier select of ``forms`` voucher forms in one request; returns (markup, queries)."""
+        rendered = {}
+
+        def view(request):
+            with CaptureQueriesContext(connection) as queries:
+                rendered['markup'] = ''.join(
+                    str(PurchaseVoucherForm(prefix=f'voucher{index}')['supplier']) for index in range(forms)
+                )
+            rendered['queries'] = len(queries)
+            return HttpResponse()
+
+        ChoiceCacheMiddleware(view)(RequestFactory().get('/'))
+        return rendered['markup'], rendered['queries']
+
+    @override_settings(SHARED_CHOICE_CACHE=False)
+    def test_forms_in_one_request_share_one_query(self):
+        markup, queries = self.render_supplier_selects(forms=2)
+        self.assertEqual(queries, 1)
+        self.assertEqual(markup.count(self.seed['supplier'].supplier_name), 2)
+
+    @override_settings(SHARED_CHOICE_CACHE=True)
+    def test_saved_row_reaches_the_next_request(self):
+        self.assertEqual(self.render_supplier_selects()[1], 1)
+        self.assertEqual(self.render_supplier_selects()[1], 0)
+        Supplier.objects.create(supplier_id=900, supplier_code='SUP-0900', supplier_name='Newly Added Supplier')
+        markup, queries = self.render_supplier_selects()
+        self.assertIn('Newly Added Supplier', markup)
+        self.assertEqual(queries, 1)
+
+
+class LookupCacheTests(TransactionTestCase):
+    """The versioned lookup cache serves fresh payloads after master-data changes."""
+
+    def setUp(self):
+        caches['lookups'].clear()
+
+    def area_names(self):
+        return [row['areaname'] for row in self.client.get(reverse('lookup_area')).json()['results']]
+
+    def test_save_serves_fresh_list(self):
+        area = AreaForm.objects.create(areacode=1, area_code='AREA-0001', areaname='North')
+        self.assertEqual(self.area_names(), ['North'])
+        version = current_versions(AreaForm)
+        area.areaname = 'South'
+        area.save()
+        self.assertNotEqual(current_versions(AreaForm), version)
+        self.assertEqual(self.area_names(), ['South'])
+
+    def test_delete_serves_fresh_list(self):
+        area = AreaForm.objects.create(areacode=1, area_code='AREA-0001', areaname='North')
+        self.assertEqual(self.area_names(), ['North'])
+        version = current_versions(AreaForm)
+        area.delete()
+        self.assertNotEqual(current_versions(AreaForm), version)
+        self.assertEqual(self.area_names(), [])
+
+    def test_per_process_cache_must_expire(self):
+        local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'check'}
+        with override_settings(CACHES={'default': local, 'lookups': dict(local, TIMEOUT=None)}, LOOKUP_CACHE_ALIAS='lookups'):
+            self.assertEqual([message.id for message in check_lookup_cache(None)], ['inventory.E001'])
+        with override_settings(CACHES={'default': local, 'lookups': dict(local, TIMEOUT=30)}, LOOKUP_CACHE_ALIAS='lookups'):
+            self.assertEqual(check_lookup_cache(None), [])
+
+
+class DeltaSyncTests(TransactionTestCase):
+    """A sync token brings back only what changed since it was issued."""
+
+    @override_settings(LOOKUP_SYNC_OVERLAP_SECONDS=0)
+    def test_since_returns_changes_and_tombstones(self):
+        north, east, west = (
+            AreaForm.objects.create(areacode=number, area_code=f"AREA-{number:04}", areaname=name)
+            for number, name in ((1, 'North'), (2, 'East'), (3, 'West'))
+        )
+        token = self.client.get(reverse('lookup_area')).json()['sync_token']
+
+        north.areaname = 'Far North'
+        north.save()
+        south = AreaForm.objects.create(areacode=4, area_code='AREA-0004', areaname='South')
+        west_pk = west.pk
+        west.delete()
+
+        payload = self.client.get(reverse('lookup_area'), data={'since': token}).json()
+        self.assertEqual([row['id'] for row in payload['results']], [north.pk, south.pk])
+        self.assertEqual(payload['deleted'], [west_pk])
+        self.assertNotIn('reset', payload)
+
+
+class LookupFormatTests(TransactionTestCase):
+    """Lookups answer in the wire format asked for, labelled with its media type."""
+
+    def setUp(self):
+        caches['lookups'].clear()
+        self.seed = seed_dataset(rows=3)
+
+    def test_columnar_content_type(self):
+        # Cached (twice: miss, then hit), streamed and conditional lookups alike
+        for name, query in (('lookup_area', {}), ('lookup_area', {}), ('lookup_area', {'limit': 'all'}),
+                            ('lookup_item', {}), ('lookup_item', {'q': 'Item'})):
+            for wire_format, content_type in (('columnar', COLUMNAR_CONTENT_TYPE), ('rows', 'application/json')):
+                with self.subTest(url=name, params=query, format=wire_format):
+                    response = self.client.get(reverse(name), data=dict(query, format=wire_format))
+                    self.assertEqual(response['Content-Type'], content_type)
+                    self.assertIn('Accept', response['Vary'])
+
+    def test_columnar_round_trips_to_rows(self):
+        def decode(payload):
+            dictionaries = payload['dictionaries']
+            return [
+                {column: dictionaries[column][value] if column in dictionaries and value is not None else value
+                 for column, value in zip(payload['columns'], row)}
+                for row in payload['rows']
+            ]
+
+        for query in ({}, {'limit': 'all'}, {'q': 'Item'}):
+            with self.subTest(params=query):
+                rows = json.loads(b''.join(self.client.get(reverse('lookup_item'), data=query)))['results']
+                columnar = json.loads(b''.join(self.client.get(reverse('lookup_item'), data=dict(query, format='columnar'))))
+                self.assertTrue(rows)
+                self.assertTrue(columnar['dictionaries'])
+                self.assertEqual(decode(columnar), rows)
+
+    def test_not_modified_varies_on_accept(self):
+        for name in ('lookup_area', 'lookup_item'):
+            with self.subTest(url=name):
+                etag = self.client.get(reverse(name), HTTP_ACCEPT=COLUMNAR_CONTENT_TYPE)['ETag']
+                response = self.client.get(reverse(name), HTTP_ACCEPT=COLUMNAR_CONTENT_TYPE, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertIn('Accept', response['Vary'])
+
+
+class AutocompleteFieldTests(TransactionTestCase):
+    """Autocomplete fields accept only rows of their queryset, whatever the browser submits."""
+
+    def test_grn_form_fetches_each_related_table_once(self):
+        # Area, supplier, item, and the one order behind po, client_po and gpo
+        seed = seed_dataset(rows=3)
+        order = seed['purchase_order'].pk
+        data = dict(valid_post_data(seed, 'receipttransaction_form'), client_po=order, gpo=order)
+        form = GRNForm(data)
+        with self.assertNumQueries(4):
+            self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['gpo'], seed['purchase_order'])
+
+    def test_rejects_pks_outside_queryset(self):
+        active, inactive = (
+            AreaForm.objects.create(areacode=number, area_code=f"AREA-{number:04}", areaname=f"Area {number}", status=status)
+            for number, status in ((1, 'active'), (2, 'inactive'))
+        )
+        field = AutocompleteModelChoiceField(
+            queryset=AreaForm.objects.filter(status='active'), widget=AutocompleteSelect('area', ['area_code'])
+        )
+        # A prefetched map does not widen the queryset either
+        field.prefetched = {str(active.pk): active}
+        self.assertEqual(field.clean(str(active.pk)), active)
+        for value in (str(inactive.pk), '999999', 'x'):
+            with self.subTest(value=value), self.assertRaises(ValidationError):
+                field.clean(value)
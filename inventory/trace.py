@@ -0,0 +1,143 @@
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import IssueTransaction, LotTransaction, TraceEdge
+
+# Node kinds. Documents are keyed by their number, the rest by the free-text value.
+# Challans received with the gray cloth and challans the goods go out on are
+# numbered by different parties, so they are kinds of their own: a shared
+# number must not join an inbound chain to an unrelated outbound one.
+GRAY_RECEIPT = 'gray_receipt'
+INBOUND_CHALLAN = 'dc_in'
+LOT_DOCUMENT = 'lot_doc'
+LOT = 'lot'
+ISSUE = 'issue'
+OUTBOUND_CHALLAN = 'dc_out'
+NODE_KINDS = (GRAY_RECEIPT, INBOUND_CHALLAN, LOT_DOCUMENT, LOT, ISSUE, OUTBOUND_CHALLAN)
+
+# Deepest trace followed; a chain is gray receipt -> lot doc -> lot -> issue -> dc_out
+MAX_DEPTH = 8
+
+
+def lot_edges(lot):
+    """Edges of a lot transaction: its gray receipt and inbound challan feed the document, which makes the lot."""
+    return [
+        (GRAY_RECEIPT, lot.gray_receipt_no, LOT_DOCUMENT, lot.doc_no),
+        (INBOUND_CHALLAN, lot.dc_no, LOT_DOCUMENT, lot.doc_no),
+        (LOT_DOCUMENT, lot.doc_no, LOT, lot.lot_no),
+    ]
+
+
+def issue_edges(issue):
+    """Edges of an issue transaction: material issued against a lot, sent out on an outbound challan."""
+    return [
+        (LOT, issue.lot_no, ISSUE, issue.transaction_no),
+        (ISSUE, issue.transaction_no, OUTBOUND_CHALLAN, issue.dc_no),
+    ]
+
+
+def _document_node(instance):
+    if isinstance(instance, LotTransaction):
+        return LOT_DOCUMENT, instance.doc_no
+    return ISSUE, instance.transaction_no
+
+
+def unlink_document(instance):
+    kind, key = _document_node(instance)
+    TraceEdge.objects.filter(Q(src_kind=kind, src_key=key) | Q(dst_kind=kind, dst_key=key)).delete()
+
+
+def link_document(instance):
+    """Replaces the trace edges of a saved lot or issue transaction."""
+    unlink_document(instance)
+    edges = lot_edges(instance) if isinstance(instance, LotTransaction) else issue_edges(instance)
+    TraceEdge.objects.bulk_create(
+        TraceEdge(src_kind=src_kind, src_key=src_key, dst_kind=dst_kind, dst_key=dst_key)
+        for src_kind, src_key, dst_kind, dst_key in edges
+        if src_key and dst_key
+    )
+
+
+# One INSERT ... SELECT per edge type, mirroring lot_edges and issue_edges
+REBUILD_SQL = [
+    ("SELECT %s, gray_receipt_no, %s, doc_no FROM {lot} WHERE gray_receipt_no <> ''", [GRAY_RECEIPT, LOT_DOCUMENT]),
+    ("SELECT %s, dc_no, %s, doc_no FROM {lot} WHERE dc_no <> ''", [INBOUND_CHALLAN, LOT_DOCUMENT]),
+    ("SELECT %s, doc_no, %s, lot_no FROM {lot} WHERE lot_no <> ''", [LOT_DOCUMENT, LOT]),
+    ("SELECT %s, lot_no, %s, transaction_no FROM {issue} WHERE lot_no <> ''", [LOT, ISSUE]),
+    ("SELECT %s, transaction_no, %s, dc_no FROM {issue} WHERE dc_no <> ''", [ISSUE, OUTBOUND_CHALLAN]),
+]
+
+
+def rebuild_edges():
+    """Rebuilds every trace edge from the lot and issue transactions. Returns the number of edges."""
+    tables = {'lot': LotTransaction._meta.db_table, 'issue': IssueTransaction._meta.db_table}
+    insert = f"INSERT INTO {TraceEdge._meta.db_table} (src_kind, src_key, dst_kind, dst_key) "
+    with transaction.atomic(), connection.cursor() as cursor:
+        TraceEdge.objects.all().delete()
+        for select, params in REBUILD_SQL:
+            cursor.execute(insert + select.format(**tables), params)
+    return TraceEdge.objects.count()
+
+
+def trace(kind, key, direction='forward', max_depth=MAX_DEPTH):
+    """
+    Follows the trace edges from one node, downstream (``forward``: gray
+    receipt to lots, issues and challans) or upstream (``backward``).
+
+    Runs one indexed query per level, so the cost follows the size of the
+    trace, not of the tables. Returns ``{'nodes': [...], 'edges': [...]}``;
+    each node has its kind, key and depth, and lot documents and issues
+    also carry their document details.
+    """
+    if kind not in NODE_KINDS:
+        raise ValueError(f"Unknown node kind {kind!r}")
+    if direction not in ('forward', 'backward'):
+        raise ValueError(f"Unknown direction {direction!r}")
+    near, far = ('src', 'dst') if direction == 'forward' else ('dst', 'src')
+
+    depths = {(kind, key): 0}
+    edges = []
+    frontier = [(kind, key)]
+    for depth in range(1, max_depth + 1):
+        if not frontier:
+            break
+        by_kind = defaultdict(list)
+        for node_kind, node_key in frontier:
+            by_kind[node_kind].append(node_key)
+        condition = Q()
+        for node_kind, keys in by_kind.items():
+            condition |= Q(**{f'{near}_kind': node_kind, f'{near}_key__in': keys})
+        frontier = []
+        rows = TraceEdge.objects.filter(condition).values_list('src_kind', 'src_key', 'dst_kind', 'dst_key')
+        for src_kind, src_key, dst_kind, dst_key in rows:
+            edges.append({'from': [src_kind, src_key], 'to': [dst_kind, dst_key]})
+            node = (dst_kind, dst_key) if direction == 'forward' else (src_kind, src_key)
+            if node not in depths:
+                depths[node] = depth
+                frontier.append(node)
+
+    return {'nodes': _describe(depths), 'edges': edges}
+
+
+def _describe(depths):
+    """Node dicts in depth order, with the details of lot and issue documents."""
+    keys = defaultdict(list)
+    for node_kind, node_key in depths:
+        keys[node_kind].append(node_key)
+    details = {}
+    if keys[LOT_DOCUMENT]:
+        for doc_no, date, nature, customer in LotTransaction.objects.filter(doc_no__in=keys[LOT_DOCUMENT]).values_list(
+            'doc_no', 'date', 'nature', 'customer__customer_name'
+        ):
+            details[(LOT_DOCUMENT, doc_no)] = {'date': date.isoformat(), 'nature': nature, 'customer': customer}
+    if keys[ISSUE]:
+        for transaction_no, date, nature, material, item in IssueTransaction.objects.filter(
+            transaction_no__in=keys[ISSUE]
+        ).values_list('transaction_no', 'date', 'nature', 'material', 'item__item_name'):
+            details[(ISSUE, transaction_no)] = {'date': date.isoformat(), 'nature': nature, 'material': material, 'item': item}
+    return [
+        {'kind': node_kind, 'key': node_key, 'depth': depth, **details.get((node_kind, node_key), {})}
+        for (node_kind, node_key), depth in sorted(depths.items(), key=lambda entry: (entry[1], entry[0]))
+    ]
@@ -43,4 +43,13 @@ urlpatterns = [
     path("lookup_customer/", views.lookup_customer, name="lookup_customer"),
     path("lookup_department/", views.lookup_department, name="lookup_department"),
     path("lookup_inventory_category/", views.lookup_inventory_category, name="lookup_inventory_category"),
+    path("lookups", views.lookup_batch, name="lookup_batch"),
+    path("lookup_cache_stats/", views.lookup_cache_stats, name="lookup_cache_stats"),
+
+    path("reorder_report/", views.reorder_report, name="reorder_report"),
+    path("item_families/", views.item_families, name="item_families"),
+    # ?as_of=YYYY-MM-DD&level=summary|items&category=&area=&format=html|csv
+    path("stock_valuation/", views.stock_valuation, name="stock_valuation"),
+    # Lot traceability: ?kind=&key=&direction=
+    path("trace/", views.lot_trace, name="lot_trace"),
 ]
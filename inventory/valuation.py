@@ -0,0 +1,118 @@
+from django.db import connection
+from django.db.models import Max
+
+from .models import AreaForm, INVcategory, ItemDefinition, StockBalance, StockMovement, StockSnapshot
+from .streaming import STREAM_CHUNK_SIZE
+
+SUMMARY = 'summary'
+ITEMS = 'items'
+LEVELS = (SUMMARY, ITEMS)
+
+# Column headings of each level, in the order valuation_rows yields them
+COLUMNS = {
+    SUMMARY: ['category_id', 'category', 'area_id', 'area', 'items', 'quantity', 'value'],
+    ITEMS: ['category', 'area', 'item_code', 'item_name', 'unit', 'quantity', 'value'],
+}
+
+# Stock on hand now: the running balances
+BALANCE_SQL = "SELECT item_id, area_id, quantity, value FROM {balance} WHERE quantity <> 0 OR value <> 0"
+
+# Stock on hand at a past date: the latest snapshot before it plus the
+# movements since, the same arithmetic as stock.stock_as_of
+AS_OF_SQL = """
+SELECT item_id, area_id, SUM(quantity) AS quantity, SUM(value) AS value
+FROM ({sources}) sources
+GROUP BY item_id, area_id
+HAVING SUM(quantity) <> 0 OR SUM(value) <> 0
+"""
+SNAPSHOT_SOURCE = "SELECT item_id, area_id, quantity, value FROM {snapshot} WHERE snapshot_date = %s"
+MOVEMENT_SOURCE = "SELECT item_id, area_id, quantity, value FROM {movement} WHERE movement_date <= %s"
+
+SUMMARY_SQL = """
+SELECT c.id, c.name, a.id, a.areaname, COUNT(*), SUM(s.quantity), SUM(s.value)
+FROM ({stock}) s
+JOIN {item} i ON i.id = s.item_id
+JOIN {category} c ON c.id = i.item_category_id
+JOIN {area} a ON a.id = s.area_id
+WHERE {where}
+GROUP BY c.id, c.name, a.id, a.areaname
+ORDER BY c.name, c.id, a.areaname, a.id
+"""
+
+ITEMS_SQL = """
+SELECT c.name, a.areaname, i.item_code, i.item_name, i.unit_of_measure, s.quantity, s.value
+FROM ({stock}) s
+JOIN {item} i ON i.id = s.item_id
+JOIN {category} c ON c.id = i.item_category_id
+JOIN {area} a ON a.id = s.area_id
+WHERE {where}
+ORDER BY c.name, a.areaname, i.item_code
+"""
+
+
+def _tables():
+    return {
+        'balance': StockBalance._meta.db_table,
+        'snapshot': StockSnapshot._meta.db_table,
+        'movement': StockMovement._meta.db_table,
+        'item': ItemDefinition._meta.db_table,
+        'category': INVcategory._meta.db_table,
+        'area': AreaForm._meta.db_table,
+    }
+
+
+def _stock_sql(as_of):
+    """The (item_id, area_id, quantity, value) subquery of stock on hand at ``as_of`` (now when None)."""
+    tables = _tables()
+    if as_of is None:
+        return BALANCE_SQL.format(**tables), []
+    snapshot_date = (
+        StockSnapshot.objects.filter(snapshot_date__lte=as_of)
+        .aggregate(latest=Max('snapshot_date'))['latest']
+    )
+    if snapshot_date is None:
+        sources, params = MOVEMENT_SOURCE, [as_of]
+    else:
+        sources = f"{SNAPSHOT_SOURCE} UNION ALL {MOVEMENT_SOURCE} AND movement_date > %s"
+        params = [snapshot_date, as_of, snapshot_date]
+    return AS_OF_SQL.format(sources=sources.format(**tables)), params
+
+
+def valuation_query(level=SUMMARY, as_of=None, category=None, area=None):
+    """
+    The SQL and parameters of the stock valuation at ``as_of`` (the
+    current balances when None), per category and area or, at the
+    ``items`` level, per item and area; optionally limited to one
+    category and one area. The value is the ledger value of the stock,
+    its quantity at the cost it was posted at.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Unknown valuation level {level!r}")
+    stock, params = _stock_sql(as_of)
+    conditions = ['1 = 1']
+    if category is not None:
+        conditions.append('c.id = %s')
+        params.append(category)
+    if area is not None:
+        conditions.append('a.id = %s')
+        params.append(area)
+    sql = SUMMARY_SQL if level == SUMMARY else ITEMS_SQL
+    return sql.format(stock=stock, where=' AND '.join(conditions), **_tables()), params
+
+
+def valuation_rows(level=SUMMARY, as_of=None, category=None, area=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yields the rows of ``valuation_query`` as tuples of COLUMNS[level].
+
+    Reads through a server-side cursor where the database has them
+    (connection.chunked_cursor), ``chunk_size`` rows at a time, so a
+    valuation of any size is never held in memory at once.
+    """
+    sql, params = valuation_query(level, as_of, category, area)
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
@@ -1,6 +1,17 @@
+from datetime import timedelta
+from decimal import Decimal
+from itertools import chain
+from urllib.parse import urlencode
+
 from django.shortcuts import render, get_object_or_404, redirect, get_list_or_404
-from django.db import IntegrityError
-from django.http import JsonResponse, HttpResponse, HttpResponseRedirect, HttpResponseForbidden
+from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.core.paginator import Paginator
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.http import JsonResponse, HttpResponse, HttpResponseRedirect, HttpResponseForbidden, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_date
+from django.utils.html import format_html
 from .area_definition import Area
 from .supplier_form import SupplierForm
 from .customer_form import CustomerForm
@@ -11,14 +22,21 @@ from .department_definition import Department
 from .item_definition_form import ItemDefinitionForm
 from .models import AreaForm, Supplier, Customer, Purchase, DepartmentDefinition, Requisition, PurchaseOrder
 from .requisition_form import RequisitionForm
-from .purchase_order_form import PurchaseOrderForm
+from .purchase_order_form import PurchaseOrderForm, PurchaseOrderLineFormSet
 from .receipttransaction_form import GRNForm
 from .purchasevoucher_form import PurchaseVoucherForm
 from .lottransaction_form import LotTransactionForm
 from .issuetransaction_form import IssueTransactionForm
-from sqlite3 import IntegrityError
-from .utils import generate_code
-from .models import ItemDefinition, ReceiptTransaction, IssueTransaction, LotTransaction, PurchaseVoucher
+from .numbering import allocate_code, allocate_numbers, format_code, highest, lease_code
+from .models import ItemDefinition, ReceiptTransaction, IssueTransaction, LotTransaction, PurchaseVoucher, INVcategory, PlanningRun
+from .lookups import batch_lookup_response, lookup_condition, lookup_response
+from .lookup_cache import cache_stats, cached_lookup
+from .stock import post_issue, post_receipt
+from .trace import NODE_KINDS, trace
+from .hierarchy import roll_up
+from .streaming import iter_csv
+from .valuation import COLUMNS, ITEMS, LEVELS, SUMMARY, valuation_rows
+from .models import PurchaseOrderLine, StockBalance, StockMovement
 
 def area_form(request):
     if request.method == 'POST':
@@ -34,24 +52,21 @@ def area_form(request):
             
             
             try:
-                if not area_code:
-                    area_code = generate_code(AreaForm, 'AREA', 'area_code')
-                area = AreaForm.objects.create(areacode=area_code, areaname=area_name, area_description=area_description, status=status)
+                with transaction.atomic():
+                    number = allocate_numbers('AREA', model=AreaForm, seed=highest('id', 'areacode'))
+                    area = AreaForm.objects.create(areacode=number, area_code=format_code('AREA', number), areaname=area_name, area_description=area_description, status=status)
                 form = Area()
                 message = f"Area {area_name} successfully created. "
             except AreaForm.DoesNotExist:
                 error = "Something went wrong. Area not found."
                 
                 
-            except Exception as e:
+            except IntegrityError:
                 taken_area = AreaForm.objects.get(areacode=area_code)
                 error = f"The area code was taken for {taken_area.areaname}"
           
     else:
-        initial_data = {}
-        next_code = generate_code(AreaForm, 'AREA', 'area_code')
-        initial_data['area_code'] = next_code
-        form = Area(initial=initial_data)
+        form = Area()
         message = None
         error = None
 
@@ -71,12 +86,7 @@ def home(request):
 
 
 def supplier_form(request):
-    initial_data = {}
-    if request.method == "GET":
-        next_code = generate_code(Supplier, 'SUP', 'supplier_code')
-        initial_data['supplier_code'] = next_code
-        
-    form = SupplierForm(initial=initial_data)
+    form = SupplierForm()
     message = None
     error = None
     if request.method == "POST":
@@ -85,7 +95,6 @@ def supplier_form(request):
         ntn_number = form.cleaned_data['ntn_number']
         try:
             supplier = Supplier(
-                supplier_id=form.cleaned_data['supplier_id'],
                 supplier_name=form.cleaned_data['supplier_name'],
                 contact_person_name=form.cleaned_data['contact_person_name'],
                 contact_email=form.cleaned_data['contact_email'],
@@ -100,12 +109,14 @@ def supplier_form(request):
                 status=form.cleaned_data['status'],
                 is_preferred=form.cleaned_data['is_preferred']
             )
-            if not supplier.supplier_code:
-                supplier.supplier_code = generate_code(Supplier, 'SUP', 'supplier_code')
-            supplier.save()
+            with transaction.atomic():
+                number = allocate_numbers('SUP', model=Supplier, seed=highest('id', 'supplier_id'))
+                supplier.supplier_id = number
+                supplier.supplier_code = format_code('SUP', number)
+                supplier.save()
             form = SupplierForm()  # Reset form after successful save
             message = f"Supplier {supplier.supplier_name} successfully created."
-        except Exception as e:
+        except IntegrityError:
             error = "Supplier with this ID already exists."
             
 
@@ -117,12 +128,7 @@ def supplier_form(request):
         
         
 def customer_form(request):
-    initial_data = {}
-    if request.method == "GET":
-        next_code = generate_code(Customer, 'CUST', 'customer_code')
-        initial_data['customer_code'] = next_code
-
-    form = CustomerModelForm(initial=initial_data)
+    form = CustomerModelForm()
     message = None
     error = None
     if request.method == "POST":
@@ -130,9 +136,9 @@ def customer_form(request):
         if form.is_valid():
             # Process the valid form data using ModelForm's save method
             customer = form.save(commit=False)
-            if not customer.customer_code:
-                customer.customer_code = generate_code(Customer, 'CUST', 'customer_code')
-            customer.save()
+            with transaction.atomic():
+                customer.customer_code = allocate_code(Customer, 'CUST')
+                customer.save()
             form = CustomerModelForm()  # Reset form after successful save
             message = f"Customer {customer.customer_name} successfully created."
         else:
@@ -209,19 +215,17 @@ def inventory_category(request):
 
 
 def item_definition_form(request):
-    initial_data = {}
-    if request.method == "GET":
-        next_code = generate_code(ItemDefinition, 'ITEM', 'item_code')
-        initial_data['item_code'] = next_code
-        
-    form = ItemDefinitionForm(initial=initial_data)
+    form = ItemDefinitionForm()
     message = None
     error = None
     if request.method == "POST":
         form = ItemDefinitionForm(request.POST)
         if form.is_valid():
             # Process the valid form data using ModelForm's save method
-            item = form.save()
+            item = form.save(commit=False)
+            with transaction.atomic():
+                item.item_code = allocate_code(ItemDefinition, 'ITEM')
+                item.save()
             form = ItemDefinitionForm()  # Reset form after successful save
             message = f"Item {item.item_name} successfully created."
         else:
@@ -234,18 +238,16 @@ def item_definition_form(request):
     })
 
 def requisition_form(request):
-    initial_data = {}
-    if request.method == "GET":
-        next_code = generate_code(Requisition, 'REQ', 'doc_number')
-        initial_data['doc_number'] = next_code
-        
-    form = RequisitionForm(initial=initial_data)
+    form = RequisitionForm()
     message = None
     error = None
     if request.method == "POST":
         form = RequisitionForm(request.POST)
         if form.is_valid():
-            requisition = form.save()
+            requisition = form.save(commit=False)
+            with transaction.atomic():
+                requisition.doc_number = allocate_code(Requisition, 'REQ')
+                requisition.save()
             form = RequisitionForm()
             message = f"Requisition {requisition.doc_number} successfully created."
         else:
@@ -258,42 +260,46 @@ def requisition_form(request):
     })
 
 def purchase_order_form(request):
-    initial_data = {}
-    if request.method == "GET":
-        next_code = generate_code(PurchaseOrder, 'PO', 'po_number')
-        initial_data['po_number'] = next_code
-        
-    form = PurchaseOrderForm(initial=initial_data)
+    form = PurchaseOrderForm()
+    lines = PurchaseOrderLineFormSet(instance=PurchaseOrder())
     message = None
     error = None
     if request.method == "POST":
         form = PurchaseOrderForm(request.POST)
-        if form.is_valid():
-            purchase_order = form.save()
+        lines = PurchaseOrderLineFormSet(request.POST, instance=PurchaseOrder())
+        # Both are validated, so the lines show their errors alongside the header's
+        if all([form.is_valid(), lines.is_valid()]):
+            purchase_order = form.save(commit=False)
+            order_lines = lines.build_lines(purchase_order)
+            with transaction.atomic():
+                purchase_order.po_number = allocate_code(PurchaseOrder, 'PO')
+                purchase_order.save()
+                PurchaseOrderLine.objects.bulk_create(order_lines)
             form = PurchaseOrderForm()
-            message = f"Purchase Order {purchase_order.po_number} successfully created."
+            lines = PurchaseOrderLineFormSet(instance=PurchaseOrder())
+            message = f"Purchase Order {purchase_order.po_number} successfully created with {len(order_lines)} line(s)."
         else:
             error = "Please correct the errors below."
 
     return render(request, "purchase_order_form.html", {
         "form": form,
+        "lines": lines,
         "message": message,
         "errors": error,
     })
 
 def receipttransaction_form(request):
-    initial_data = {}
-    if request.method == "GET":
-        next_code = generate_code(ReceiptTransaction, 'GRN', 'transaction_no')
-        initial_data['transaction_no'] = next_code
-        
-    form = GRNForm(initial=initial_data)
+    form = GRNForm()
     message = None
     error = None
     if request.method == "POST":
         form = GRNForm(request.POST)
         if form.is_valid():
-            receipt = form.save()
+            receipt = form.save(commit=False)
+            receipt.transaction_no = lease_code(ReceiptTransaction, 'GRN')
+            with transaction.atomic():
+                receipt.save()
+                post_receipt(receipt)
             form = GRNForm()
             message = f"Receipt Transaction {receipt.transaction_no} successfully created."
         else:
@@ -306,18 +312,16 @@ def receipttransaction_form(request):
     })
 
 def purchasevoucher_form(request):
-    initial_data = {}
-    if request.method == "GET":
-        next_code = generate_code(PurchaseVoucher, 'PV', 'transaction_no')
-        initial_data['transaction_no'] = next_code
-        
-    form = PurchaseVoucherForm(initial=initial_data)
+    form = PurchaseVoucherForm()
     message = None
     error = None
     if request.method == "POST":
         form = PurchaseVoucherForm(request.POST)
         if form.is_valid():
-            voucher = form.save()
+            voucher = form.save(commit=False)
+            with transaction.atomic():
+                voucher.transaction_no = allocate_code(PurchaseVoucher, 'PV')
+                voucher.save()
             form = PurchaseVoucherForm()
             message = f"Purchase Voucher {voucher.transaction_no} successfully created."
         else:
@@ -330,18 +334,17 @@ def purchasevoucher_form(request):
     })
 
 def lottransaction_form(request):
-    initial_data = {}
-    if request.method == "GET":
-        next_code = generate_code(LotTransaction, 'LOT', 'doc_no')
-        initial_data['doc_no'] = next_code
-        
-    form = LotTransactionForm(initial=initial_data)
+    form = LotTransactionForm()
     message = None
     error = None
     if request.method == "POST":
         form = LotTransactionForm(request.POST)
         if form.is_valid():
-            lot = form.save()
+            lot = form.save(commit=False)
+            lot.doc_no = lease_code(LotTransaction, 'LOT')
+            with transaction.atomic():
+                # Trace edges are written by post_save in the same transaction
+                lot.save()
             form = LotTransactionForm()
             message = f"Lot Transaction {lot.doc_no} successfully created."
         else:
@@ -354,18 +357,17 @@ def lottransaction_form(request):
     })
 
 def issuetransaction_form(request):
-    initial_data = {}
-    if request.method == "GET":
-        next_code = generate_code(IssueTransaction, 'ISS', 'transaction_no')
-        initial_data['transaction_no'] = next_code
-        
-    form = IssueTransactionForm(initial=initial_data)
+    form = IssueTransactionForm()
     message = None
     error = None
     if request.method == "POST":
         form = IssueTransactionForm(request.POST)
         if form.is_valid():
-            issue = form.save()
+            issue = form.save(commit=False)
+            issue.transaction_no = lease_code(IssueTransaction, 'ISS')
+            with transaction.atomic():
+                issue.save()
+                post_issue(issue)
             form = IssueTransactionForm()
             message = f"Issue Transaction {issue.transaction_no} successfully created."
         else:
@@ -379,91 +381,303 @@ def issuetransaction_form(request):
 
 
 # Lookup views for search functionality
+# All lookups accept ?q=, ?limit= and ?cursor=; those over models with updated_at
+# also accept ?since= for delta sync (see lookups.lookup_response).
+# Master-data lookups are served from the versioned lookup cache (cached_lookup);
+# the others with updated_at still answer conditional GETs (lookup_condition).
+@cached_lookup(Supplier)
 def lookup_supplier(request):
     """Return supplier data for lookup modal"""
-    suppliers = Supplier.objects.all().values(
-        'id', 
-        'supplier_name', 
-        'contact_person_name', 
-        'contact_email', 
-        'contact_phone'
+    return lookup_response(
+        request,
+        Supplier.objects.all(),
+        fields=('id', 'supplier_name', 'contact_person_name', 'contact_email', 'contact_phone'),
+        search_fields=('supplier_name', 'contact_person_name', 'contact_email', 'contact_phone'),
+        ranked_fields=('supplier_name',),
+        since_fields=('updated_at',),
     )
-    return JsonResponse(list(suppliers), safe=False)
 
 
 def lookup_requisition(request):
     """Return requisition data for lookup modal"""
-    requisitions = Requisition.objects.select_related('department').all()
-    data = [{
-        'id': req.id,
-        'doc_number': req.doc_number,
-        'requisition_by': req.requisition_by,
-        'department_name': req.department.name
-    } for req in requisitions]
-    return JsonResponse(data, safe=False)
+    return lookup_response(
+        request,
+        Requisition.objects.annotate(department_name=F('department__name')),
+        fields=('id', 'doc_number', 'requisition_by', 'department_name'),
+        search_fields=('doc_number', 'requisition_by', 'department__name'),
+        dictionary_fields=('department_name',),
+    )
 
 
+@cached_lookup(AreaForm)
 def lookup_area(request):
     """Return area data for lookup modal"""
-    areas = AreaForm.objects.all().values(
-        'id',
-        'areacode',
-        'areaname',
-        'area_description'
+    return lookup_response(
+        request,
+        AreaForm.objects.all(),
+        fields=('id', 'areacode', 'areaname', 'area_description'),
+        search_fields=('area_code', 'areaname', 'area_description'),
+        since_fields=('updated_at',),
     )
-    return JsonResponse(list(areas), safe=False)
 
 
+@lookup_condition(ItemDefinition, INVcategory)
 def lookup_item(request):
     """Return item data for lookup modal"""
-    from .models import ItemDefinition
-    items = ItemDefinition.objects.select_related('item_category').all().values(
-        'id',
-        'item_code',
-        'item_name',
-        'specification',
-        'unit_of_measure',
-        'item_category__name'
+    return lookup_response(
+        request,
+        ItemDefinition.objects.all(),
+        fields=('id', 'item_code', 'item_name', 'specification', 'unit_of_measure', 'item_category__name'),
+        search_fields=('item_code', 'item_name', 'specification', 'item_category__name'),
+        ranked_fields=('item_name', 'item_code'),
+        since_fields=('updated_at', 'item_category__updated_at'),
+        dictionary_fields=('unit_of_measure', 'item_category__name'),
     )
-    return JsonResponse(list(items), safe=False)
 
 
 def lookup_purchase_order(request):
     """Return purchase order data for lookup modal"""
-    pos = PurchaseOrder.objects.select_related('supplier', 'requisition').all().values(
-        'id',
-        'po_number',
-        'supplier__supplier_name',
-        'requisition__doc_number'
+    return lookup_response(
+        request,
+        PurchaseOrder.objects.all(),
+        fields=('id', 'po_number', 'supplier__supplier_name', 'requisition__doc_number'),
+        search_fields=('po_number', 'supplier__supplier_name', 'requisition__doc_number'),
+        dictionary_fields=('supplier__supplier_name',),
     )
-    return JsonResponse(list(pos), safe=False)
 
 
+@cached_lookup(Customer)
 def lookup_customer(request):
     """Return customer data for lookup modal"""
-    customers = Customer.objects.all().values(
-        'id',
-        'customer_name',
-        'contact_person_name',
-        'contact_phone'
+    return lookup_response(
+        request,
+        Customer.objects.all(),
+        fields=('id', 'customer_name', 'contact_person_name', 'contact_phone'),
+        search_fields=('customer_name', 'contact_person_name', 'contact_phone'),
+        ranked_fields=('customer_name',),
+        since_fields=('updated_at',),
     )
-    return JsonResponse(list(customers), safe=False)
 
 
+@cached_lookup(DepartmentDefinition)
 def lookup_department(request):
     """Return department data for lookup modal"""
-    departments = DepartmentDefinition.objects.all().values(
-        'id',
-        'name',
-        'description'
+    return lookup_response(
+        request,
+        DepartmentDefinition.objects.all(),
+        fields=('id', 'name'),
+        search_fields=('name',),
+        since_fields=('updated_at',),
     )
-    return JsonResponse(list(departments), safe=False)
 
 
+@cached_lookup(INVcategory)
 def lookup_inventory_category(request):
     """Return inventory category data for lookup modal"""
-    categories = INVCategory.objects.all().values(
-        'id',
-        'name'
+    return lookup_response(
+        request,
+        INVcategory.objects.all(),
+        fields=('id', 'name'),
+        search_fields=('name',),
+        since_fields=('updated_at',),
+    )
+
+
+def lookup_cache_stats(request):
+    """Return lookup cache hit/miss counters"""
+    return JsonResponse(cache_stats())
+
+
+def reorder_report(request):
+    """Suggestions of the latest planning run as of today (or ?run=), shortest stock first"""
+    today = timezone.localdate()
+    runs = PlanningRun.objects.select_related('requisition').order_by('-id')
+    run_id = request.GET.get('run')
+    run = runs.filter(pk=run_id).first() if run_id and run_id.isdigit() else runs.filter(as_of=today).first()
+    page = None
+    if run is not None:
+        suggestions = (
+            run.suggestions.select_related('item', 'item__item_category')
+            .annotate(shortfall=ExpressionWrapper(F('reorder_point') - F('on_hand'), output_field=DecimalField()))
+            .order_by('-shortfall', 'item__item_code')
+        )
+        page = Paginator(suggestions, 100).get_page(request.GET.get('page'))
+    return render(request, "reorder_report.html", {
+        "run": run,
+        "page": page,
+        "today": today,
+    })
+
+
+# Days of issues shown as recent consumption on the item families report
+FAMILY_CONSUMPTION_DAYS = 90
+
+
+def item_families(request):
+    """Stock and recent consumption of each base item rolled up over all its variants"""
+    families = ItemDefinition.objects.filter(base_item__isnull=True).select_related('item_category').order_by('item_code')
+    page = Paginator(families, 100).get_page(request.GET.get('page'))
+    ids = [item.pk for item in page]
+    since = timezone.localdate() - timedelta(days=FAMILY_CONSUMPTION_DAYS)
+    variants = roll_up(
+        ItemDefinition.objects.filter(ancestor_paths__ancestor__in=ids, ancestor_paths__depth__gt=0),
+        item_field=None, count=Count('pk'),
     )
-    return JsonResponse(list(categories), safe=False)
+    stock = roll_up(
+        StockBalance.objects.filter(item__ancestor_paths__ancestor__in=ids),
+        quantity=Sum('quantity'), value=Sum('value'),
+    )
+    issued = roll_up(
+        StockMovement.objects.filter(item__ancestor_paths__ancestor__in=ids, source_type='ISS', movement_date__gt=since),
+        quantity=Sum('quantity'),
+    )
+    rows = [
+        {
+            'item': item,
+            'variants': variants.get(item.pk, {}).get('count', 0),
+            'on_hand': stock.get(item.pk, {}).get('quantity') or 0,
+            'value': stock.get(item.pk, {}).get('value') or 0,
+            'issued': -(issued.get(item.pk, {}).get('quantity') or 0),
+        }
+        for item in page
+    ]
+    return render(request, "item_families.html", {
+        "page": page,
+        "rows": rows,
+        "consumption_days": FAMILY_CONSUMPTION_DAYS,
+    })
+
+
+# Placeholder the streamed rows replace in the rendered stock_valuation.html
+VALUATION_ROWS = '__VALUATION_ROWS__'
+
+
+def _amount(value):
+    return Decimal(str(value or 0)).quantize(Decimal('0.01'))
+
+
+def _valuation_csv(rows):
+    for *labels, quantity, value in rows:
+        yield [*labels, _amount(quantity), _amount(value)]
+
+
+def _valuation_html(rows, level, filters):
+    """Table rows of the valuation; the summary level also totals each category"""
+    total_quantity = total_value = 0
+    if level == ITEMS:
+        for category, area, code, name, unit, quantity, value in rows:
+            quantity, value = _amount(quantity), _amount(value)
+            total_quantity += quantity
+            total_value += value
+            unit_cost = (value / quantity).quantize(Decimal('0.0001')) if quantity else ''
+            yield format_html(
+                '<tr><td>{}</td><td>{}</td><td>{} {}</td><td>{}</td><td class="text-right">{}</td>'
+                '<td class="text-right">{}</td><td class="text-right">{}</td></tr>',
+                category, area, code, name, unit, quantity, unit_cost, value,
+            )
+        yield format_html(
+            '<tr class="font-semibold"><td colspan="4">Total</td><td class="text-right">{}</td><td></td>'
+            '<td class="text-right">{}</td></tr>',
+            total_quantity, total_value,
+        )
+        return
+
+    def subtotal(name, quantity, value):
+        return format_html(
+            '<tr class="font-semibold"><td colspan="3">{}</td><td class="text-right">{}</td>'
+            '<td class="text-right">{}</td></tr>',
+            name, quantity, value,
+        )
+
+    current = None
+    for category_id, category, area_id, area, items, quantity, value in rows:
+        quantity, value = _amount(quantity), _amount(value)
+        if current is not None and current[0] != category_id:
+            yield subtotal(f"Total {current[1]}", *current[2:])
+            current = None
+        if current is None:
+            current = [category_id, category, 0, 0]
+        current[2] += quantity
+        current[3] += value
+        total_quantity += quantity
+        total_value += value
+        drill_down = urlencode({**filters, 'level': ITEMS, 'category': category_id, 'area': area_id})
+        yield format_html(
+            '<tr><td>{}</td><td><a href="?{}">{}</a></td><td class="text-right">{}</td>'
+            '<td class="text-right">{}</td><td class="text-right">{}</td></tr>',
+            category, drill_down, area, items, quantity, value,
+        )
+    if current is not None:
+        yield subtotal(f"Total {current[1]}", *current[2:])
+    yield subtotal("Total", total_quantity, total_value)
+
+
+def stock_valuation(request):
+    """
+    Stock value by category and area (?level=items for item lines), now or
+    at the end of ?as_of=YYYY-MM-DD, as HTML or ?format=csv. Narrow with
+    ?category= and ?area=. Rows are streamed as they are read.
+    """
+    level = request.GET.get('level', SUMMARY)
+    output = request.GET.get('format', 'html')
+    try:
+        as_of = parse_date(request.GET['as_of']) if request.GET.get('as_of') else None
+    except ValueError:
+        as_of = None
+    filters = {key: request.GET[key] for key in ('as_of', 'category', 'area') if request.GET.get(key)}
+    ids = {key: filters[key] for key in ('category', 'area') if key in filters}
+    if (
+        level not in LEVELS or output not in ('html', 'csv')
+        or ('as_of' in filters and as_of is None)
+        or not all(value.isdigit() for value in ids.values())
+    ):
+        return HttpResponse(
+            "Pass level (summary or items), format (html or csv), as_of (YYYY-MM-DD), category and area ids",
+            status=400, content_type="text/plain",
+        )
+    rows = valuation_rows(level, as_of, ids.get('category'), ids.get('area'))
+
+    if output == 'csv':
+        response = StreamingHttpResponse(iter_csv(_valuation_csv(rows), COLUMNS[level]), content_type="text/csv")
+        filename = f"stock-valuation-{as_of or timezone.localdate()}-{level}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    page = render_to_string("stock_valuation.html", {
+        "level": level,
+        "as_of": as_of,
+        "filtered": bool(ids),
+        "summary_query": urlencode({key: value for key, value in filters.items() if key == 'as_of'}),
+        "csv_query": urlencode({**filters, 'level': level, 'format': 'csv'}),
+        "rows_placeholder": VALUATION_ROWS,
+    }, request)
+    head, tail = page.split(VALUATION_ROWS)
+    return StreamingHttpResponse(chain([head], _valuation_html(rows, level, filters), [tail]))
+
+
+def lot_trace(request):
+    """Trace a gray receipt, challan, lot or document forward (?direction=forward) or backward"""
+    kind = request.GET.get('kind', 'lot')
+    key = request.GET.get('key', '').strip()
+    direction = request.GET.get('direction', 'forward')
+    if kind not in NODE_KINDS or not key or direction not in ('forward', 'backward'):
+        return JsonResponse({'error': f"Pass kind ({', '.join(NODE_KINDS)}), key and direction (forward or backward)"}, status=400)
+    return JsonResponse({'kind': kind, 'key': key, 'direction': direction, **trace(kind, key, direction)})
+
+
+# Lookups that can be requested together through lookup_batch
+BATCH_LOOKUPS = {
+    'area': lookup_area,
+    'customer': lookup_customer,
+    'department': lookup_department,
+    'inventory_category': lookup_inventory_category,
+    'item': lookup_item,
+    'purchase_order': lookup_purchase_order,
+    'requisition': lookup_requisition,
+    'supplier': lookup_supplier,
+}
+
+
+def lookup_batch(request):
+    """Return several lookup payloads in one response, e.g. ?models=area,department,customer"""
+    return batch_lookup_response(request, BATCH_LOOKUPS)